@@ -0,0 +1,316 @@
+# -*- coding: UTF-8 -*-
+"""
+Benchmark cases for PySDD.
+
+A benchmark is a function that takes one parameter and returns a tuple (prepare, run). The
+function itself and prepare are not timed. prepare() is called before every repetition and its
+result is passed to run(state), which is timed. run can return a dictionary with additional
+metrics of the result (e.g. the SDD size), these are stored together with the timings.
+
+The synthetic CNF families are deterministic: the same parameter always results in the same CNF.
+
+:author: Wannes Meert, Arthur Choi
+:copyright: Copyright 2017-2019 KU Leuven and Regents of the University of California.
+:license: Apache License, Version 2.0, see LICENSE for details.
+"""
+import atexit
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+from pysdd.sdd import SddManager, Fnf
+from pysdd.iterator import SddIterator
+from pysdd.wmcstochastic import WmcStochastic
+from pysdd import util
+
+
+root = Path(__file__).parent.parent
+example_inputs = root / "examples" / "input"
+test_inputs = root / "tests" / "rsrc"
+
+
+## CNF families
+
+def chain_cnf(var_count):
+    """Implication chain 1 <- 2 <- ... <- n (n + 1 models)."""
+    return Fnf.from_clauses([[var, -(var + 1)] for var in range(1, var_count)], var_count=var_count)
+
+
+def grid_cnf(width, height=3):
+    """Independent sets of a grid graph with the given width and height (a 2-CNF of bounded treewidth)."""
+    def var(row, col):
+        return row * width + col + 1
+    clauses = []
+    for row in range(height):
+        for col in range(width):
+            if col + 1 < width:
+                clauses.append([-var(row, col), -var(row, col + 1)])
+            if row + 1 < height:
+                clauses.append([-var(row, col), -var(row + 1, col)])
+    return Fnf.from_clauses(clauses, var_count=width * height)
+
+
+def random_3cnf(var_count, ratio=1.6, seed=0):
+    """Random 3-CNF with ratio * var_count clauses (below the phase transition, many models)."""
+    rng = np.random.default_rng(seed + var_count)
+    clause_count = int(ratio * var_count)
+    variables = np.array([rng.choice(var_count, 3, replace=False) + 1 for _ in range(clause_count)])
+    signs = rng.choice([-1, 1], size=(clause_count, 3))
+    return Fnf.from_clauses(variables * signs, var_count=var_count)
+
+
+families = {
+    "chain": chain_cnf,
+    "grid": grid_cnf,
+    "random3": random_3cnf,
+}
+
+
+def family_cnf(param):
+    family, size = param.split(":")
+    return families[family](int(size))
+
+
+def compiled(param):
+    """Manager and (referenced) SDD for a parameter of the form family:size."""
+    mgr, node = SddManager.from_fnf(family_cnf(param))
+    node.ref()
+    return mgr, node
+
+
+def literal_weights(var_count, seed=0):
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(0.1, 0.9, var_count)
+    return np.concatenate([(1 - pos)[::-1], pos])
+
+
+def write_nnf(node, filename):
+    """Write an SDD as a (decision) NNF file, the input format of util.nnf_file_wmc."""
+    circuit = node.to_arrays()
+    lines = []
+    index = np.empty(circuit.node_count, dtype=np.int64)
+    for i in range(circuit.node_count):
+        node_type = circuit.types[i]
+        if node_type == circuit.LITERAL:
+            lines.append("L {}".format(circuit.literals[i]))
+        elif node_type == circuit.TRUE:
+            lines.append("A 0")
+        elif node_type == circuit.FALSE:
+            lines.append("O 0 0")
+        else:
+            ands = []
+            for e in range(circuit.element_offsets[i], circuit.element_offsets[i + 1]):
+                lines.append("A 2 {} {}".format(index[circuit.primes[e]], index[circuit.subs[e]]))
+                ands.append(len(lines) - 1)
+            lines.append("O 0 {} {}".format(len(ands), " ".join(str(a) for a in ands)))
+        index[i] = len(lines) - 1
+    edge_count = sum(int(line.split()[1 if line[0] == "A" else 2]) for line in lines if line[0] != "L")
+    with open(filename, "w") as ofile:
+        print("nnf {} {} {}".format(len(lines), edge_count, circuit.var_count), file=ofile)
+        print("\n".join(lines), file=ofile)
+
+
+## Benchmarks
+
+def bench_compile(param):
+    """fnf_to_sdd on a synthetic CNF (with a balanced vtree)."""
+    fnf = family_cnf(param)
+
+    def run(_):
+        mgr, node = SddManager.from_fnf(fnf)
+        return {"sdd_size": node.size(), "sdd_count": node.count()}
+    return None, run
+
+
+def bench_compile_file(param):
+    """Read and compile a CNF file from examples/input."""
+    filename = bytes(example_inputs / param)
+
+    def run(_):
+        with redirect_stdout(io.StringIO()):
+            mgr, node = SddManager.from_cnf_file(filename)
+        return {"sdd_size": node.size(), "sdd_count": node.count()}
+    return None, run
+
+
+def bench_apply(param):
+    """Conjoin the clauses of a CNF one by one from Python (a linear fold of apply calls)."""
+    clauses = family_cnf(param).litsets()
+    var_count = max(abs(lit) for clause in clauses for lit in clause)
+
+    def run(_):
+        mgr = SddManager(var_count=var_count)
+        node = mgr.true()
+        for clause in clauses:
+            node = node & mgr.disjoin_all([mgr.literal(lit) for lit in clause])
+        return {"sdd_size": node.size()}
+    return None, run
+
+
+def bench_conjoin_all(param):
+    """Conjoin the clauses of a CNF with SddManager.conjoin_all."""
+    clauses = family_cnf(param).litsets()
+    var_count = max(abs(lit) for clause in clauses for lit in clause)
+
+    def run(_):
+        mgr = SddManager(var_count=var_count)
+        node = mgr.conjoin_all([mgr.disjoin_all([mgr.literal(lit) for lit in clause]) for clause in clauses])
+        return {"sdd_size": node.size()}
+    return None, run
+
+
+def bench_minimize(param):
+    """Global vtree search (SddManager.minimize) after compilation."""
+    def run(state):
+        mgr, node = state
+        mgr.minimize()
+        return {"sdd_size": node.size()}
+    return (lambda: compiled(param)), run
+
+
+def bench_wmc(param):
+    """WmcManager.propagate after setting all weights, 100 times."""
+    mgr, node = compiled(param)
+    wmc = node.wmc(log_mode=False)
+    weights = [literal_weights(mgr.var_count(), seed) for seed in range(100)]
+
+    def run(_):
+        for query in weights:
+            wmc.set_literal_weights_from_array(query)
+            wmc.propagate()
+        return {"sdd_size": node.size()}
+    return None, run
+
+
+def bench_wmc_incremental(param):
+    """WmcManager.propagate after changing the weights of one variable, 1000 times."""
+    mgr, node = compiled(param)
+    var_count = mgr.var_count()
+    wmc = node.wmc(log_mode=False)
+    wmc.set_literal_weights_from_array(literal_weights(var_count))
+    wmc.propagate()
+    rng = np.random.default_rng(0)
+    updates = list(zip(rng.integers(1, var_count + 1, 1000).tolist(), rng.uniform(0.1, 0.9, 1000).tolist()))
+
+    def run(_):
+        for var, pr in updates:
+            wmc.set_literal_weight(var, pr)
+            wmc.set_literal_weight(-var, 1 - pr)
+            wmc.propagate()
+    return None, run
+
+
+def bench_iterator(param):
+    """Smoothed model counting with SddIterator (a Python traversal)."""
+    mgr, node = compiled(param)
+
+    def run(_):
+        it = SddIterator(mgr, smooth=True, smooth_to_root=True)
+        it.depth_first(node, SddIterator.func_modelcounting)
+        return {"sdd_size": node.size()}
+    return None, run
+
+
+def bench_models(param):
+    """Enumerate all models with SddNode.models."""
+    mgr, node = compiled(param)
+
+    def run(_):
+        count = sum(1 for _ in node.models())
+        return {"model_count": count}
+    return None, run
+
+
+def bench_wmcstochastic(param):
+    """WmcStochastic.propagate_packed, the bit length is the parameter."""
+    mgr, node = compiled("grid:10")
+    wmc = WmcStochastic(node, log_mode=False)
+    for var in range(1, mgr.var_count() + 1):
+        wmc.set_literal_weight(var, 0.3)
+        wmc.set_literal_weight(-var, 0.7)
+
+    def run(_):
+        wmc.propagate_packed(bitlength=int(param), rng=np.random.default_rng(0))
+    return None, run
+
+
+def bench_wmcstochastic_bitwise(param):
+    """WmcStochastic.propagate (one bit at a time in Python), the bit length is the parameter."""
+    mgr, node = compiled("grid:10")
+    wmc = WmcStochastic(node, log_mode=False)
+    for var in range(1, mgr.var_count() + 1):
+        wmc.set_literal_weight(var, 0.3)
+        wmc.set_literal_weight(-var, 0.7)
+
+    def run(_):
+        wmc.propagate(bitlength=int(param))
+    return None, run
+
+
+def _saved_circuit(param, suffix):
+    mgr, node = compiled(param)
+    fd, filename = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    atexit.register(os.remove, filename)
+    if suffix == ".sdd":
+        mgr.save(filename, node)
+    else:
+        write_nnf(node, filename)
+    weights = np.array([literal_weights(mgr.var_count(), seed) for seed in range(100)])
+    return filename, weights
+
+
+def bench_sdd_file_wmc(param):
+    """util.sdd_file_wmc on an SDD file (100 queries)."""
+    filename, weights = _saved_circuit(param, ".sdd")
+
+    def run(_):
+        util.sdd_file_wmc(filename, weights)
+    return None, run
+
+
+def bench_nnf_file_wmc(param):
+    """util.nnf_file_wmc on an NNF file (100 queries)."""
+    filename, weights = _saved_circuit(param, ".nnf")
+
+    def run(_):
+        util.nnf_file_wmc(filename, weights)
+    return None, run
+
+
+def bench_psdd_file_wmc(param):
+    """util.psdd_file_wmc on a PSDD file from tests/rsrc (100 queries)."""
+    filename = str(test_inputs / param)
+    rng = np.random.default_rng(0)
+    with open(filename) as ifile:
+        var_count = max(abs(int(line.split()[3])) for line in ifile if line[:1] in ("L", "T"))
+    observations = rng.integers(-1, 2, size=(100, var_count))
+
+    def run(_):
+        util.psdd_file_wmc(filename, observations)
+    return None, run
+
+
+#: Benchmark name -> (function, parameters, parameters of the quick suite)
+benchmarks = {
+    "compile": (bench_compile, ["chain:200", "chain:400", "chain:800", "grid:10", "grid:20", "grid:30",
+                                "random3:16", "random3:20", "random3:24"],
+                ["chain:400", "grid:10", "random3:16"]),
+    "compile_file": (bench_compile_file, ["simple.cnf", "big-swap.cnf"], ["simple.cnf"]),
+    "apply": (bench_apply, ["chain:400", "grid:10", "grid:14", "random3:20"], ["grid:10"]),
+    "conjoin_all": (bench_conjoin_all, ["chain:400", "grid:10", "grid:14", "random3:20"], ["grid:10"]),
+    "minimize": (bench_minimize, ["grid:20", "random3:16", "random3:20"], ["random3:16"]),
+    "wmc": (bench_wmc, ["grid:20", "random3:24"], ["grid:10"]),
+    "wmc_incremental": (bench_wmc_incremental, ["grid:20", "random3:24"], ["grid:10"]),
+    "iterator": (bench_iterator, ["grid:20", "random3:20"], ["grid:10"]),
+    "models": (bench_models, ["chain:800", "random3:16"], ["chain:400"]),
+    "wmcstochastic": (bench_wmcstochastic, ["10000", "100000"], ["10000"]),
+    "wmcstochastic_bitwise": (bench_wmcstochastic_bitwise, ["100"], ["10"]),
+    "sdd_file_wmc": (bench_sdd_file_wmc, ["grid:20", "random3:24"], ["grid:10"]),
+    "nnf_file_wmc": (bench_nnf_file_wmc, ["grid:20", "random3:24"], ["grid:10"]),
+    "psdd_file_wmc": (bench_psdd_file_wmc, ["test.psdd", "loop.psdd"], ["test.psdd"]),
+}
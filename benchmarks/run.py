@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Run the PySDD benchmarks and compare them against a baseline.
+
+Every benchmark case (a benchmark and a parameter, e.g. ``compile[grid:20]``) runs in a fresh
+process, such that the peak memory (maximum resident set size) of the process can be attributed
+to the case. For every case the timings of all repetitions, the peak RSS and the metrics returned
+by the benchmark (e.g. the SDD size) are stored.
+
+Usage::
+
+    $ python benchmarks/run.py --quick --output baseline.json
+    $ python benchmarks/run.py --quick --baseline baseline.json
+    $ python benchmarks/run.py -k compile -k wmc --repeat 10
+
+:author: Wannes Meert, Arthur Choi
+:copyright: Copyright 2017-2019 KU Leuven and Regents of the University of California.
+:license: Apache License, Version 2.0, see LICENSE for details.
+"""
+import argparse
+import datetime
+import fnmatch
+import gc
+import json
+import multiprocessing
+import platform
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Maximum resident set size of this process in MB (None if not available)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_case(name, param, repeat):
+    """Run one case in the current process.
+
+    :return: Dictionary with the timings (in seconds), the peak RSS (in MB) and the metrics
+    """
+    from cases import benchmarks
+    func = benchmarks[name][0]
+    rss_start = peak_rss_mb()
+    prepare, run = func(param)
+    times = []
+    metrics = {}
+    for _ in range(repeat):
+        state = prepare() if prepare is not None else None
+        start = time.perf_counter()
+        result = run(state)
+        times.append(time.perf_counter() - start)
+        if result is not None:
+            metrics = result
+        # Managers are part of reference cycles (manager.root), free them before the next repetition
+        del state, result
+        gc.collect()
+    times_sorted = sorted(times)
+    return {
+        "min": times_sorted[0],
+        "median": times_sorted[len(times) // 2],
+        "times": times,
+        "peak_rss_mb": peak_rss_mb(),
+        "start_rss_mb": rss_start,
+        "metrics": metrics,
+    }
+
+
+def run_case_isolated(name, param, repeat):
+    """Run one case in a new process."""
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_case, (name, param, repeat))
+
+
+def selected_cases(patterns, quick):
+    from cases import benchmarks
+    cases = []
+    for name, (_, params, quick_params) in benchmarks.items():
+        for param in (quick_params if quick else params):
+            case = "{}[{}]".format(name, param)
+            if not patterns or any(pattern in case or fnmatch.fnmatch(case, pattern) for pattern in patterns):
+                cases.append((case, name, param))
+    return cases
+
+
+def compare(results, baseline, threshold):
+    """Print the relative timings and return the cases that are slower than threshold times the baseline."""
+    regressions = []
+    print("\n{:<40} {:>10} {:>10} {:>8}".format("case", "baseline", "current", "ratio"))
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        ratio = result["min"] / baseline[case]["min"] if baseline[case]["min"] > 0 else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions.append(case)
+            flag = " slower"
+        elif ratio < 1 / threshold:
+            flag = " faster"
+        print("{:<40} {:>9.4f}s {:>9.4f}s {:>7.2f}x{}".format(case, baseline[case]["min"], result["min"], ratio, flag))
+        for key, value in result["metrics"].items():
+            old_value = baseline[case]["metrics"].get(key)
+            if old_value is not None and old_value != value:
+                print("    {}: {} -> {}".format(key, old_value, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the PySDD benchmarks")
+    parser.add_argument("-k", dest="patterns", action="append", default=[],
+                        help="Only run the cases that contain this string or match this pattern (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="Only run the small parameters")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of repetitions of every case")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run all cases in this process (faster, but the peak RSS is not per case)")
+    parser.add_argument("--output", help="Store the results in this JSON file (e.g. to use as a baseline)")
+    parser.add_argument("--baseline", help="Compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="A case is a regression if its minimal time is more than threshold times the baseline")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit")
+    args = parser.parse_args(argv)
+
+    cases = selected_cases(args.patterns, args.quick)
+    if args.list:
+        for case, _, _ in cases:
+            print(case)
+        return 0
+
+    import pysdd
+    results = {}
+    print("{:<40} {:>10} {:>10} {:>10}  {}".format("case", "min", "median", "peak RSS", "metrics"))
+    for case, name, param in cases:
+        runner = run_case if args.in_process else run_case_isolated
+        result = runner(name, param, args.repeat)
+        results[case] = result
+        rss = "{:.1f} MB".format(result["peak_rss_mb"]) if result["peak_rss_mb"] is not None else "-"
+        metrics = " ".join("{}={}".format(key, value) for key, value in result["metrics"].items())
+        print("{:<40} {:>9.4f}s {:>9.4f}s {:>10}  {}".format(case, result["min"], result["median"], rss, metrics))
+        sys.stdout.flush()
+
+    if args.output is not None:
+        data = {
+            "meta": {
+                "date": datetime.datetime.now().isoformat(),
+                "pysdd": pysdd.__version__,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as ofile:
+            json.dump(data, ofile, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as ifile:
+            baseline = json.load(ifile)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if len(regressions) > 0:
+            print("\n{} regression(s): {}".format(len(regressions), ", ".join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
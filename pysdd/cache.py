@@ -0,0 +1,172 @@
+# -*- coding: UTF-8 -*-
+"""
+pysdd.cache
+~~~~~~~~~~~
+
+Persistent on-disk cache of compiled CNFs and DNFs.
+
+An entry is keyed by a hash of the normalized literal sets (the literals of every literal set
+are sorted, and the literal sets are sorted and deduplicated), the initial vtree and the compiler
+options that influence the compilation. It stores the compiled SDD together with the (possibly
+minimized) vtree of the manager in the binary format (see CompiledCircuit.save).
+
+:author: Wannes Meert, Arthur Choi
+:copyright: Copyright 2017-2019 KU Leuven and Regents of the University of California.
+:license: Apache License, Version 2.0, see LICENSE for details.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from .circuit import CompiledCircuit
+
+
+MYPY = False
+if MYPY:
+    from typing import Optional, Tuple, Union
+
+#: Changing this version invalidates all existing cache entries
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".sddbin"
+
+
+class CompilationCache:
+    def __init__(self, directory, max_size=None):
+        """A directory with compiled SDDs.
+
+        When an entry is stored and the total size of the entries exceeds max_size, the least
+        recently used entries are removed (a hit counts as a use).
+
+        :param directory: Directory of the cache, it is created if it does not exist
+        :param max_size: Maximal total size of the entries in bytes (None for no limit)
+        """
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self):
+        return "CompilationCache({}, entries={}, size={})".format(self.directory, len(self.entries()), self.size())
+
+    @staticmethod
+    def key(fnf, vtree, options=None):
+        """Hash of a CNF or DNF, the initial vtree and the compiler options.
+
+        :param fnf: Fnf object
+        :param vtree: Initial Vtree
+        :param options: Tuple with the values of the compiler options that influence the compilation
+        :return: Key as a hexadecimal string
+        """
+        litsets = sorted(set(tuple(sorted(set(litset))) for litset in fnf.litsets()))
+        lengths = np.array([len(litset) for litset in litsets], dtype="<i8")
+        literals = np.array([lit for litset in litsets for lit in litset], dtype="<i8")
+        left, right, var = vtree.to_arrays()
+        h = hashlib.sha256()
+        h.update("pysdd-cache-{} {} {} {}\n".format(
+            CACHE_VERSION, "dnf" if fnf._type_dnf else "cnf", fnf.var_count, options).encode())
+        for data in [lengths, literals, left, right, var]:
+            data = np.ascontiguousarray(data, dtype="<i8")
+            h.update(len(data).to_bytes(8, "little"))
+            h.update(data.tobytes())
+        return h.hexdigest()
+
+    def path(self, key):
+        return self.directory / (key + CACHE_SUFFIX)
+
+    def load(self, key):
+        # type: (CompilationCache, str) -> Optional[Tuple[SddManager, SddNode]]
+        """Load the manager and SDD stored for the key.
+
+        :return: Tuple (manager, node), or None if there is no (valid) entry for the key
+        """
+        from .sdd import SddManager
+        path = self.path(key)
+        try:
+            # The circuit is validated by from_circuit
+            mgr, node = SddManager.from_circuit(CompiledCircuit.load(path, mmap=False, validate=False))
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return mgr, node
+
+    def store(self, key, node):
+        """Store the SDD, together with the vtree of its manager, for the key.
+
+        The entry is written to a temporary file first such that other processes never read a
+        partially written entry.
+        """
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=str(self.directory))
+        os.close(fd)
+        try:
+            node.to_arrays().save(tmp_path)
+            os.replace(tmp_path, str(self.path(key)))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict(keep=key)
+
+    def entries(self):
+        """Paths of the entries, least recently used first."""
+        entries = []
+        for path in self.directory.glob("*" + CACHE_SUFFIX):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:  # Removed by another process
+                pass
+        return [path for _, path in sorted(entries)]
+
+    def size(self):
+        """Total size of the entries in bytes."""
+        total = 0
+        for path in self.entries():
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def evict(self, keep=None):
+        """Remove the least recently used entries until the total size is at most max_size.
+
+        :param keep: Key of an entry that is not removed
+        """
+        if self.max_size is None:
+            return
+        entries = []
+        for path in self.entries():
+            try:
+                entries.append((path, path.stat().st_size))
+            except OSError:
+                pass
+        total = sum(size for _, size in entries)
+        for path, size in entries:
+            if total <= self.max_size:
+                break
+            if keep is not None and path == self.path(keep):
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Remove all entries."""
+        for path in self.entries():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def get_cache(cache_dir):
+    # type: (Union[CompilationCache, str, Path]) -> CompilationCache
+    """A CompilationCache for a directory (or the given CompilationCache)."""
+    if isinstance(cache_dir, CompilationCache):
+        return cache_dir
+    return CompilationCache(cache_dir)
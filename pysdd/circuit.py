@@ -0,0 +1,423 @@
+# -*- coding: UTF-8 -*-
+"""
+pysdd.circuit
+~~~~~~~~~~~~~
+
+Flat, array-based representation of an SDD for vectorized evaluation with NumPy.
+
+A CompiledCircuit does not depend on the SDD manager it was created from. It can thus be
+pickled, sent to other processes and used after the manager has been freed.
+
+:author: Wannes Meert, Arthur Choi
+:copyright: Copyright 2017-2019 KU Leuven and Regents of the University of California.
+:license: Apache License, Version 2.0, see LICENSE for details.
+"""
+import struct
+
+import numpy as np
+
+
+# Binary format: a header followed by the arrays, every array starts at a multiple of 8 bytes
+# (integers are stored as little-endian 64-bit integers, node types as bytes)
+BINARY_MAGIC = b"PYSDDBIN"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<8sIIqqqq")  # magic, version, flags, var_count, vtree count, node count, element count
+
+
+def validate_vtree_arrays(left, right, var):
+    """Check that arrays indexed by vtree position represent a vtree (see Vtree.to_arrays).
+
+    Every internal node has two children, every node except the root has one parent, the leaves
+    contain the variables 1 to var_count and the positions are the in-order positions of the nodes.
+
+    :param left: Position of the left child of every vtree node, -1 for leaves
+    :param right: Position of the right child of every vtree node, -1 for leaves
+    :param var: Variable of every vtree node (ignored for internal nodes)
+    :return: Position of the root, a ValueError is raised if the arrays do not represent a vtree
+    """
+    left = np.asarray(left, dtype=np.int64)
+    right = np.asarray(right, dtype=np.int64)
+    var = np.asarray(var, dtype=np.int64)
+    node_count = len(left)
+    if node_count == 0 or node_count % 2 == 0 or len(right) != node_count or len(var) != node_count:
+        raise ValueError("Expected three arrays of length 2*var_count-1")
+    var_count = (node_count + 1) // 2
+    is_leaf = left < 0
+    if np.any(is_leaf != (right < 0)) or np.any(left >= node_count) or np.any(right >= node_count):
+        raise ValueError("Arrays do not represent a vtree: invalid child positions")
+    leaf_vars = var[is_leaf]
+    if len(leaf_vars) != var_count or np.any(leaf_vars < 1) or np.any(leaf_vars > var_count) or \
+            len(np.unique(leaf_vars)) != var_count:
+        raise ValueError("Arrays do not represent a vtree: the leaves should contain the variables 1 to {}"
+                         .format(var_count))
+    children = np.concatenate([left[~is_leaf], right[~is_leaf]])
+    parent_counts = np.bincount(children, minlength=node_count)
+    roots = np.flatnonzero(parent_counts == 0)
+    if len(roots) != 1 or np.any(parent_counts > 1):
+        raise ValueError("Arrays do not represent a vtree: every node except the root should have one parent")
+    # The in-order traversal should visit the positions 0, 1, 2, ... (this also excludes cycles)
+    expected = 0
+    stack = []
+    position = int(roots[0])
+    while stack or position >= 0:
+        if position >= 0:
+            stack.append(position)
+            position = int(left[position])
+        else:
+            position = stack.pop()
+            if position != expected or expected >= node_count:
+                raise ValueError("Arrays do not represent a vtree: positions are not in-order")
+            expected += 1
+            position = int(right[position])
+    if expected != node_count:
+        raise ValueError("Arrays do not represent a vtree: not all nodes are connected to the root")
+    return int(roots[0])
+
+
+class CompiledCircuit:
+    """An SDD stored in contiguous NumPy arrays.
+
+    Nodes are sorted topologically (children before parents), the root is the last node.
+    The elements of decision node i are the pairs ``(primes[e], subs[e])`` for
+    ``element_offsets[i] <= e < element_offsets[i+1]``, where primes and subs are node indices.
+
+    The vtree of the manager is stored by vtree position (in-order, starting at 0).
+    Trivial nodes (true and false) are assumed to be normalized for the root of the vtree.
+
+    :param var_count: Number of variables in the manager
+    :param types: Node types (FALSE, TRUE, LITERAL or DECISION)
+    :param literals: Literal of literal nodes, 0 for other nodes
+    :param element_offsets: Array of length node_count+1 with the start of the elements of every node
+    :param primes: Node index of the prime of every element
+    :param subs: Node index of the sub of every element
+    :param vtree_positions: Vtree position of every node, -1 for true and false
+    :param vtree_left: Position of the left child of every vtree node, -1 for leaves
+    :param vtree_right: Position of the right child of every vtree node, -1 for leaves
+    :param vtree_vars: Variable of every vtree node, 0 for internal nodes
+    :param ids: Optional ids of the SDD nodes
+    """
+    FALSE = 0
+    TRUE = 1
+    LITERAL = 2
+    DECISION = 3
+
+    def __init__(self, var_count, types, literals, element_offsets, primes, subs,
+                 vtree_positions, vtree_left, vtree_right, vtree_vars, ids=None):
+        self.var_count = var_count
+        self.types = np.asarray(types, dtype=np.int8)
+        self.literals = np.asarray(literals, dtype=np.int64)
+        self.element_offsets = np.asarray(element_offsets, dtype=np.int64)
+        self.primes = np.asarray(primes, dtype=np.int64)
+        self.subs = np.asarray(subs, dtype=np.int64)
+        self.vtree_positions = np.asarray(vtree_positions, dtype=np.int64)
+        self.vtree_left = np.asarray(vtree_left, dtype=np.int64)
+        self.vtree_right = np.asarray(vtree_right, dtype=np.int64)
+        self.vtree_vars = np.asarray(vtree_vars, dtype=np.int64)
+        self.ids = None if ids is None else np.asarray(ids, dtype=np.int64)
+        self._levels = None
+        self._vtree_postorder = None
+        self._gaps = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_levels"] = None
+        state["_vtree_postorder"] = None
+        state["_gaps"] = None
+        return state
+
+    @staticmethod
+    def _binary_layout(vtree_count, node_count, element_count):
+        """Arrays in the order of the binary format, with their dtype and length."""
+        return [("vtree_left", "<i8", vtree_count), ("vtree_right", "<i8", vtree_count),
+                ("vtree_vars", "<i8", vtree_count), ("literals", "<i8", node_count),
+                ("vtree_positions", "<i8", node_count), ("element_offsets", "<i8", node_count + 1),
+                ("primes", "<i8", element_count), ("subs", "<i8", element_count),
+                ("types", "i1", node_count)]
+
+    def save(self, filename):
+        """Save the circuit to a binary file.
+
+        The file starts with a versioned header and stores the vtree, node table and element
+        arrays contiguously, such that it can be loaded without parsing (see load).
+        """
+        with open(filename, "wb") as ofile:
+            ofile.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, self.var_count,
+                                           len(self.vtree_vars), self.node_count, self.element_count))
+            for name, dtype, _ in self._binary_layout(len(self.vtree_vars), self.node_count, self.element_count):
+                data = np.ascontiguousarray(getattr(self, name), dtype=dtype)
+                data.tofile(ofile)
+                if data.nbytes % 8 != 0:
+                    ofile.write(bytes(8 - data.nbytes % 8))
+
+    @staticmethod
+    def load(filename, mmap=True, validate=True):
+        """Load a circuit from a binary file (see save).
+
+        :param filename: Filename
+        :param mmap: Memory map the file instead of reading it, the arrays of the circuit are then
+            read-only views on the file and are only loaded from disk when used
+        :param validate: Check the circuit (see validate), this reads all arrays. If False, only the
+            header and the file size are checked. Circuits are always validated before they are
+            passed to libsdd (see SddManager.circuit_to_sdd).
+        :return: CompiledCircuit
+        """
+        if mmap:
+            data = np.memmap(filename, dtype=np.uint8, mode="r")
+        else:
+            data = np.fromfile(filename, dtype=np.uint8)
+        if len(data) < BINARY_HEADER.size:
+            raise ValueError("Not a binary SDD file: {}".format(filename))
+        magic, version, _, var_count, vtree_count, node_count, element_count = \
+            BINARY_HEADER.unpack(data[:BINARY_HEADER.size].tobytes())
+        if magic != BINARY_MAGIC:
+            raise ValueError("Not a binary SDD file: {}".format(filename))
+        if version != BINARY_VERSION:
+            raise ValueError("Unsupported version of the binary SDD format: {}".format(version))
+        arrays = {}
+        offset = BINARY_HEADER.size
+        for name, dtype, length in CompiledCircuit._binary_layout(vtree_count, node_count, element_count):
+            nbytes = np.dtype(dtype).itemsize * length
+            if offset + nbytes > len(data):
+                raise ValueError("Binary SDD file is truncated: {}".format(filename))
+            arrays[name] = np.asarray(data[offset:offset + nbytes]).view(dtype)
+            offset += nbytes + (-nbytes % 8)
+        circuit = CompiledCircuit(var_count, arrays["types"], arrays["literals"], arrays["element_offsets"],
+                                  arrays["primes"], arrays["subs"], arrays["vtree_positions"], arrays["vtree_left"],
+                                  arrays["vtree_right"], arrays["vtree_vars"])
+        if validate:
+            circuit.validate()
+        return circuit
+
+    def validate(self):
+        """Check that the arrays represent a circuit, such that it can be safely evaluated or passed to libsdd.
+
+        Checked are the array lengths, the node types, the element offsets, the topological order of
+        the nodes, the literals and the vtree (positions). Whether the elements of a decision node
+        form a compressed partition is not checked. A ValueError is raised if the circuit is not valid.
+        """
+        node_count, element_count = self.node_count, self.element_count
+        vtree_count = len(self.vtree_vars)
+        if self.var_count < 1 or vtree_count != 2 * self.var_count - 1:
+            raise ValueError("Invalid circuit: expected a vtree with {} nodes".format(2 * self.var_count - 1))
+        validate_vtree_arrays(self.vtree_left, self.vtree_right, self.vtree_vars)
+        if node_count == 0:
+            raise ValueError("Invalid circuit: no nodes")
+        if len(self.literals) != node_count or len(self.vtree_positions) != node_count or \
+                len(self.element_offsets) != node_count + 1 or len(self.subs) != element_count:
+            raise ValueError("Invalid circuit: inconsistent array lengths")
+        types = self.types
+        if np.any(types < self.FALSE) or np.any(types > self.DECISION):
+            raise ValueError("Invalid circuit: unknown node type")
+        counts = np.diff(self.element_offsets)
+        if self.element_offsets[0] != 0 or np.any(counts < 0) or self.element_offsets[-1] != element_count:
+            raise ValueError("Invalid circuit: element offsets should increase from 0 to the number of elements")
+        is_decision = types == self.DECISION
+        if np.any(counts[is_decision] == 0) or np.any(counts[~is_decision] != 0):
+            raise ValueError("Invalid circuit: only decision nodes have elements")
+        literals = self.literals[types == self.LITERAL]
+        if np.any(literals == 0) or np.any(np.abs(literals) > self.var_count):
+            raise ValueError("Invalid circuit: literals should be within +-{}".format(self.var_count))
+        positions = self.vtree_positions
+        is_trivial = types <= self.TRUE
+        if np.any(positions[~is_trivial] < 0) or np.any(positions >= vtree_count) or np.any(positions < -1):
+            raise ValueError("Invalid circuit: vtree positions should be smaller than {}".format(vtree_count))
+        if np.any(self.vtree_left[positions[is_decision]] < 0):
+            raise ValueError("Invalid circuit: decision nodes should be normalized for an internal vtree node")
+        node_of_element = np.repeat(np.arange(node_count), counts)
+        for children in (self.primes, self.subs):
+            if np.any(children < 0) or np.any(children >= node_of_element):
+                raise ValueError("Invalid circuit: nodes should appear after their primes and subs")
+        if np.any(types[self.primes] <= self.TRUE):
+            raise ValueError("Invalid circuit: primes cannot be true or false")
+
+    @property
+    def node_count(self):
+        return len(self.types)
+
+    @property
+    def element_count(self):
+        return len(self.primes)
+
+    @property
+    def root(self):
+        """Index of the root node."""
+        return self.node_count - 1
+
+    @property
+    def vtree_root(self):
+        """Position of the root of the vtree."""
+        is_child = np.zeros(len(self.vtree_vars), dtype=bool)
+        is_child[self.vtree_left[self.vtree_left >= 0]] = True
+        is_child[self.vtree_right[self.vtree_right >= 0]] = True
+        return int(np.flatnonzero(~is_child)[0])
+
+    def used_variables(self):
+        """Boolean array of size var_count+1, True for the variables that appear in the SDD."""
+        used = np.zeros(self.var_count + 1, dtype=bool)
+        used[np.abs(self.literals[self.types == self.LITERAL])] = True
+        return used
+
+    def levels(self):
+        """Decision nodes grouped by height, such that all children of a group appear in earlier groups.
+
+        :return: List of tuples (nodes, elements, starts) with the node indices of the group,
+            the concatenated element indices of these nodes and the offset of the elements
+            of each node in the elements array
+        """
+        if self._levels is not None:
+            return self._levels
+        offsets = self.element_offsets.tolist()
+        primes = self.primes.tolist()
+        subs = self.subs.tolist()
+        height = [0] * self.node_count
+        for i, node_type in enumerate(self.types.tolist()):
+            if node_type == self.DECISION:
+                h = 0
+                for e in range(offsets[i], offsets[i + 1]):
+                    h = max(h, height[primes[e]], height[subs[e]])
+                height[i] = h + 1
+        height = np.array(height, dtype=np.int64)
+        levels = []
+        for h in range(1, int(height.max(initial=0)) + 1):
+            nodes = np.flatnonzero(height == h)
+            counts = self.element_offsets[nodes + 1] - self.element_offsets[nodes]
+            starts = np.zeros(len(nodes), dtype=np.int64)
+            np.cumsum(counts[:-1], out=starts[1:])
+            elements = np.repeat(self.element_offsets[nodes] - starts, counts) + np.arange(counts.sum())
+            levels.append((nodes, elements, starts))
+        self._levels = levels
+        return levels
+
+    def _vtree_bottom_up(self):
+        if self._vtree_postorder is None:
+            order = []
+            stack = [self.vtree_root]
+            while stack:
+                position = stack.pop()
+                order.append(position)
+                if self.vtree_left[position] >= 0:
+                    stack.append(self.vtree_left[position])
+                    stack.append(self.vtree_right[position])
+            self._vtree_postorder = order[::-1]
+        return self._vtree_postorder
+
+    def smoothing_gaps(self):
+        """Vtree nodes that are missing below the primes and subs, used to smooth the circuit.
+
+        :return: Tuple (prime gaps, sub gaps, root gap, gap offsets, gap vtree nodes). Element e misses
+            the variables of the vtree nodes ``gap_vtrees[gap_offsets[g]:gap_offsets[g+1]]`` below its
+            prime for ``g = prime_gaps[e]`` (and similarly for its sub). The root misses the vtree nodes
+            of root gap with respect to the root of the vtree. Gap 0 is empty.
+        """
+        if self._gaps is None:
+            from .sdd import _semiring_gaps
+            self._gaps = _semiring_gaps(
+                np.ascontiguousarray(self.element_offsets), np.ascontiguousarray(self.primes),
+                np.ascontiguousarray(self.subs), np.ascontiguousarray(self.vtree_positions),
+                np.ascontiguousarray(self.vtree_left), np.ascontiguousarray(self.vtree_right), self.vtree_root)
+        return self._gaps
+
+    def evaluate(self, semiring, weights=None, native=True):
+        """Evaluate the smoothed circuit in a semiring, see pysdd.semiring.evaluate.
+
+        :param semiring: Semiring, for example pysdd.semiring.MAX_PRODUCT
+        :param weights: Literal weights (literals [-3, -2, -1, 1, 2, 3]), one row per query, or None
+            for weight one
+        :param native: Use the native implementation for the built-in semirings
+        :return: Value of the circuit, or an array with one value per query
+        """
+        from .semiring import evaluate
+        return evaluate(self, semiring, weights, native)
+
+    def true_wmcs(self, weights, log_mode=False):
+        """Weighted model counts of true over the used and unused variables of every vtree node.
+
+        :param weights: Array of shape (<nb_queries>, 2*var_count) with literal weights
+        :param log_mode: Weights are in log-space
+        :return: Tuple (used, unused) of arrays with shape (<nb_vtree_nodes>, <nb_queries>)
+        """
+        n = self.var_count
+        one = 0.0 if log_mode else 1.0
+        used_vars = self.used_variables()
+        vtree_count = len(self.vtree_vars)
+        used = np.empty((vtree_count, weights.shape[0]))
+        unused = np.empty((vtree_count, weights.shape[0]))
+        for position in self._vtree_bottom_up():
+            var = self.vtree_vars[position]
+            if self.vtree_left[position] < 0:
+                pw, nw = weights[:, n + var - 1], weights[:, n - var]
+                total = np.logaddexp(pw, nw) if log_mode else pw + nw
+                used[position], unused[position] = (total, one) if used_vars[var] else (one, total)
+            else:
+                left, right = self.vtree_left[position], self.vtree_right[position]
+                if log_mode:
+                    used[position] = used[left] + used[right]
+                    unused[position] = unused[left] + unused[right]
+                else:
+                    used[position] = used[left] * used[right]
+                    unused[position] = unused[left] * unused[right]
+        return used, unused
+
+    def node_wmcs(self, weights, log_mode=False):
+        """Weighted model count of every node over the used variables of its vtree.
+
+        :param weights: Array of shape (<nb_queries>, 2*var_count) with literal weights
+        :param log_mode: Weights are in log-space
+        :return: Tuple (node wmcs, used true wmcs, unused true wmcs), the node wmcs have
+            shape (<nb_nodes>, <nb_queries>)
+        """
+        n = self.var_count
+        zero, one = (-np.inf, 0.0) if log_mode else (0.0, 1.0)
+        used, unused = self.true_wmcs(weights, log_mode)
+        # An extra row for trivial nodes (vtree position -1)
+        used_ext = np.vstack([used, np.full((1, weights.shape[0]), one)])
+
+        values = np.empty((self.node_count, weights.shape[0]))
+        values[self.types == self.FALSE] = zero
+        values[self.types == self.TRUE] = one
+        is_literal = self.types == self.LITERAL
+        lits = self.literals[is_literal]
+        values[is_literal] = weights[:, np.where(lits > 0, n + lits - 1, n + lits)].T
+
+        node_of_element = np.repeat(np.arange(self.node_count), np.diff(self.element_offsets))
+        element_vtree = self.vtree_positions[node_of_element]
+        element_left = self.vtree_left[element_vtree]
+        element_right = self.vtree_right[element_vtree]
+        for nodes, elements, starts in self.levels():
+            primes, subs = self.primes[elements], self.subs[elements]
+            prime_vtree = self.vtree_positions[primes]
+            sub_vtree = self.vtree_positions[subs]
+            left, right = element_left[elements], element_right[elements]
+            if log_mode:
+                products = (values[primes] + used_ext[left] - used_ext[prime_vtree]
+                            + values[subs] + used_ext[right] - used_ext[sub_vtree])
+                values[nodes] = np.logaddexp.reduceat(products, starts, axis=0)
+            else:
+                products = (values[primes] * used_ext[left] / used_ext[prime_vtree]
+                            * values[subs] * used_ext[right] / used_ext[sub_vtree])
+                values[nodes] = np.add.reduceat(products, starts, axis=0)
+        return values, used, unused
+
+    def wmc(self, weights, log_mode=False):
+        """Weighted model count of the circuit.
+
+        :param weights: Array with the literal weights (literals [-3, -2, -1, 1, 2, 3]), the same layout
+            as for WmcManager.set_literal_weights_from_array, or a 2D array with one row per query
+        :param log_mode: Weights and result are in log-space
+        :return: Weighted model count, or an array with one count per query
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        single = weights.ndim == 1
+        weights = np.atleast_2d(weights)
+        if weights.shape[1] != 2 * self.var_count:
+            raise ValueError("Expected {} weights per query, got {}".format(2 * self.var_count, weights.shape[1]))
+        values, used, unused = self.node_wmcs(weights, log_mode)
+        if log_mode:
+            result = values[self.root] + unused[self.vtree_root]
+        else:
+            result = values[self.root] * unused[self.vtree_root]
+        return result[0] if single else result
+
+    def __repr__(self):
+        return "CompiledCircuit(vars={}, nodes={}, elements={})".format(
+            self.var_count, self.node_count, self.element_count)
@@ -8,7 +8,7 @@ __license__ = "APL"
 
 from . cimport sddapi_c
 
-cdef extern from "compiler.h":
+cdef extern from "compiler.h" nogil:
     ctypedef struct SddCompilerOptions:
         # input files
         char* cnf_filename         # input cnf filename
@@ -28,10 +28,31 @@ cdef extern from "compiler.h":
         int vtree_search_mode       #  vtree search mode
         int post_search             #  post-compilation search
         int verbose                 #  print manager
+    ctypedef struct LitSet:
+        sddapi_c.SddSize id;
+        sddapi_c.SddLiteral literal_count;
+        sddapi_c.SddLiteral* literals;
+        sddapi_c.BoolOp op;
     ctypedef struct Fnf:
         long long var_count;
         sddapi_c.SddSize litset_count;
+        LitSet* litsets;
+        sddapi_c.BoolOp op;
     ctypedef Fnf Cnf;
     ctypedef Fnf Dnf;
+    ctypedef struct FnfLimits:
+        sddapi_c.SddSize max_node_count;
+        sddapi_c.SddSize max_memory;
+        int* cancelled;
+        int* timed_out;
+        int status;
+        sddapi_c.SddSize litset_done_count;
+    enum:
+        FNF_COMPLETED
+        FNF_CANCELLED
+        FNF_TIMED_OUT
+        FNF_NODE_COUNT_EXCEEDED
+        FNF_MEMORY_EXCEEDED
 
     sddapi_c.SddNode* fnf_to_sdd(Fnf* fnf, sddapi_c.SddManager* manager);
+    sddapi_c.SddNode* fnf_to_sdd_limited(Fnf* fnf, sddapi_c.SddManager* manager, FnfLimits* limits);
@@ -7,15 +7,51 @@ pysdd.iterator
 :copyright: Copyright 2017-2019 KU Leuven and Regents of the University of California.
 :license: Apache License, Version 2.0, see LICENSE for details.
 """
-from collections import deque
 from .sdd import SddManager, Vtree, SddNode
-from .util import BitArray
 
 MYPY = False
 if MYPY:
     from typing import Dict, Set, Optional, List, Tuple, Callable, Union
 
 
+class VtreeVars:
+    def __init__(self, first, last, leaf_vars, var_positions):
+        """Variables below a vtree node, represented by positions instead of a set.
+
+        In the vtree inorder, the nodes below a vtree node have positions first, ..., last and the
+        leaves are at the positions first, first + 2, ..., last. Behaves as a read-only set of variables.
+
+        :param first: Position of the leftmost leaf (first > last for no variables)
+        :param last: Position of the rightmost leaf
+        :param leaf_vars: Variable for every vtree position (0 for internal nodes)
+        :param var_positions: Vtree position for every variable
+        """
+        self.first = first
+        self.last = last
+        self._leaf_vars = leaf_vars
+        self._var_positions = var_positions
+
+    def __len__(self):
+        if self.last < self.first:
+            return 0
+        return (self.last - self.first) // 2 + 1
+
+    def __contains__(self, var):
+        if var <= 0 or var >= len(self._var_positions):
+            return False
+        return self.first <= self._var_positions[var] <= self.last
+
+    def __iter__(self):
+        for pos in range(self.first, self.last + 1, 2):
+            yield self._leaf_vars[pos]
+
+    def __sub__(self, other):
+        return set(self) - set(other)
+
+    def __repr__(self):
+        return "VtreeVars({})".format(sorted(self))
+
+
 class SddIterator:
     def __init__(self, sdd, smooth=True, smooth_to_root=False):
         """Simple iterator to iterate over the SDD graph.
@@ -24,9 +60,9 @@ class SddIterator:
         (1) it contains at least one indicator for each variable in X, and
         (2) for every child c of '+'-node n, we have vars(n) = vars(c).
 
-        Note, if you know that you will be performing WMC, smoothing can be implemented more efficient
-        by keeping track of the expected WMC of used and unused variables in the vtree instead of keeping
-        track of the sets of variables as is done in this iterator.
+        The graph is traversed with an explicit stack (deep SDDs do not hit the recursion limit).
+        The variables of the vtree nodes are not stored as sets but as ranges of vtree positions
+        (see VtreeVars), the number of missing variables is thus a difference of counts.
 
         :param sdd: WmcManager
         :param smooth: Perform smoothing while iterating over the graph
@@ -34,37 +70,51 @@ class SddIterator:
         """
         self.sdd = sdd  # type: SddManager
         self.vtree = sdd.vtree()  # type: Vtree
-        self._wmc_cache = dict()  # type: Dict[SddNode, Union[float, int]]
-        # Map Vtree node positions to expected variables
-        self._expected_vars = None  # type: Optional[Dict[int, Set[int]]]
-        # Map Sdd nodes to missing variables
-        self._missing_vars = dict()  # type: Dict[SddNode, Set[int]]
+        # Map Sdd node ids to the results
+        self._wmc_cache = dict()  # type: Dict[int, Union[float, int]]
+        # Vtree node positions to expected variables
+        self._expected_vars = None  # type: Optional[List[VtreeVars]]
+        # Vtree node positions to the positions of the children (-1 for leaves)
+        self._vtree_left = None  # type: Optional[List[int]]
+        self._vtree_right = None  # type: Optional[List[int]]
+        self._no_vars = VtreeVars(0, -1, [], [])
         self.smooth = smooth  # type: bool
         self.smooth_to_root = smooth_to_root  # type: bool
 
+        self._cache_vtree()
         if self.smooth:
             self._cache_expected_vars()
 
+    def _cache_vtree(self):
+        left, right, _ = self.vtree.to_arrays()
+        self._vtree_left = left.tolist()
+        self._vtree_right = right.tolist()
+
     def _cache_expected_vars(self):
-        self._expected_vars = dict()
-        nb_vtree_nodes = self.sdd.var_count() * 2 - 1
-        # visited = [False] * nb_vtree_nodes
-        visited = BitArray(nb_vtree_nodes)
-        queue = deque([self.vtree])
-        while len(queue) > 0:
-            node = queue.pop()  # type: Vtree
-            pos = node.position()
-            if node.is_leaf():
-                self._expected_vars[pos] = {node.var()}
-            else:
-                if visited[pos]:
-                    self._expected_vars[pos] = self._expected_vars[node.left().position()] | \
-                                               self._expected_vars[node.right().position()]
-                else:
-                    visited[pos] = True
-                    queue.append(node)
-                    queue.append(node.right())
-                    queue.append(node.left())
+        left, right = self._vtree_left, self._vtree_right
+        leaf_vars = self.vtree.to_arrays()[2].tolist()
+        nb_vtree_nodes = len(leaf_vars)
+        var_positions = [0] * (max(leaf_vars, default=0) + 1)
+        for pos, var in enumerate(leaf_vars):
+            if var != 0:
+                var_positions[var] = pos
+        # In the reversed preorder, children come before their parent
+        first = list(range(nb_vtree_nodes))
+        last = list(range(nb_vtree_nodes))
+        preorder = []
+        stack = [self.vtree.position()]
+        while len(stack) > 0:
+            pos = stack.pop()
+            preorder.append(pos)
+            if left[pos] >= 0:
+                stack.append(left[pos])
+                stack.append(right[pos])
+        for pos in reversed(preorder):
+            if left[pos] >= 0:
+                first[pos] = first[left[pos]]
+                last[pos] = last[right[pos]]
+        self._expected_vars = [VtreeVars(first[pos], last[pos], leaf_vars, var_positions)
+                               for pos in range(nb_vtree_nodes)]
 
     def depth_first_from_root(self, func):
         # type: (SddIterator, Callable) -> List[Union[int, float]]
@@ -93,6 +143,7 @@ class SddIterator:
           * sub_vars: Variables present in sub
           * expected_prime_vars: Variables that are expected in prime
           * expected_sub_vars: Variables that are expected in sub
+          The sets of variables support len, in and iteration (they are VtreeVars objects or sets).
           The return value can be any type, there are no assumptions.
           For WMC this is typically float, and for MC int.
         :return:
@@ -102,68 +153,73 @@ class SddIterator:
             self._cache_expected_vars()
         if self.smooth and (node.is_true() or node.is_literal()):
             wmc = func(node, None, self._expected_vars[self.vtree.position()], set())
-        else:    
+        else:
             wmc = self.depth_first_rec(node, func)
         if self.smooth_to_root and not (node.is_true() or node.is_literal() or node.is_false()):
-            root = self.vtree.root()
-            if root != node.vtree():
+            root_pos = self.vtree.position()
+            node_pos = node.vtree_position()
+            if root_pos != node_pos:
                 wmc_prime = wmc
                 wmc_sub = func(self.sdd.true(), None, None, None)
-                used_prime_vars = self._expected_vars[node.vtree().position()]
+                used_prime_vars = self._expected_vars[node_pos]
                 used_sub_vars = set()
                 rvalues = [(wmc_prime, wmc_sub, used_prime_vars, used_sub_vars)]
                 expected_prime_vars = used_prime_vars
-                expected_sub_vars = self._expected_vars[root.position()] - used_prime_vars
+                expected_sub_vars = self._expected_vars[root_pos] - used_prime_vars
                 wmc = func(None, rvalues, expected_prime_vars, expected_sub_vars)
         return wmc
 
     def depth_first_rec(self, node, func):
         # type: (SddIterator, SddNode, Callable) -> Union[int, float]
-        if node in self._wmc_cache:
-            return self._wmc_cache[node]
-        if node.is_false():
-            result = func(node, None, None, None)
-            self._wmc_cache[node] = result
-            return result
-        if node.is_true():
-            result = func(node, None, None, None)
-            self._wmc_cache[node] = result
-            return result
-        vtree = node.vtree()
-        if node.is_decision():
-            rvalues = []
-            vtree_left = vtree.left()
-            if not self.smooth or vtree_left is None:
-                expected_prime_vars = set()
-            else:
-                expected_prime_vars = self._expected_vars[vtree_left.position()]
-            vtree_right = vtree.right()
-            if not self.smooth or vtree_right is None:
-                expected_sub_vars = set()
+        """Call func on all nodes below node, children before parents.
+
+        Despite the name, this uses an explicit stack instead of recursion. The results are
+        cached by node id.
+        """
+        cache = self._wmc_cache
+        smooth = self.smooth
+        expected_vars = self._expected_vars
+        no_vars = self._no_vars
+        root_id = node.id
+        # Stack of (node, elements), elements is None if the children are not yet pushed
+        stack = [(node, None)]
+        while len(stack) > 0:
+            node, elements = stack.pop()
+            node_id = node.id
+            if node_id in cache:
+                continue
+            if elements is None:
+                if node.is_decision():
+                    elements = node.elements()
+                    stack.append((node, elements))
+                    for prime, sub in reversed(elements):
+                        if sub.id not in cache:
+                            stack.append((sub, None))
+                        if prime.id not in cache:
+                            stack.append((prime, None))
+                    continue
+                cache[node_id] = func(node, None, None, None)
+                continue
+            pos = node.vtree_position()
+            if smooth:
+                expected_prime_vars = expected_vars[self._vtree_left[pos]]
+                expected_sub_vars = expected_vars[self._vtree_right[pos]]
             else:
-                expected_sub_vars = self._expected_vars[vtree_right.position()]
-            for prime, sub in node.elements():
-                wmc_prime = self.depth_first_rec(prime, func)
-                wmc_sub = self.depth_first_rec(sub, func)
-                if not self.smooth:
+                expected_prime_vars = no_vars
+                expected_sub_vars = no_vars
+            rvalues = []
+            for prime, sub in elements:
+                if not smooth:
                     used_prime_vars = None
                     used_sub_vars = None
                 else:
-                    if prime.vtree() is None:
-                        used_prime_vars = set()
-                    else:
-                        used_prime_vars = self._expected_vars[prime.vtree().position()]
-                    if sub.vtree() is None:
-                        used_sub_vars = set()
-                    else:
-                        used_sub_vars = self._expected_vars[sub.vtree().position()]
-                rvalues.append((wmc_prime, wmc_sub, used_prime_vars, used_sub_vars))
-            rvalue = func(node, rvalues, expected_prime_vars, expected_sub_vars)
-        else:
-            rvalue = func(node, None, None, None)
-        if self._wmc_cache is not None:
-            self._wmc_cache[node] = rvalue
-        return rvalue
+                    prime_pos = prime.vtree_position()
+                    used_prime_vars = no_vars if prime_pos < 0 else expected_vars[prime_pos]
+                    sub_pos = sub.vtree_position()
+                    used_sub_vars = no_vars if sub_pos < 0 else expected_vars[sub_pos]
+                rvalues.append((cache[prime.id], cache[sub.id], used_prime_vars, used_sub_vars))
+            cache[node_id] = func(node, rvalues, expected_prime_vars, expected_sub_vars)
+        return cache[root_id]
 
     @staticmethod
     def func_modelcounting(node, rvalues, expected_prime_vars, expected_sub_vars):
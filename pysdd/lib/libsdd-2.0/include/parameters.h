@@ -64,6 +64,17 @@
 
 #define FRAGMENT_SEARCH_BACKWARD 0
 
+/****************************************************************************************
+ * weighted model counting
+ ****************************************************************************************/
+
+//number of node wmcs kept in memory by a batched propagation (bounds the query block size)
+#define WMC_BATCH_BUFFER_SIZE     (8*1024*1024)
+//maximum number of queries propagated together in one pass over the sdd
+#define WMC_BATCH_MAX_BLOCK_SIZE  64
+//a propagation is incremental if at most 1/WMC_INCREMENTAL_RATIO of the variables have changed weights
+#define WMC_INCREMENTAL_RATIO     8
+
 #endif // PARAMETERS_H_
 
 /****************************************************************************************
@@ -11,6 +11,7 @@
 #include <string.h>
 #include <math.h>
 #include <limits.h>
+#include <stdint.h>
 #include <assert.h>
 //#include <execinfo.h>
 #include "parameters.h"
@@ -297,8 +298,74 @@ typedef struct sdd_manager_stats_t {
   //elements
   SddSize element_count; //number of elements in memory
   SddSize max_element_count; //maximum number of elements that every existed in memory
+  SddSize gc_count; //number of global and local garbage collections
 } SddManagerStats;
 
+//counters of a manager (see sdd_manager_counters)
+typedef struct sdd_manager_counters_t {
+  //apply and computed cache
+  SddSize apply_count; //recursed applies
+  SddSize apply_count_top; //top-level recursed applies
+  SddSize computed_count; //entries in the computed cache
+  SddSize computed_cache_size;
+  SddSize computed_cache_lookup_count;
+  SddSize computed_cache_hit_count;
+  //unique table
+  SddSize unique_table_size; //number of collision lists
+  SddSize unique_table_count; //number of entries
+  SddSize unique_table_lookup_count;
+  SddSize unique_table_hit_count;
+  SddSize unique_table_lookup_cost;
+  SddSize unique_table_increase_size_count;
+  SddSize unique_table_decrease_size_count;
+  //nodes and elements
+  SddSize node_count; //dead + live
+  SddSize dead_node_count;
+  SddSize sdd_size; //dead + live
+  SddSize dead_sdd_size;
+  SddSize memory; //bytes of all nodes and elements, live or dead
+  SddSize gc_node_count; //free nodes
+  SddSize gc_element_count; //free elements
+  SddSize max_element_count;
+  SddSize max_decomposition_size;
+  SddSize max_uncompressed_decomposition_size;
+  //garbage collection and vtree search
+  SddSize gc_count; //global and local garbage collections
+  SddSize auto_gc_count;
+  SddSize auto_search_count;
+  SddSize auto_search_count_global;
+  SddSize auto_search_count_local;
+  SddSize auto_search_count_recursive;
+  SddSize auto_search_count_aborted_apply;
+  SddSize auto_search_count_aborted_operation;
+  SddSize auto_search_count_aborted_fragment;
+  SddSize auto_search_count_aborted_search;
+  SddSize auto_search_iteration_count;
+  double auto_search_reduction_sum; //sum of percentage size reduction over all searches
+  double auto_search_time; //seconds (cpu time)
+  double auto_max_search_time; //seconds (cpu time)
+  //vtree operations
+  SddSize lr_count;
+  SddSize rr_count;
+  SddSize sw_count;
+  SddSize failed_lr_count_time;
+  SddSize failed_rr_count_time;
+  SddSize failed_sw_count_time;
+  SddSize failed_lr_count_size;
+  SddSize failed_rr_count_size;
+  SddSize failed_sw_count_size;
+  SddSize failed_lr_count_memory;
+  SddSize failed_rr_count_memory;
+  SddSize failed_sw_count_memory;
+  SddSize failed_count_cp;
+  SddSize fragment_count;
+  SddSize completed_fragment_count;
+  SddSize successful_fragment_count;
+} SddManagerCounters;
+
+//stop condition of the caller for vtree search (returns 1 to abort the search)
+typedef int SddVtreeSearchStopFunc(struct sdd_manager_t*, void*);
+
 //options and stats for vtree operations (rotate and swap)
 typedef struct sdd_manager_vtree_ops_t {
   //time limits
@@ -342,6 +409,9 @@ typedef struct sdd_manager_vtree_ops_t {
   char current_op;
   float convergence_threshold;
   SddSize cartesian_product_limit;
+  //stop condition of the caller (e.g. a timeout), checked together with the time limits
+  SddVtreeSearchStopFunc* search_stop_function;
+  void* search_stop_data;
 } SddManagerVtreeOps;
 
 typedef struct sdd_manager_t {
@@ -484,15 +554,33 @@ typedef struct wmc_manager_t {
   SddNode* node; //root of sdd
   SddSize node_count; //number of nodes in sdd
   SddNode** nodes; //sorted so children before parents
-  SddSize* node_indices; //indices of nodes in topologically sorted array
+  SddSize* element_offsets; //elements of nodes[i] are at element_offsets[i],...,element_offsets[i+1]-1
+  SddSize* prime_indices; //locations of element primes in nodes
+  SddSize* sub_indices; //locations of element subs in nodes
+  char* all_vars_in_sdd; //indexed by vtree position: all vars of vtree appear in sdd
+  char* no_var_in_sdd; //indexed by vtree position: no var of vtree appears in sdd
   SddWmc* node_wmcs;
   SddWmc* node_derivatives;
-  SddWmc* literal_weights;
-  SddWmc* literal_derivatives;
+  SddWmc* literal_weights; //literals -n,...,-1,1,...,n (own_literal_weights or a buffer of the user)
+  SddWmc* own_literal_weights; //weights of the last propagation if literal_weights is a user buffer
+  SddWmc* literal_derivatives; //literals -n,...,-1,1,...,n
   SddWmc* used_true_wmcs;
   SddWmc* unused_true_wmcs;
   SddWmc wmc;
   SddManager* sdd_manager;
+  //incremental propagation
+  int wmc_valid; //node and true wmcs are up to date, except for the dirty variables
+  int derivatives_valid; //node and literal derivatives are up to date with the node wmcs
+  char* dirty_vars; //indexed by variable: a weight of the variable changed since the last propagation
+  SddLiteral* dirty_list; //the dirty variables
+  SddLiteral dirty_count;
+  SddSize* parent_offsets; //parents of nodes[i] are at parent_offsets[i],...,parent_offsets[i+1]-1
+  SddSize* parent_indices; //locations of parents in nodes (NULL until the first incremental propagation)
+  SddSize* vtree_offsets; //decomposition nodes normalized for vtree position v are at vtree_offsets[v],...
+  SddSize* vtree_indices; //locations of decomposition nodes in nodes, grouped by vtree position
+  SddSize* literal_indices; //indexed by literal: location of the literal node (node_count if not in sdd)
+  SddSize* queue; //heap of locations of nodes to recompute
+  char* queued; //indexed by location: node is in the queue
 } WmcManager;
 
 /****************************************************************************************
@@ -514,6 +602,24 @@ typedef struct sat_manager_t {
   int needs_update; //0 or 1
 } SatManager;
 
+/****************************************************************************************
+ * Output of the printing functions (.sdd, .vtree and .dot formats)
+ *
+ * The output is written to a file, or collected in a buffer that is passed to a callback
+ * whenever it is full (and when the writer is flushed)
+ ****************************************************************************************/
+
+typedef void SddWriteFunc(void* context, const char* data, size_t length);
+
+typedef struct sdd_writer_t {
+  FILE* file; //NULL when writing to the callback
+  SddWriteFunc* write; //callback
+  void* context; //passed to the callback
+  char* buffer;
+  size_t length; //number of characters in buffer
+  size_t capacity; //size of buffer
+} SddWriter;
+
 /****************************************************************************************
  * function prototypes
  ****************************************************************************************/
@@ -528,6 +634,11 @@ char char_strtok();
 char* read_file(const char* filename);
 char* filter_comments(const char* buffer);
 char* literal_to_label(SddLiteral lit);
+void init_file_writer(FILE* file, SddWriter* writer);
+void init_callback_writer(SddWriteFunc* write, void* context, SddWriter* writer);
+void free_writer(SddWriter* writer);
+void writer_flush(SddWriter* writer);
+void writer_printf(SddWriter* writer, const char* format, ...);
 
 //verify.c
 int verify_vtree_properties(const Vtree* vtree);
@@ -582,6 +693,7 @@ int elements_sorted_and_compressed(SddNodeSize size, SddElement* elements);
 SddManager* sdd_manager_new(Vtree* vtree);
 void sdd_manager_free(SddManager* manager);
 void sdd_manager_print(SddManager* manager);
+void sdd_manager_counters(SddManagerCounters* counters, const SddManager* manager);
 
 //interface.c
 void declare_interrupt_signal();
@@ -595,6 +707,8 @@ SddSize sdd_manager_dead_size(const SddManager* manager);
 SddSize sdd_manager_count(const SddManager* manager);
 SddSize sdd_manager_live_count(const SddManager* manager);
 SddSize sdd_manager_dead_count(const SddManager* manager);
+SddSize sdd_manager_memory(const SddManager* manager);
+void sdd_manager_set_vtree_search_stop_function(SddVtreeSearchStopFunc func, void* data, SddManager* manager);
 SddNode* sdd_manager_true(const SddManager* manager);
 SddNode* sdd_manager_false(const SddManager* manager);
 SddNode* sdd_manager_literal(const SddLiteral literal, const SddManager* manager);
@@ -688,6 +802,7 @@ void minimize_vtree_width(Fnf* fnf, Vtree** vtree_loc);
 
 //apply.c
 SddNode* sdd_apply(SddNode* node1, SddNode* node2, BoolOp op, SddManager* manager);
+SddNode* sdd_apply_multiple(SddSize count, SddNode** nodes, BoolOp op, SddManager* manager);
 SddNode* sdd_negate(SddNode* node, SddManager* manager);
 
 //bits.c
@@ -702,6 +817,7 @@ SddNode* sdd_minimize_cardinality(SddNode* node, SddManager* manager);
 
 //condition.c
 SddNode* sdd_condition(SddLiteral lit, SddNode* node, SddManager* manager);
+SddNode* sdd_condition_multiple(SddSize literal_count, const SddLiteral* literals, SddNode* node, SddManager* manager);
 
 //copy.c
 SddNode* sdd_copy(SddNode* node, SddManager* dest_manager);
@@ -718,10 +834,16 @@ void save_shared_sdd_as_dot_vt(const char* fname, Vtree* vtree);
 void sdd_shared_save_as_dot(const char* fname, SddManager* manager);
 void save_sdd_vt(const char* fname, SddNode *node, Vtree* vtree);
 void sdd_save(const char* fname, SddNode *node);
+void sdd_write(SddNode* node, SddWriteFunc* write, void* context);
+void sdd_write_as_dot(SddNode* node, SddWriteFunc* write, void* context);
+void sdd_shared_write_as_dot(SddManager* manager, SddWriteFunc* write, void* context);
 SddNode* sdd_read(const char* filename, SddManager* manager);
+SddNode* sdd_from_arrays(SddSize node_count, const char* types, const SddLiteral* literals, const SddLiteral* vtrees, const SddLiteral* offsets, const SddLiteral* primes, const SddLiteral* subs, SddManager* manager);
 
 //model_count.c
 SddModelCount sdd_model_count(SddNode* node, SddManager* manager);
+SddSize sdd_exact_model_count(SddNode* node, int global, uint32_t** limbs, SddManager* manager);
+double sdd_log2_model_count(SddNode* node, int global, SddManager* manager);
 
 //node_count.c
 SddSize sdd_count(SddNode* node);
@@ -743,12 +865,18 @@ void set_sdd_variables(SddNode* node, SddManager* manager);
 WmcManager* wmc_manager_new(SddNode* node, int log_mode, SddManager* manager);
 void wmc_manager_free(WmcManager* wmc_manager);
 SddWmc wmc_propagate(WmcManager* wmc_manager);
+void wmc_propagate_batch(const SddWmc* weights, SddLiteral weights_var_count, SddSize query_count, SddSize block_size, SddWmc* wmcs, WmcManager* wmc_manager);
+void wmc_mpe_batch(const SddWmc* weights, SddLiteral weights_var_count, SddSize query_count, SddWmc* mpes, signed char* assignments, WmcManager* wmc_manager);
+SddWmc wmc_mpe(signed char* assignment, WmcManager* wmc_manager);
+SddWmc* wmc_literal_derivatives(WmcManager* wmc_manager);
+void wmc_literal_prs(SddWmc* prs, WmcManager* wmc_manager);
+void wmc_set_literal_weights_buffer(SddWmc* weights, WmcManager* wmc_manager);
 SddWmc wmc_zero_weight(WmcManager* wmc_manager);
 SddWmc wmc_one_weight(WmcManager* wmc_manager);
 void wmc_set_literal_weight(const SddLiteral literal, const SddWmc weight, WmcManager* wmc_manager);
 SddWmc literal_weight(const SddLiteral literal, const WmcManager* wmc_manager);
-SddWmc wmc_literal_derivative(const SddLiteral literal, const WmcManager* wmc_manager);
-SddWmc wmc_literal_pr(const SddLiteral literal, const WmcManager* wmc_manager);
+SddWmc wmc_literal_derivative(const SddLiteral literal, WmcManager* wmc_manager);
+SddWmc wmc_literal_pr(const SddLiteral literal, WmcManager* wmc_manager);
 
 //
 //vtree
@@ -756,8 +884,11 @@ SddWmc wmc_literal_pr(const SddLiteral literal, const WmcManager* wmc_manager);
 
 //io.c
 Vtree* sdd_vtree_read(const char* filename);
+Vtree* sdd_vtree_from_arrays(SddLiteral node_count, SddLiteral root, const SddLiteral* left, const SddLiteral* right, const SddLiteral* var);
 void sdd_vtree_save(const char* fname, Vtree* vtree);
 void sdd_vtree_save_as_dot(const char* fname, Vtree* vtree);
+void sdd_vtree_write(Vtree* vtree, SddWriteFunc* write, void* context);
+void sdd_vtree_write_as_dot(Vtree* vtree, SddWriteFunc* write, void* context);
 
 //compare.c
 #if defined(WIN32) || defined(_WIN32)
@@ -92,6 +92,7 @@ void garbage_collect_in(Vtree* vtree, SddManager* manager) {
 
 //visit nodes top-down: when a node is gc'd, it must have no parents
 void sdd_vtree_garbage_collect(Vtree* vtree, SddManager* manager) {
+  ++manager->stats.gc_count;
   mark_gc_nodes(vtree);
   garbage_collect_above(vtree,manager);
   garbage_collect_in(vtree,manager);
@@ -175,6 +175,11 @@ SddSize sdd_manager_dead_count(const SddManager* manager) {
   return manager->dead_node_count;
 }
 
+//memory (in bytes) of all sdd nodes and their elements, live or dead
+SddSize sdd_manager_memory(const SddManager* manager) {
+  return manager->node_count*sizeof(SddNode)+manager->sdd_size*sizeof(SddElement);
+}
+
 /****************************************************************************************
  * terminal SDD nodes
  ****************************************************************************************/
@@ -284,6 +289,12 @@ void sdd_manager_set_vtree_apply_time_limit(clock_t time_limit, SddManager* mana
 void sdd_manager_set_vtree_operation_memory_limit(float memory_limit, SddManager* manager) {
   manager->vtree_ops.op_memory_limit = memory_limit;
 }
+//func(manager,data) is called with the time limits, vtree search is aborted when it returns 1
+//(e.g. to stop the search when the caller times out), NULL removes the stop condition
+void sdd_manager_set_vtree_search_stop_function(SddVtreeSearchStopFunc func, void* data, SddManager* manager) {
+  manager->vtree_ops.search_stop_function = func;
+  manager->vtree_ops.search_stop_data     = data;
+}
 
 // this is checked by exceeded_size_limit(), invoked by vtree operations
 void sdd_manager_set_vtree_operation_size_limit(float size_limit, SddManager* manager) {
@@ -122,7 +122,7 @@ SddManager* sdd_manager_new(Vtree* input_vtree) {
   manager->options = NULL;
   
   //manager stats
-  SddManagerStats stats = {0,0,0,0,0,0,0,0};
+  SddManagerStats stats = {0,0,0,0,0,0,0,0,0};
   manager->stats = stats;
   
   //vtree search  
@@ -136,7 +136,8 @@ SddManager* sdd_manager_new(Vtree* input_vtree) {
                                   0,0,0,0,0,0,0,0,0,0,0,0,0,0,
                                   ' ',
                                   INITIAL_CONVERGENCE_THRESHOLD,
-                                  CARTESIAN_PRODUCT_LIMIT};
+                                  CARTESIAN_PRODUCT_LIMIT,
+                                  NULL,NULL};
   manager->vtree_ops = vtree_ops;
   
   //automatic garbage collection and search
@@ -296,6 +297,9 @@ void sdd_manager_free(SddManager* manager) {
 
   //node buffer
   free(manager->node_buffer);
+  
+  //the interrupt handler must not print a freed manager
+  if(last_constructed_manager==manager) last_constructed_manager = NULL;
  
   assert(manager->stats.element_count==0);
 
@@ -114,7 +114,76 @@ void sdd_manager_print(SddManager* manager) {
   #endif
 }
 
+/****************************************************************************************
+ * manager counters
+ *
+ * the counters are read from the manager without traversing its nodes, so they are
+ * cheap to read (e.g. periodically, while a compilation is running in another thread)
+ ****************************************************************************************/
+
+void sdd_manager_counters(SddManagerCounters* counters, const SddManager* manager) {
+  const SddManagerStats* stats  = &manager->stats;
+  const SddManagerVtreeOps* ops = &manager->vtree_ops;
+  const SddHash* hash           = manager->unique_nodes;
+
+  counters->apply_count                         = stats->apply_count;
+  counters->apply_count_top                     = stats->apply_count_top;
+  counters->computed_count                      = manager->computed_count;
+  counters->computed_cache_size                 = 2*COMPUTED_CACHE_SIZE;
+  counters->computed_cache_lookup_count         = manager->computed_cache_lookup_count;
+  counters->computed_cache_hit_count            = manager->computed_cache_hit_count;
 
+  counters->unique_table_size                   = hash->size;
+  counters->unique_table_count                  = hash->count;
+  counters->unique_table_lookup_count           = hash->lookup_count;
+  counters->unique_table_hit_count              = hash->hit_count;
+  counters->unique_table_lookup_cost            = hash->lookup_cost;
+  counters->unique_table_increase_size_count    = hash->increase_size_count;
+  counters->unique_table_decrease_size_count    = hash->decrease_size_count;
+
+  counters->node_count                          = manager->node_count;
+  counters->dead_node_count                     = manager->dead_node_count;
+  counters->sdd_size                            = manager->sdd_size;
+  counters->dead_sdd_size                       = manager->dead_sdd_size;
+  counters->memory                              = sdd_manager_memory(manager);
+  counters->gc_node_count                       = manager->gc_node_count;
+  counters->gc_element_count                    = manager->gc_element_count;
+  counters->max_element_count                   = stats->max_element_count;
+  counters->max_decomposition_size              = stats->max_decomposition_size;
+  counters->max_uncompressed_decomposition_size = stats->max_uncompressed_decomposition_size;
+
+  counters->gc_count                            = stats->gc_count;
+  counters->auto_gc_count                       = manager->auto_gc_invocation_count;
+  counters->auto_search_count                   = manager->auto_search_invocation_count;
+  counters->auto_search_count_global            = manager->auto_search_invocation_count_global;
+  counters->auto_search_count_local             = manager->auto_search_invocation_count_local;
+  counters->auto_search_count_recursive         = manager->auto_search_invocation_count_recursive;
+  counters->auto_search_count_aborted_apply     = manager->auto_search_invocation_count_aborted_apply;
+  counters->auto_search_count_aborted_operation = manager->auto_search_invocation_count_aborted_operation;
+  counters->auto_search_count_aborted_fragment  = manager->auto_search_invocation_count_aborted_fragment;
+  counters->auto_search_count_aborted_search    = manager->auto_search_invocation_count_aborted_search;
+  counters->auto_search_iteration_count         = manager->auto_search_iteration_count;
+  counters->auto_search_reduction_sum           = manager->auto_search_reduction_sum;
+  counters->auto_search_time                    = ((double)stats->auto_search_time)/CLOCKS_PER_SEC;
+  counters->auto_max_search_time                = ((double)stats->auto_max_search_time)/CLOCKS_PER_SEC;
+
+  counters->lr_count                            = ops->lr_count;
+  counters->rr_count                            = ops->rr_count;
+  counters->sw_count                            = ops->sw_count;
+  counters->failed_lr_count_time                = ops->failed_lr_count_time;
+  counters->failed_rr_count_time                = ops->failed_rr_count_time;
+  counters->failed_sw_count_time                = ops->failed_sw_count_time;
+  counters->failed_lr_count_size                = ops->failed_lr_count_size;
+  counters->failed_rr_count_size                = ops->failed_rr_count_size;
+  counters->failed_sw_count_size                = ops->failed_sw_count_size;
+  counters->failed_lr_count_memory              = ops->failed_lr_count_memory;
+  counters->failed_rr_count_memory              = ops->failed_rr_count_memory;
+  counters->failed_sw_count_memory              = ops->failed_sw_count_memory;
+  counters->failed_count_cp                     = ops->failed_count_cp;
+  counters->fragment_count                      = manager->fragment_count;
+  counters->completed_fragment_count            = manager->completed_fragment_count;
+  counters->successful_fragment_count           = manager->successful_fragment_count;
+}
 
 /****************************************************************************************
  * end
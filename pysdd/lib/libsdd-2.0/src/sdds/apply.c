@@ -59,6 +59,63 @@ SddNode* sdd_apply(SddNode* node1, SddNode* node2, BoolOp op, SddManager* manage
   return node;  
 }
 
+/****************************************************************************************
+ * n-ary apply
+ *
+ * the nodes are sorted by the position of their vtrees and then combined one by one,
+ * like the literal sets in the fnf compiler, so that nodes normalized for nearby vtrees
+ * are combined after each other
+ ****************************************************************************************/
+
+static
+int node_cmp_vtree_position(const void* node1_loc, const void* node2_loc) {
+  SddNode* node1 = *(SddNode**)node1_loc;
+  SddNode* node2 = *(SddNode**)node2_loc;
+  SddLiteral p1  = node1->vtree->position;
+  SddLiteral p2  = node2->vtree->position;
+  if(p1 > p2) return 1;
+  else if(p1 < p2) return -1;
+  //so the order is unique
+  else if(node1->id > node2->id) return 1;
+  else if(node1->id < node2->id) return -1;
+  else return 0;
+}
+
+//nodes are normalized for arbitrary vtrees
+//the nodes do not need to be referenced, they are referenced while the result is computed
+//returns the conjunction (op=CONJOIN) or disjunction (op=DISJOIN) of the nodes
+SddNode* sdd_apply_multiple(SddSize count, SddNode** nodes, BoolOp op, SddManager* manager) {
+  for(SddSize i=0; i<count; i++) {
+    CHECK_ERROR(GC_NODE(nodes[i]),ERR_MSG_GC,"sdd_apply_multiple");
+    if(IS_ZERO(nodes[i],op)) return ZERO(manager,op);
+  }
+
+  SddNode** pending;
+  CALLOC(pending,SddNode*,count+1,"sdd_apply_multiple");
+  SddSize size = 0;
+  for(SddSize i=0; i<count; i++) {
+    if(!IS_ONE(nodes[i],op)) pending[size++] = sdd_ref(nodes[i],manager);
+  }
+
+  qsort(pending,size,sizeof(SddNode*),node_cmp_vtree_position);
+  SddNode* node = ONE(manager,op);
+  for(SddSize i=0; i<size; i++) {
+    SddNode* result = apply(node,pending[i],op,manager,0);
+    sdd_ref(result,manager);
+    sdd_deref(node,manager);
+    sdd_deref(pending[i],manager);
+    node = result;
+    if(IS_ZERO(node,op)) { //release the remaining nodes
+      for(SddSize j=i+1; j<size; j++) sdd_deref(pending[j],manager);
+      break;
+    }
+  }
+  sdd_deref(node,manager);
+
+  free(pending);
+  return node;
+}
+
 /****************************************************************************************
  * negate
  ****************************************************************************************/
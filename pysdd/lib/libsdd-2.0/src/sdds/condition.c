@@ -102,6 +102,120 @@ SddNode* sdd_condition_aux(SddNode* node, SddNode* literal, SddNode** start, Sdd
 }
 
 
+/****************************************************************************************
+ * conditioning an sdd on multiple literals
+ *
+ * the sdd is conditioned in a single bottom-up pass over its nodes (children before parents),
+ * so every node is conditioned at most once: the conditionings of the primes and subs of a
+ * decomposition node are known when the node is visited. nodes whose vtree contains no
+ * variable of the literals are not changed
+ *
+ * will not do auto gc/minmize as its computations are done in no-auto mode
+ ****************************************************************************************/
+
+//condition sdd node on the literal_count literals in literals (a term)
+//returns false if the literals contain a literal and its negation
+SddNode* sdd_condition_multiple(SddSize literal_count, const SddLiteral* literals, SddNode* node, SddManager* manager) {
+  CHECK_ERROR(GC_NODE(node),ERR_MSG_GC,"sdd_condition_multiple");
+  assert(!GC_NODE(node));
+  
+  //values[var] is 1 (positive literal), -1 (negative literal) or 0 (var is not conditioned)
+  SddLiteral var_count = manager->var_count;
+  signed char* values;
+  CALLOC(values,signed char,var_count+1,"sdd_condition_multiple");
+  for(SddSize k=0; k<literal_count; k++) {
+    SddLiteral var    = literals[k]<0? -literals[k]: literals[k];
+    signed char value = literals[k]<0? -1: 1;
+    if(values[var]==-value) { //literal and its negation
+      free(values);
+      return manager->false_sdd;
+    }
+    values[var] = value;
+  }
+  
+  if(node->type==FALSE || node->type==TRUE) {
+    free(values);
+    return node;
+  }
+  
+  //number of conditioned variables in the vtree nodes that precede a position
+  Vtree* root = manager->vtree;
+  SddLiteral vtree_count = 2*var_count-1;
+  SddLiteral* prefix;
+  CALLOC(prefix,SddLiteral,vtree_count+1,"sdd_condition_multiple");
+  FOR_each_leaf_vtree_node(leaf,root,prefix[leaf->position+1] = values[leaf->var]!=0);
+  for(SddLiteral i=0; i<vtree_count; i++) prefix[i+1] += prefix[i];
+  
+  //nodes are sorted so children appear before parents in the array
+  //the elements are saved in terms of locations before new nodes are constructed
+  SddSize size;
+  SddNode** nodes = sdd_topological_sort(node,&size);
+  SddSize element_count = 0;
+  for(SddSize i=0; i<size; i++) {
+    if(IS_DECOMPOSITION(nodes[i])) element_count += nodes[i]->size;
+  }
+  SddSize* element_offsets;
+  SddSize* prime_indices;
+  SddSize* sub_indices;
+  CALLOC(element_offsets,SddSize,size+1,"sdd_condition_multiple");
+  CALLOC(prime_indices,SddSize,element_count,"sdd_condition_multiple");
+  CALLOC(sub_indices,SddSize,element_count,"sdd_condition_multiple");
+  SddSize e = 0;
+  for(SddSize i=0; i<size; i++) {
+    element_offsets[i] = e;
+    if(IS_DECOMPOSITION(nodes[i])) {
+      FOR_each_prime_sub_of_node(prime,sub,nodes[i],{
+        prime_indices[e] = prime->index;
+        sub_indices[e]   = sub->index;
+        ++e;
+      });
+    }
+  }
+  element_offsets[size] = e;
+  
+  //conditionings of the sorted nodes
+  SddNode** cond_nodes;
+  CALLOC(cond_nodes,SddNode*,size,"sdd_condition_multiple");
+  
+  WITH_no_auto_mode(manager,{
+    for(SddSize i=0; i<size; i++) {
+      SddNode* n         = nodes[i];
+      SddNode* cond_node = n;
+      if(n->type==LITERAL) {
+        SddLiteral lit    = LITERAL_OF(n);
+        signed char value = values[lit<0? -lit: lit];
+        if(value!=0) cond_node = ((lit>0)==(value>0)? manager->true_sdd: manager->false_sdd);
+      }
+      else if(n->type==DECOMPOSITION) {
+        Vtree* vtree = n->vtree;
+        if(prefix[vtree->last->position+1]>prefix[vtree->first->position]) { //vtree has conditioned variables
+          GET_node_from_partition(cond_node,vtree,manager,{
+            for(SddSize k=element_offsets[i]; k<element_offsets[i+1]; k++) {
+              //conditioned primes cannot be all false and conditioned subs are normalized for vtree->right
+              SddNode* cond_prime = cond_nodes[prime_indices[k]];
+              SddNode* cond_sub   = cond_nodes[sub_indices[k]];
+              if(!IS_FALSE(cond_prime)) DECLARE_element(cond_prime,cond_sub,vtree,manager);
+            }
+          });
+        }
+      }
+      cond_nodes[i] = cond_node;
+    }
+  });
+  
+  SddNode* cond_node = cond_nodes[size-1]; //the root is the last sorted node
+  free(cond_nodes);
+  free(element_offsets);
+  free(prime_indices);
+  free(sub_indices);
+  free(nodes);
+  free(prefix);
+  free(values);
+  
+  return cond_node;
+}
+
+
 /****************************************************************************************
  * end
  ****************************************************************************************/
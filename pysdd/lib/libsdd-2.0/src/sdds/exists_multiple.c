@@ -20,7 +20,7 @@ SddNode* apply(SddNode* node1, SddNode* node2, BoolOp op, SddManager* manager, i
 
 //local declarations
 static void initialize_for_shadows(SddNode* node, int* exists_map, SddManager* manager);
-static SddNode* quantify_shadow(NodeShadow* shadow, int* exists_map, SddManager* manager);
+static SddNode* quantify_shadow(NodeShadow* shadow, int* exists_map, long long* ref_count, SddManager* manager);
 static void ref_nodes_of_terminal_shadows(SddShadows* shadows);
 static void deref_nodes_of_terminal_shadows(SddShadows* shadows);
 
@@ -33,15 +33,13 @@ static void deref_nodes_of_terminal_shadows(SddShadows* shadows);
 //exists_map[var]  : is 1 if var is to be existentially quantified, 0 otherwise
 //exists_map[0]    : not used
 
-static long long ref_count; //sanity check
-
 SddNode* sdd_exists_multiple(int* exists_map, SddNode* node, SddManager* manager) {
   CHECK_ERROR(GC_NODE(node),ERR_MSG_GC,"sdd_exists_multiple");
   assert(!GC_NODE(node));
   
   if(node->type==FALSE || node->type==TRUE) return node;
 
-  ref_count = 0;
+  long long ref_count = 0; //sanity check (per call, so managers can be used concurrently)
 
   SddNode** roots = (SddNode**) malloc(sizeof(SddNode*));
   roots[0]        = node; 
@@ -55,7 +53,7 @@ SddNode* sdd_exists_multiple(int* exists_map, SddNode* node, SddManager* manager
   ref_nodes_of_terminal_shadows(shadows);
   SddNode* q_node;
 
-  q_node = quantify_shadow(shadow,exists_map,manager);
+  q_node = quantify_shadow(shadow,exists_map,&ref_count,manager);
 
   deref_nodes_of_terminal_shadows(shadows);
     
@@ -211,12 +209,12 @@ int no_quantified_vars(NodeShadow* shadow) {
 }
 
 static
-SddNode* quantify_shadow(NodeShadow* shadow, int* exists_map, SddManager* manager) {
+SddNode* quantify_shadow(NodeShadow* shadow, int* exists_map, long long* ref_count, SddManager* manager) {
   assert(shadow->cache==NULL || shadow->cache->id==shadow->cache_id);
   if(shadow->cache && shadow->cache->id==shadow->cache_id) {
     //cached node exists and has not been gc'd
-    assert(ref_count>0);
-    --ref_count; 
+    assert(*ref_count>0);
+    --(*ref_count); 
     sdd_deref(shadow->cache,manager);
     return shadow->cache;
   }
@@ -242,10 +240,10 @@ SddNode* quantify_shadow(NodeShadow* shadow, int* exists_map, SddManager* manage
     int is_same_primes       = 1;
     SddNode* non_trivial_sub = NULL;
     for(ElmShadow* e=elements; e<elements+size; e++) {
-      SddNode* prime = quantify_shadow(e->prime,exists_map,manager);
+      SddNode* prime = quantify_shadow(e->prime,exists_map,ref_count,manager);
       assert(prime==e->prime->cache);
       sdd_ref(prime,manager);
-      SddNode* sub   = quantify_shadow(e->sub,exists_map,manager);
+      SddNode* sub   = quantify_shadow(e->sub,exists_map,ref_count,manager);
       assert(prime==e->prime->cache);
       sdd_ref(sub,manager);
       assert(LIVE(prime) && LIVE(sub));
@@ -300,8 +298,8 @@ SddNode* quantify_shadow(NodeShadow* shadow, int* exists_map, SddManager* manage
   //cached nodes are not protected so they may be gc'd
   //the cache_id field will be used to decide whether thet cached node was gc'd
   shadow->cache_id = q_node->id;
-  assert(ref_count>=0);
-  for(SddRefCount i=0; i<shadow->ref_count-1; i++) { ++ref_count; sdd_ref(q_node,manager); }
+  assert(*ref_count>=0);
+  for(SddRefCount i=0; i<shadow->ref_count-1; i++) { ++(*ref_count); sdd_ref(q_node,manager); }
       
   return shadow->cache = q_node;
 }
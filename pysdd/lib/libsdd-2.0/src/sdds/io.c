@@ -46,16 +46,16 @@ char* get_sdd_node_label(SddNode* node) {
 }
 
 
-void print_terminal_sdd_node_as_dot(FILE* file, SddNode* node) {
+void print_terminal_sdd_node_as_dot(SddWriter* writer, SddNode* node) {
  
   char* label = get_sdd_node_label(node);
-  fprintf(file,"\nn%"PRIsS" [label= \"%s\",shape=box]; ",node->id,label);
+  writer_printf(writer,"\nn%"PRIsS" [label= \"%s\",shape=box]; ",node->id,label);
   if (node->type==LITERAL) free(label);
   return;
 	
 }
 
-void print_decomposition_sdd_node_as_dot(FILE* file, SddNode* node) {
+void print_decomposition_sdd_node_as_dot(SddWriter* writer, SddNode* node) {
 
   static const char* node_format = "\nn%"PRIsS" [label= \"%"PRIsS"\",style=filled,fillcolor=gray95,shape=circle,height=.25,width=.25]; ";
   static const char* element_format = "\nn%"PRIsS"e%"PRIsS"\n"
@@ -76,7 +76,7 @@ void print_decomposition_sdd_node_as_dot(FILE* file, SddNode* node) {
     " [arrowsize=.50,tailclip=false,arrowtail=dot,dir=both];";
 
   //decision node
-  fprintf(file,node_format,node->id,node->vtree->position);
+  writer_printf(writer,node_format,node->id,node->vtree->position);
 
   SddSize i=0;
   FOR_each_prime_sub_of_node(prime,sub,node,{
@@ -84,40 +84,40 @@ void print_decomposition_sdd_node_as_dot(FILE* file, SddNode* node) {
     char* prime_label = get_sdd_node_label(prime);
 	char* sub_label = get_sdd_node_label(sub);
 	//element: prime & sub
-	fprintf(file,element_format,node->id,i,prime_label,sub_label);
+	writer_printf(writer,element_format,node->id,i,prime_label,sub_label);
 
 	if(prime->type == LITERAL) free(prime_label);
 	if(sub->type == LITERAL) free(sub_label);
 	//edge into element
-	fprintf(file,or_format,node->id,node->id,i);
+	writer_printf(writer,or_format,node->id,node->id,i);
 	//edge out of prime cell
-	if(prime->type==DECOMPOSITION) fprintf(file,prime_format,node->id,i,prime->id);
+	if(prime->type==DECOMPOSITION) writer_printf(writer,prime_format,node->id,i,prime->id);
 	//edge out of sub cell
-    if(sub->type==DECOMPOSITION) fprintf(file,sub_format,node->id,i,sub->id);
+    if(sub->type==DECOMPOSITION) writer_printf(writer,sub_format,node->id,i,sub->id);
 	++i;
   });
 }
 
 //two nodes have the same rank iff they are normalized for the same vtree (better visualization)
-void print_sdd_node_ranks(FILE* file, SddSize count, SddNode** nodes) {
+void print_sdd_node_ranks(SddWriter* writer, SddSize count, SddNode** nodes) {
   assert(count>0);
   
   while(count) {
     assert((*nodes)->type==DECOMPOSITION);
     Vtree* vtree = (*nodes)->vtree; //vtree of next group of nodes (same rank)
-	fprintf(file,"\n{rank=same; ");
+	writer_printf(writer,"\n{rank=same; ");
 	while(count && (*nodes)->vtree==vtree) { 
-	  fprintf(file,"n%"PRIsS" ",(*nodes)->id); 
+	  writer_printf(writer,"n%"PRIsS" ",(*nodes)->id); 
 	  --count;
 	  ++nodes; 
 	}
-	fprintf(file,"}");
+	writer_printf(writer,"}");
   }
-  fprintf(file,"\n");
+  writer_printf(writer,"\n");
 
 }
 
-void print_sdd_nodes_as_dot(FILE* file, SddSize count, SddNode** nodes) {
+void print_sdd_nodes_as_dot(SddWriter* writer, SddSize count, SddNode** nodes) {
   assert(count>1);
   
   //sort nodes so that:
@@ -131,10 +131,10 @@ void print_sdd_nodes_as_dot(FILE* file, SddSize count, SddNode** nodes) {
   assert(count!=0); //at least one decomposition node
   
   //declare the ranks of decomposition nodes (equal rank iff normalized for same vtree)
-  print_sdd_node_ranks(file,count,nodes);
+  print_sdd_node_ranks(writer,count,nodes);
   
   //print decomposition nodes (terminal nodes will be printed as a side effect)
-  for(SddSize i=0; i<count; i++) print_decomposition_sdd_node_as_dot(file,nodes[i]);
+  for(SddSize i=0; i<count; i++) print_decomposition_sdd_node_as_dot(writer,nodes[i]);
 }
 
 
@@ -159,15 +159,15 @@ SddNode** collect_all_nodes(SddNode* node, SddNode** nodes) {
 
 
 //prints an SDD in .dot file format
-void print_sdd_as_dot(FILE* file, SddNode* node) {
+void print_sdd_as_dot(SddWriter* writer, SddNode* node) {
   
-  fprintf(file,"\ndigraph sdd {");
-  fprintf(file,"\n\noverlap=false");
-  fprintf(file,"\n");
+  writer_printf(writer,"\ndigraph sdd {");
+  writer_printf(writer,"\n\noverlap=false");
+  writer_printf(writer,"\n");
 	
   if(node->type!=DECOMPOSITION) { 
     //a single terminal node
-    print_terminal_sdd_node_as_dot(file,node);
+    print_terminal_sdd_node_as_dot(writer,node);
   }
   else {
   
@@ -182,38 +182,50 @@ void print_sdd_as_dot(FILE* file, SddNode* node) {
   	//all nodes are now marked 0
 
     //print nodes
-    print_sdd_nodes_as_dot(file,count,nodes);
+    print_sdd_nodes_as_dot(writer,count,nodes);
     
   	free(nodes);
   }
 
-  fprintf(file,"\n\n");
-  fprintf(file,"\n}");
+  writer_printf(writer,"\n\n");
+  writer_printf(writer,"\n}");
 }
 
 void sdd_save_as_dot(const char* fname, SddNode *node) { 
   CHECK_ERROR(GC_NODE(node),ERR_MSG_GC,"sdd_save_as_dot");
   
   FILE *file = fopen(fname,"w");
-  print_sdd_as_dot(file,node);
+  SddWriter writer;
+  init_file_writer(file,&writer);
+  print_sdd_as_dot(&writer,node);
   fclose(file); 
 }
 
+//writes an sdd in .dot file format to a callback
+void sdd_write_as_dot(SddNode* node, SddWriteFunc* write, void* context) {
+  CHECK_ERROR(GC_NODE(node),ERR_MSG_GC,"sdd_write_as_dot");
+
+  SddWriter writer;
+  init_callback_writer(write,context,&writer);
+  print_sdd_as_dot(&writer,node);
+  free_writer(&writer);
+}
+
 
 /****************************************************************************************
  * printing sdd to .dot file: all nodes normalized for a vtree node
  ****************************************************************************************/
 
 //prints an SDD in .dot file format
-void print_sdds_as_dot(FILE* file, Vtree* vtree) {
+void print_sdds_as_dot(SddWriter* writer, Vtree* vtree) {
   
-  fprintf(file,"\ndigraph sdd {");
-  fprintf(file,"\n\noverlap=false");
-  fprintf(file,"\n");
+  writer_printf(writer,"\ndigraph sdd {");
+  writer_printf(writer,"\n\noverlap=false");
+  writer_printf(writer,"\n");
 
   if(LEAF(vtree)) {
-    print_terminal_sdd_node_as_dot(file,vtree->nodes); //positive literal
-    print_terminal_sdd_node_as_dot(file,vtree->nodes->vtree_next); //negative literal
+    print_terminal_sdd_node_as_dot(writer,vtree->nodes); //positive literal
+    print_terminal_sdd_node_as_dot(writer,vtree->nodes->vtree_next); //negative literal
   }
   else {
   
@@ -230,19 +242,21 @@ void print_sdds_as_dot(FILE* file, Vtree* vtree) {
     //all nodes are now marked 0
 
     //print nodes
-    print_sdd_nodes_as_dot(file,count,nodes);
+    print_sdd_nodes_as_dot(writer,count,nodes);
     
   	free(nodes);
   }
 
-  fprintf(file,"\n\n");
-  fprintf(file,"\n}");
+  writer_printf(writer,"\n\n");
+  writer_printf(writer,"\n}");
 }
 
 //saving a multi-rooted sdd (roots are all nodes normalized for vtree)
 void save_shared_sdd_as_dot_vt(const char* fname, Vtree* vtree) { 
   FILE *file = fopen(fname,"w");
-  print_sdds_as_dot(file,vtree);
+  SddWriter writer;
+  init_file_writer(file,&writer);
+  print_sdds_as_dot(&writer,vtree);
   fclose(file); 
 }
 
@@ -251,6 +265,14 @@ void sdd_shared_save_as_dot(const char* fname, SddManager* manager) {
   save_shared_sdd_as_dot_vt(fname,manager->vtree);
 }
 
+//writes the multi-rooted sdd of manager to a callback
+void sdd_shared_write_as_dot(SddManager* manager, SddWriteFunc* write, void* context) {
+  SddWriter writer;
+  init_callback_writer(write,context,&writer);
+  print_sdds_as_dot(&writer,manager->vtree);
+  free_writer(&writer);
+}
+
 
 /****************************************************************************************
  * printing sdd to .sdd file
@@ -258,10 +280,7 @@ void sdd_shared_save_as_dot(const char* fname, SddManager* manager) {
  * saved nodes are numbered continguously starting from 0
  ****************************************************************************************/
 
-//used to contiguously id nodes and elements before saving
-SddSize node_id_counter;
-
-void print_sdd_header(FILE* file, SddSize count) {
+void print_sdd_header(SddWriter* writer, SddSize count) {
   static const char* header = 
     "c ids of sdd nodes start at 0\n"
     "c sdd nodes appear bottom-up, children before parents\n"
@@ -273,45 +292,46 @@ void print_sdd_header(FILE* file, SddSize count) {
     "c L id-of-literal-sdd-node id-of-vtree literal\n"
     "c D id-of-decomposition-sdd-node id-of-vtree number-of-elements {id-of-prime id-of-sub}*\n"
     "c\n";
-  fprintf(file,"%s",header);
-  fprintf(file,"sdd %"PRIsS"\n",count);
+  writer_printf(writer,"%s",header);
+  writer_printf(writer,"sdd %"PRIsS"\n",count);
 }
 
 //index stores new (continguous) ids
-void print_sdd_node_file(FILE* file, SddNode* node) {
+void print_sdd_node_file(SddWriter* writer, SddNode* node) {
   
   Vtree* vtree = node->vtree; //NULL for trivial nodes
 
-  if(node->type==TRUE) fprintf(file,"T %"PRIsS"\n",node->index);
-  else if(node->type==FALSE) fprintf(file,"F %"PRIsS"\n",node->index);
-  else if(node->type==LITERAL) fprintf(file,"L %"PRIsS" %"PRIsS" %"PRIlitS"\n",node->index,vtree->position,LITERAL_OF(node));
+  if(node->type==TRUE) writer_printf(writer,"T %"PRIsS"\n",node->index);
+  else if(node->type==FALSE) writer_printf(writer,"F %"PRIsS"\n",node->index);
+  else if(node->type==LITERAL) writer_printf(writer,"L %"PRIsS" %"PRIsS" %"PRIlitS"\n",node->index,vtree->position,LITERAL_OF(node));
   else {//decomposition 
-    fprintf(file,"D %"PRIsS" %"PRIsS" %"PRIsS"",node->index,vtree->position,node->size);
-	FOR_each_prime_sub_of_node(prime,sub,node,fprintf(file," %"PRIsS" %"PRIsS"",prime->index,sub->index));
-    fprintf(file,"\n");     
+    writer_printf(writer,"D %"PRIsS" %"PRIsS" %"PRIsS"",node->index,vtree->position,node->size);
+	FOR_each_prime_sub_of_node(prime,sub,node,writer_printf(writer," %"PRIsS" %"PRIsS"",prime->index,sub->index));
+    writer_printf(writer,"\n");     
   }
 }
 
-void print_sdd_recurse(FILE* file, SddNode* node) {
+//node_id_counter is used to contiguously id nodes before saving
+void print_sdd_recurse(SddWriter* writer, SddNode* node, SddSize* node_id_counter) {
   if (node->bit==0) return; //node already visited (i.e., already printed)
   node->bit=0;
 
-  node->index = node_id_counter++; //new id
+  node->index = (*node_id_counter)++; //new id
   if(node->type==DECOMPOSITION) {
     FOR_each_prime_sub_of_node(prime,sub,node,{
-      print_sdd_recurse(file,prime);
-      print_sdd_recurse(file,sub);
+      print_sdd_recurse(writer,prime,node_id_counter);
+      print_sdd_recurse(writer,sub,node_id_counter);
   	});
   }
-  print_sdd_node_file(file,node);
+  print_sdd_node_file(writer,node);
 }
 
-void print_sdd(FILE* file, SddNode* node) {
+void print_sdd(SddWriter* writer, SddNode* node) {
   SddSize count = sdd_all_node_count_leave_bits_1(node);
   //all node bits are now set to 1
-  print_sdd_header(file,count);
-  node_id_counter=0;
-  print_sdd_recurse(file,node);
+  print_sdd_header(writer,count);
+  SddSize node_id_counter = 0;
+  print_sdd_recurse(writer,node,&node_id_counter);
   //all node bits are now set to 0
 }
 
@@ -320,10 +340,22 @@ void sdd_save(const char* fname, SddNode *node) {
   assert(!GC_NODE(node));
   
   FILE *file = fopen(fname,"w");
-  print_sdd(file,node);
+  SddWriter writer;
+  init_file_writer(file,&writer);
+  print_sdd(&writer,node);
   fclose(file); 
 }
 
+//writes an sdd in .sdd file format to a callback
+void sdd_write(SddNode* node, SddWriteFunc* write, void* context) {
+  CHECK_ERROR(GC_NODE(node),ERR_MSG_GC,"sdd_write");
+
+  SddWriter writer;
+  init_callback_writer(write,context,&writer);
+  print_sdd(&writer,node);
+  free_writer(&writer);
+}
+
 
 /****************************************************************************************
  * reading sdd
@@ -360,6 +392,28 @@ SddNode* sdd_read(const char* filename, SddManager* manager) {
  * D id-of-decomposition-sdd-node id-of-vtree number-of-elements {id-of-prime id-of-sub}*
 *****************************************************************************************/
 
+//constructs the node with the given elements (when the elements are not structured for
+//vnode, that is, primes are not in vnode->left or subs are not in vnode->right, apply is used)
+static
+SddNode* node_from_elements(Vtree* vnode, SddNodeSize size, SddNode** prime_list, SddNode** sub_list, int structured_elements, SddManager* manager) {
+  SddNode* node;
+  if(structured_elements) {
+    GET_node_from_partition(node,vnode,manager,{
+      for(SddNodeSize i=0; i<size; i++) {
+        DECLARE_element(prime_list[i],sub_list[i],vnode,manager);
+      }
+    });
+  }
+  else {
+    node = manager->false_sdd;
+    for(SddNodeSize i=0; i<size; i++) {
+      SddNode* element = sdd_apply(prime_list[i],sub_list[i],CONJOIN,manager);
+      node             = sdd_apply(node,element,DISJOIN,manager);
+    }
+  }
+  return node;
+}
+
 SddNode* parse_sdd_file(char* buffer, SddManager* manager) {
   Vtree** pos2vnode_map(Vtree* vtree);
 
@@ -414,22 +468,7 @@ SddNode* parse_sdd_file(char* buffer, SddManager* manager) {
           structured_elements &= TRIVIAL(sub) || sdd_vtree_is_sub(sub->vtree,vnode->right);
         }
         
-        SddNode* node;
-		if(structured_elements) {
-		  GET_node_from_partition(node,vnode,manager,{
-			for(SddNodeSize i=0; i<size; i++) {
-			  DECLARE_element(prime_list[i],sub_list[i],vnode,manager);
-			}
-		  });
-		}
-		else {
-      	  node = manager->false_sdd;
-		  for(SddNodeSize i=0; i<size; i++) {
-	        SddNode* element = sdd_apply(prime_list[i],sub_list[i],CONJOIN,manager);
-	        node             = sdd_apply(node,element,DISJOIN,manager);
-		  }
-		}
-		node_list[sdd_node_id] = node;
+		node_list[sdd_node_id] = node_from_elements(vnode,size,prime_list,sub_list,structured_elements,manager);
     }
     
 	root = node_list[sdd_node_id];
@@ -443,6 +482,74 @@ SddNode* parse_sdd_file(char* buffer, SddManager* manager) {
   return root;
 }
 
+/****************************************************************************************
+ * constructing an sdd from arrays
+ *
+ * nodes are sorted so children appear before parents (the last node is the root):
+ * types[i]   : FALSE, TRUE, LITERAL or DECOMPOSITION
+ * literals[i]: literal of node i (if it is a literal)
+ * vtrees[i]  : vtree position of node i (if it is a decomposition)
+ * the elements of node i are (primes[e],subs[e]) for offsets[i] <= e < offsets[i+1], where
+ * primes and subs are locations of nodes
+ *
+ * the vtree of the manager must have the same structure as the vtree used for the positions
+ * the arrays are not checked, see CompiledCircuit.validate in pysdd
+ ****************************************************************************************/
+
+SddNode* sdd_from_arrays(SddSize node_count, const char* types, const SddLiteral* literals, const SddLiteral* vtrees,
+                         const SddLiteral* offsets, const SddLiteral* primes, const SddLiteral* subs, SddManager* manager) {
+  Vtree** pos2vnode_map(Vtree* vtree);
+  Vtree** vtree_list = pos2vnode_map(manager->vtree); //maps positions to vnodes
+
+  SddNode** node_list;
+  CALLOC(node_list,SddNode*,node_count,"sdd_from_arrays");
+  
+  //create buffers for primes/subs
+  SddNodeSize max_size = 16;
+  SddNode** prime_list;
+  CALLOC(prime_list,SddNode*,max_size,"sdd_from_arrays");
+  SddNode** sub_list;
+  CALLOC(sub_list,SddNode*,max_size,"sdd_from_arrays");
+
+  //auto gc and minimize will not be invoked during construction
+  WITH_no_auto_mode(manager,{
+    for(SddSize n=0; n<node_count; n++) {
+      if(types[n]==TRUE) node_list[n] = manager->true_sdd;
+      else if(types[n]==FALSE) node_list[n] = manager->false_sdd;
+      else if(types[n]==LITERAL) node_list[n] = sdd_manager_literal(literals[n],manager);
+      else { //DECOMPOSITION
+        Vtree* vnode     = vtree_list[vtrees[n]];
+        SddNodeSize size = offsets[n+1]-offsets[n];
+        
+        if(size > max_size) { //make sure prime/sub buffers are large enough
+          max_size = size;
+          REALLOC(prime_list,SddNode*,max_size,"sdd_from_arrays");
+          REALLOC(sub_list,SddNode*,max_size,"sdd_from_arrays");
+        }
+        
+        //collect elements and check if structured
+        int structured_elements = 1;
+        for(SddNodeSize i=0; i<size; i++) {
+          SddNode* prime = prime_list[i] = node_list[primes[offsets[n]+i]];
+          SddNode* sub   = sub_list[i]   = node_list[subs[offsets[n]+i]];
+          structured_elements &= sdd_vtree_is_sub(prime->vtree,vnode->left);
+          structured_elements &= TRIVIAL(sub) || sdd_vtree_is_sub(sub->vtree,vnode->right);
+        }
+        
+        node_list[n] = node_from_elements(vnode,size,prime_list,sub_list,structured_elements,manager);
+      }
+    }
+  });
+  
+  SddNode* root = node_list[node_count-1];
+  free(vtree_list);
+  free(node_list);
+  free(prime_list);
+  free(sub_list);
+  
+  return root;
+}
+
 /****************************************************************************************
  * end
  ****************************************************************************************/
@@ -10,6 +10,7 @@
 static void sdd_model_count_aux(SddNode* node, SddModelCount* start, SddModelCount** model_counts);
 static SddLiteral var_count(Vtree* vtree);	
 static SddLiteral gap_var_count(Vtree* vtree, Vtree* sub_vtree);
+static SddLiteral* used_var_counts(SddNode* node, SddManager* manager);
 
 /****************************************************************************************
  * number of models for an sdd
@@ -141,6 +142,224 @@ SddLiteral gap_var_count(Vtree* vtree, Vtree* sub_vtree) {
 }
 
 
+/****************************************************************************************
+ * exact and log2 model counts
+ *
+ * the counts are computed over the topological order of the sdd (children before parents)
+ * instead of recursively, and do not overflow:
+ * --the exact count uses multi-limb integers (little-endian 32-bit limbs); the count of a
+ *   node normalized for vtree v has at most used(v)+1 bits, so each node gets its own width
+ * --the log2 count uses doubles in log-space
+ *
+ * used(v) is the number of sdd variables in vtree v, computed for all vtree nodes at once
+ * from a prefix sum over the (in-order) positions of the leaves
+ ****************************************************************************************/
+
+//returns array with the number of sdd variables in each vtree node (indexed by position)
+//and leaves the nodes of the sdd indexed by their position in the topological order
+static
+SddLiteral* used_var_counts(SddNode* node, SddManager* manager) {
+  Vtree* root = manager->vtree;
+  SddLiteral vtree_count = 2*root->var_count-1;
+
+  //mark vtree nodes depending on whether their variables appear in the sdd
+  set_sdd_variables(node,manager);
+
+  SddLiteral* prefix;
+  CALLOC(prefix,SddLiteral,vtree_count+1,"used_var_counts");
+  FOR_each_leaf_vtree_node(leaf,root,prefix[leaf->position+1] = leaf->all_vars_in_sdd? 1: 0);
+  for(SddLiteral i=0; i<vtree_count; i++) prefix[i+1] += prefix[i];
+
+  SddLiteral* used;
+  CALLOC(used,SddLiteral,vtree_count,"used_var_counts");
+  FOR_each_vtree_node(v,root,used[v->position] = prefix[v->last->position+1]-prefix[v->first->position]);
+  free(prefix);
+  return used;
+}
+
+//number of limbs needed for a count of at most 2^bits
+#define LIMB_WIDTH(bits) ((SddSize)((bits)/32+1))
+
+//returns the number of limbs without leading zero limbs
+static
+SddSize limbs_length(const uint32_t* a, SddSize length) {
+  while(length>0 && a[length-1]==0) --length;
+  return length;
+}
+
+//r = a*b, r must have room for a_length+b_length limbs
+static
+void limbs_mul(const uint32_t* a, SddSize a_length, const uint32_t* b, SddSize b_length, uint32_t* r) {
+  memset(r,0,(a_length+b_length)*sizeof(uint32_t));
+  for(SddSize i=0; i<a_length; i++) {
+    uint64_t carry = 0;
+    for(SddSize j=0; j<b_length; j++) {
+      uint64_t t = (uint64_t)a[i]*b[j] + r[i+j] + carry;
+      r[i+j] = (uint32_t)t;
+      carry  = t>>32;
+    }
+    r[i+b_length] = (uint32_t)carry;
+  }
+}
+
+//r += a*2^shift, r has r_length limbs and is large enough to hold the sum
+static
+void limbs_add_shifted(uint32_t* r, SddSize r_length, const uint32_t* a, SddSize a_length, SddLiteral shift) {
+  SddSize offset = shift/32;
+  unsigned bits  = shift%32;
+  uint64_t carry = 0;
+  SddSize i = 0;
+  for(; i<=a_length && offset+i<r_length; i++) {
+    uint32_t piece = 0;
+    if(i<a_length) piece = a[i]<<bits;
+    if(i>0 && bits>0) piece |= a[i-1]>>(32-bits);
+    uint64_t t = (uint64_t)r[offset+i] + piece + carry;
+    r[offset+i] = (uint32_t)t;
+    carry = t>>32;
+  }
+  for(; carry && offset+i<r_length; i++) {
+    uint64_t t = (uint64_t)r[offset+i] + carry;
+    r[offset+i] = (uint32_t)t;
+    carry = t>>32;
+  }
+}
+
+//exact model count of an sdd: stores the count in a newly allocated array of little-endian
+//32-bit limbs (to be freed by the caller) and returns its number of limbs (0 for count zero)
+//if global is nonzero, the count is relative to all manager variables (as sdd_global_model_count)
+SddSize sdd_exact_model_count(SddNode* node, int global, uint32_t** limbs, SddManager* manager) {
+  CHECK_ERROR(GC_NODE(node),ERR_MSG_GC,"sdd_exact_model_count");
+  assert(!GC_NODE(node));
+
+  SddLiteral var_count = manager->vtree->var_count;
+  uint32_t* result;
+  SddSize length;
+
+  if(node->type==FALSE || node->type==TRUE) {
+    SddLiteral bits = (node->type==TRUE && global)? var_count: 0;
+    length = LIMB_WIDTH(bits);
+    CALLOC(result,uint32_t,length,"sdd_exact_model_count");
+    if(node->type==TRUE) result[bits/32] = ((uint32_t)1)<<(bits%32);
+    *limbs = result;
+    return limbs_length(result,length);
+  }
+
+  SddLiteral* used = used_var_counts(node,manager);
+  SddSize size;
+  SddNode** nodes = sdd_topological_sort(node,&size);
+
+  //location of the count of each node
+  SddSize* offsets;
+  CALLOC(offsets,SddSize,size+1,"sdd_exact_model_count");
+  SddSize max_width = 1;
+  for(SddSize i=0; i<size; i++) {
+    SddNode* n = nodes[i];
+    SddSize width = (n->vtree==NULL)? 1: LIMB_WIDTH(used[n->vtree->position]);
+    offsets[i+1] = offsets[i]+width;
+    if(width>max_width) max_width = width;
+  }
+  uint32_t* counts;
+  CALLOC(counts,uint32_t,offsets[size],"sdd_exact_model_count");
+  uint32_t* product;
+  CALLOC(product,uint32_t,2*max_width,"sdd_exact_model_count");
+  uint32_t one = 1;
+
+  for(SddSize i=0; i<size; i++) {
+    SddNode* n = nodes[i];
+    uint32_t* mc = counts+offsets[i];
+    SddSize width = offsets[i+1]-offsets[i];
+    if(n->type==TRUE || n->type==LITERAL) mc[0] = 1;
+    else if(n->type==DECOMPOSITION) {
+      Vtree* left  = n->vtree->left;
+      Vtree* right = n->vtree->right;
+      FOR_each_prime_sub_of_node(prime,sub,n,{
+        if(!IS_FALSE(sub)) {
+          //prime is neither true nor false
+          const uint32_t* prime_mc = counts+offsets[prime->index];
+          SddSize prime_length = limbs_length(prime_mc,offsets[prime->index+1]-offsets[prime->index]);
+          SddLiteral shift = used[left->position]-used[prime->vtree->position];
+          const uint32_t* sub_mc = &one;
+          SddSize sub_length = 1;
+          if(IS_TRUE(sub)) shift += used[right->position];
+          else {
+            sub_mc = counts+offsets[sub->index];
+            sub_length = limbs_length(sub_mc,offsets[sub->index+1]-offsets[sub->index]);
+            shift += used[right->position]-used[sub->vtree->position];
+          }
+          limbs_mul(prime_mc,prime_length,sub_mc,sub_length,product);
+          limbs_add_shifted(mc,width,product,limbs_length(product,prime_length+sub_length),shift);
+        }
+      });
+    }
+  }
+
+  //count of the root, relative to the sdd variables or to all variables
+  SddLiteral unused = global? var_count-used[node->vtree->position]: 0;
+  length = LIMB_WIDTH(used[node->vtree->position]+unused);
+  CALLOC(result,uint32_t,length,"sdd_exact_model_count");
+  const uint32_t* root_mc = counts+offsets[node->index];
+  limbs_add_shifted(result,length,root_mc,limbs_length(root_mc,offsets[size]-offsets[node->index]),unused);
+
+  free(product);
+  free(counts);
+  free(offsets);
+  free(nodes);
+  free(used);
+  *limbs = result;
+  return limbs_length(result,length);
+}
+
+//log2 of (x+y) given log2(x) and log2(y)
+static inline
+double log2_add(double x, double y) {
+  if(x==-INFINITY) return y;
+  if(y==-INFINITY) return x;
+  if(x<y) { double t = x; x = y; y = t; }
+  return x + log2(1.0+exp2(y-x));
+}
+
+//log2 of the model count of an sdd (-INFINITY for false), which is also finite when the count
+//does not fit in a double; if global is nonzero, the count is relative to all manager variables
+double sdd_log2_model_count(SddNode* node, int global, SddManager* manager) {
+  CHECK_ERROR(GC_NODE(node),ERR_MSG_GC,"sdd_log2_model_count");
+  assert(!GC_NODE(node));
+
+  if(node->type==FALSE) return -INFINITY;
+  if(node->type==TRUE) return global? (double)manager->vtree->var_count: 0.0;
+
+  SddLiteral* used = used_var_counts(node,manager);
+  SddSize size;
+  SddNode** nodes = sdd_topological_sort(node,&size);
+  double* counts;
+  CALLOC(counts,double,size,"sdd_log2_model_count");
+
+  for(SddSize i=0; i<size; i++) {
+    SddNode* n = nodes[i];
+    double mc = -INFINITY;
+    if(n->type==TRUE || n->type==LITERAL) mc = 0.0;
+    else if(n->type==DECOMPOSITION) {
+      Vtree* left  = n->vtree->left;
+      Vtree* right = n->vtree->right;
+      FOR_each_prime_sub_of_node(prime,sub,n,{
+        if(!IS_FALSE(sub)) {
+          double element_mc = counts[prime->index] + (used[left->position]-used[prime->vtree->position]);
+          if(IS_TRUE(sub)) element_mc += used[right->position];
+          else element_mc += counts[sub->index] + (used[right->position]-used[sub->vtree->position]);
+          mc = log2_add(mc,element_mc);
+        }
+      });
+    }
+    counts[i] = mc;
+  }
+
+  double mc = counts[node->index];
+  if(global) mc += manager->vtree->var_count-used[node->vtree->position];
+  free(counts);
+  free(nodes);
+  free(used);
+  return mc;
+}
+
 /****************************************************************************************
  * end
  ****************************************************************************************/
@@ -8,16 +8,25 @@
 
 //local declarations
 static void cache_true_wmcs(Vtree* vtree, WmcManager* wmc_manager);
+static void cache_true_wmcs_of_leaf(Vtree* leaf, WmcManager* wmc_manager);
+static void update_derivatives(WmcManager* wmc_manager);
+static SddWmc wmc_propagate_incremental(WmcManager* wmc_manager);
 static SddWmc wmc_of_missing(SddWmc wmc, Vtree* vtree, Vtree* sub_vtree, WmcManager* wmc_manager);
 static void update_derivatives_of_missing(SddWmc dr_wmc, Vtree* vtree, Vtree* sub_vtree, WmcManager* wmc_manager);
 static void update_derivatives_of_unused(SddWmc drv_wmc, Vtree* vtree, WmcManager* wmc_manager);
+static void cache_true_wmcs_batch(Vtree* vtree, const SddWmc* weights, SddLiteral weights_var_count,
+                                  SddSize block_size, SddWmc* used_wmcs, SddWmc* unused_wmcs,
+                                  WmcManager* wmc_manager);
+static void cache_true_mpes_batch(Vtree* vtree, const SddWmc* weights, SddLiteral weights_var_count,
+                                  SddSize block_size, SddWmc* true_mpes, WmcManager* wmc_manager);
 
 /****************************************************************************************
  * log-space: macro utilities
+ *
+ * the macros below assume a local variable log_mode, which is set from the wmc manager
+ * (there is no global mode so managers in different modes can be used concurrently)
  ****************************************************************************************/
 
-static int log_mode;
-
 #define ZEROW (log_mode? -INFINITY: 0)
 #define ONEW (log_mode? 0: 1)
 #define IS_ZEROW(A) (A==ZEROW)
@@ -27,24 +36,45 @@ static int log_mode;
 #define ADD(A,B) (log_mode? (IS_ZEROW(A)? B: (IS_ZEROW(B)? A: (A<B? B+log1p(exp(A-B)): A+log1p(exp(B-A))))): (A+B))
 #define DIV(A,B) (log_mode? (A-B): (A/B))
 #define INC(A,B) A = ADD(A,B)
+#define MAXW(A,B) (A<B? B: A) //same in both modes
 
 
 /****************************************************************************************
  * node, literal and vtree properties: macro utilities
  ****************************************************************************************/
  
-//wmc of a node (n is sdd node, m is wmc_manager)
-#define WMC(n,m) (m->node_wmcs[n->index])
-//derivative of a node (n is sdd node, m is wmc_manager)
-#define DRV(n,m) (m->node_derivatives[n->index])
+//wmc of a node (i is location of node in sorted nodes, m is wmc_manager)
+#define WMC(i,m) (m->node_wmcs[i])
+//derivative of a node (i is location of node in sorted nodes, m is wmc_manager)
+#define DRV(i,m) (m->node_derivatives[i])
 //wmc of true (v is vtree, m is wmc_manager)
 #define USED_TRUE_WMC(v,m) (m->used_true_wmcs[v->position])
 #define UNUSED_TRUE_WMC(v,m) (m->unused_true_wmcs[v->position])
+//used/unused variables (v is vtree, m is wmc_manager)
+#define ALL_VARS_IN_SDD(v,m) (m->all_vars_in_sdd[v->position])
+#define NO_VAR_IN_SDD(v,m) (m->no_var_in_sdd[v->position])
 
 //increment node derivative
-#define INC_NODE_DRV(n,d,m) INC(m->node_derivatives[n->index],d)
+#define INC_NODE_DRV(i,d,m) INC(m->node_derivatives[i],d)
+//location of a literal in the literal weights and derivatives: -n,...,-1,1,...,n (n is the number of variables)
+#define LITERAL_LOCATION(l,m) ((l)<0? VAR_COUNT(m)+(l): VAR_COUNT(m)+(l)-1)
+//weight of a literal (l is literal, m is wmc_manager)
+#define LIT_WEIGHT(l,m) ((m)->literal_weights[LITERAL_LOCATION(l,m)])
+//derivative of a literal (l is literal, m is wmc_manager)
+#define LIT_DRV(l,m) (m->literal_derivatives[LITERAL_LOCATION(l,m)])
 //increment literal derivative
-#define INC_LIT_DRV(l,d,m) INC(m->literal_derivatives[l],d)
+#define INC_LIT_DRV(l,d,m) INC(LIT_DRV(l,m),d)
+
+//iterates over the elements of node at location i (P and S are the prime and sub, PI and SI are their locations)
+#define FOR_each_prime_sub_location(P,S,PI,SI,i,m,B) {\
+  for(SddSize _e=(m)->element_offsets[i]; _e<(m)->element_offsets[(i)+1]; _e++) {\
+    SddSize PI = (m)->prime_indices[_e];\
+    SddSize SI = (m)->sub_indices[_e];\
+    SddNode* P = (m)->nodes[PI];\
+    SddNode* S = (m)->nodes[SI];\
+    B;\
+  }\
+}
 
 
 /****************************************************************************************
@@ -63,199 +93,356 @@ WmcManager* wmc_manager_new(SddNode* node, int lm, SddManager* manager) {
   WmcManager* wmc_manager;
   MALLOC(wmc_manager,WmcManager,"wmc_manager_new");
   
-  log_mode                 = lm; //declare mode
+  int log_mode             = lm; //declare mode
   wmc_manager->log_mode    = lm; //save mode
   wmc_manager->node        = node;
   wmc_manager->sdd_manager = manager;
   
   //nodes are sorted so children appear before parents in the array
-  //n->index contains the location of node n in the array
+  //n->index contains the location of node n in the array (until changed by other operations)
   SddSize node_count; //how many nodes in the sdd
-  wmc_manager->nodes      = sdd_topological_sort(node,&node_count);
+  SddNode** nodes         = sdd_topological_sort(node,&node_count);
+  wmc_manager->nodes      = nodes;
   wmc_manager->node_count = node_count;
 
-  //save node indices since ->index field of an sdd node is used by many other
-  //operations such as conditioning, saving, etc
-  CALLOC(wmc_manager->node_indices,SddSize,node_count,"wmc_manager_new");
-  for(SddSize i=0; i<node_count; i++) wmc_manager->node_indices[i] = wmc_manager->nodes[i]->index;
+  //save the elements of nodes in terms of locations since ->index field of an sdd node is
+  //used by many other operations such as conditioning, saving, etc
+  //(propagation then only reads the sdd, so wmc managers can be used concurrently)
+  SddSize element_count = 0;
+  for(SddSize i=0; i<node_count; i++) {
+    if(nodes[i]->type==DECOMPOSITION) element_count += nodes[i]->size;
+  }
+  CALLOC(wmc_manager->element_offsets,SddSize,node_count+1,"wmc_manager_new");
+  CALLOC(wmc_manager->prime_indices,SddSize,element_count,"wmc_manager_new");
+  CALLOC(wmc_manager->sub_indices,SddSize,element_count,"wmc_manager_new");
+  SddSize e = 0;
+  for(SddSize i=0; i<node_count; i++) {
+    wmc_manager->element_offsets[i] = e;
+    if(nodes[i]->type==DECOMPOSITION) {
+      FOR_each_prime_sub_of_node(prime,sub,nodes[i],{
+        wmc_manager->prime_indices[e] = prime->index;
+        wmc_manager->sub_indices[e]   = sub->index;
+        ++e;
+      });
+    }
+  }
+  wmc_manager->element_offsets[node_count] = e;
   
   //allocate memory for node wmcs and derivatives
   CALLOC(wmc_manager->node_wmcs,SddWmc,node_count,"wmc_manager_new");
   CALLOC(wmc_manager->node_derivatives,SddWmc,node_count,"wmc_manager_new"); 
   
   //allocate memory for literal wmcs and derivatives
-  SddLiteral literal_count = 2*manager->var_count +1;  //one extra
-  CALLOC(wmc_manager->literal_weights,SddWmc,literal_count,"wmc_manager_new");
+  //they are stored as -n,...,-1,1,...,n so they can be shared as one array (see LITERAL_LOCATION)
+  SddLiteral literal_count = 2*manager->var_count;
+  CALLOC(wmc_manager->own_literal_weights,SddWmc,literal_count,"wmc_manager_new");
   CALLOC(wmc_manager->literal_derivatives,SddWmc,literal_count,"wmc_manager_new"); 
   //initialize literal weights
-  for(SddLiteral i=0; i<literal_count; i++) wmc_manager->literal_weights[i] = ONEW;
-  
-  //for better literal indexing
-  wmc_manager->literal_weights     += manager->var_count;
-  wmc_manager->literal_derivatives += manager->var_count;
+  for(SddLiteral i=0; i<literal_count; i++) wmc_manager->own_literal_weights[i] = ONEW;
+  wmc_manager->literal_weights = wmc_manager->own_literal_weights;
   
   //allocate memory for the wmcs of true (with respect to each vtree node)
   SddLiteral vtree_count = 2*manager->var_count -1;
   CALLOC(wmc_manager->used_true_wmcs,SddWmc,vtree_count,"wmc_manager_new");
   CALLOC(wmc_manager->unused_true_wmcs,SddWmc,vtree_count,"wmc_manager_new");
   
+  //declare used/unused variables and save them since vtree flags are used by other operations
+  CALLOC(wmc_manager->all_vars_in_sdd,char,vtree_count,"wmc_manager_new");
+  CALLOC(wmc_manager->no_var_in_sdd,char,vtree_count,"wmc_manager_new");
+  set_sdd_variables(node,manager);
+  FOR_each_vtree_node(v,manager->vtree,{
+    ALL_VARS_IN_SDD(v,wmc_manager) = v->all_vars_in_sdd;
+    NO_VAR_IN_SDD(v,wmc_manager)   = v->no_var_in_sdd;
+  });
+  
+  //nothing is propagated yet, the structures for incremental propagation are created when first needed
+  wmc_manager->wmc_valid         = 0;
+  wmc_manager->derivatives_valid = 0;
+  wmc_manager->dirty_count       = 0;
+  CALLOC(wmc_manager->dirty_vars,char,manager->var_count+1,"wmc_manager_new");
+  CALLOC(wmc_manager->dirty_list,SddLiteral,manager->var_count,"wmc_manager_new");
+  wmc_manager->parent_offsets    = NULL;
+  wmc_manager->parent_indices    = NULL;
+  wmc_manager->vtree_offsets     = NULL;
+  wmc_manager->vtree_indices     = NULL;
+  wmc_manager->literal_indices   = NULL;
+  wmc_manager->queue             = NULL;
+  wmc_manager->queued            = NULL;
+  
   return wmc_manager;
 }
 
 
 void wmc_manager_free(WmcManager* wmc_manager) {
   free(wmc_manager->nodes);
-  free(wmc_manager->node_indices);
+  free(wmc_manager->element_offsets);
+  free(wmc_manager->prime_indices);
+  free(wmc_manager->sub_indices);
+  free(wmc_manager->all_vars_in_sdd);
+  free(wmc_manager->no_var_in_sdd);
   free(wmc_manager->node_wmcs);
   free(wmc_manager->node_derivatives);
-  free(wmc_manager->literal_weights-VAR_COUNT(wmc_manager));
-  free(wmc_manager->literal_derivatives-VAR_COUNT(wmc_manager));
+  free(wmc_manager->own_literal_weights);
+  free(wmc_manager->literal_derivatives);
   free(wmc_manager->used_true_wmcs);
   free(wmc_manager->unused_true_wmcs);
+  free(wmc_manager->dirty_vars);
+  free(wmc_manager->dirty_list);
+  free(wmc_manager->parent_offsets);
+  free(wmc_manager->parent_indices);
+  free(wmc_manager->vtree_offsets);
+  free(wmc_manager->vtree_indices);
+  if(wmc_manager->literal_indices!=NULL) free(wmc_manager->literal_indices-VAR_COUNT(wmc_manager));
+  free(wmc_manager->queue);
+  free(wmc_manager->queued);
   free(wmc_manager);
 }
 
 //returns a zero weight appropriate domain
 SddWmc wmc_zero_weight(WmcManager* wmc_manager) {
-  log_mode = wmc_manager->log_mode;
+  int log_mode = wmc_manager->log_mode;
   return ZEROW;
 }
 
 //returns a one weight in appropriate domain
 SddWmc wmc_one_weight(WmcManager* wmc_manager) {
-  log_mode = wmc_manager->log_mode;
+  int log_mode = wmc_manager->log_mode;
   return ONEW;
 }
 
+//marks a variable as dirty so the next propagation can be incremental
+static inline
+void set_dirty_var(SddLiteral var, WmcManager* wmc_manager) {
+  if(!wmc_manager->dirty_vars[var]) {
+    wmc_manager->dirty_vars[var] = 1;
+    wmc_manager->dirty_list[wmc_manager->dirty_count++] = var;
+  }
+}
+
 //sets the weight of a literal
 //literal is an integer <> 0
 void wmc_set_literal_weight(const SddLiteral literal, const SddWmc weight, WmcManager* wmc_manager) {
-  wmc_manager->literal_weights[literal] = weight;
+  if(LIT_WEIGHT(literal,wmc_manager)==weight) return;
+  LIT_WEIGHT(literal,wmc_manager) = weight;
+  set_dirty_var(literal<0? -literal: literal,wmc_manager);
 }
 
 //returns the weight of a literal
 //literal is an integer <> 0
 SddWmc wmc_literal_weight(const SddLiteral literal, const WmcManager* wmc_manager) {
-  return wmc_manager->literal_weights[literal];
+  return LIT_WEIGHT(literal,wmc_manager);
+}
+
+/****************************************************************************************
+ * literal weights in a buffer of the user
+ *
+ * the literal weights can be read directly from an array that belongs to the user (e.g. a
+ * numpy array), which can then be changed without calling wmc_set_literal_weight(); the
+ * array of the manager then keeps the weights of the last propagation, and the weights
+ * that changed are found by comparing both arrays when propagating
+ ****************************************************************************************/
+
+//marks the variables whose weights in the user buffer changed as dirty
+static
+void sync_literal_weights(WmcManager* wmc_manager) {
+  SddWmc* weights    = wmc_manager->literal_weights;
+  SddWmc* last       = wmc_manager->own_literal_weights;
+  SddLiteral n       = VAR_COUNT(wmc_manager);
+  if(weights==last) return; //no user buffer
+  for(SddLiteral var=1; var<=n; var++) {
+    SddLiteral neg = n-var, pos = n+var-1; //locations of -var and var
+    if(weights[neg]!=last[neg] || weights[pos]!=last[pos]) {
+      last[neg] = weights[neg];
+      last[pos] = weights[pos];
+      set_dirty_var(var,wmc_manager);
+    }
+  }
+}
+
+//uses weights as the literal weights of the manager, without copying them
+//weights is an array with the weights of literals -n,...,-1,1,...,n (n is the number of variables)
+//that should stay valid until the manager is freed or another buffer is set
+//if weights is NULL, the manager again uses its own array (which gets the current weights)
+void wmc_set_literal_weights_buffer(SddWmc* weights, WmcManager* wmc_manager) {
+  sync_literal_weights(wmc_manager);
+  wmc_manager->literal_weights = weights==NULL? wmc_manager->own_literal_weights: weights;
 }
 
 //returns the derivative of a literal
 //literal is an integer <> 0
-SddWmc wmc_literal_derivative(const SddLiteral literal, const WmcManager* wmc_manager) {
-  return wmc_manager->literal_derivatives[literal];
+//derivatives are computed on the first request after a propagation
+SddWmc wmc_literal_derivative(const SddLiteral literal, WmcManager* wmc_manager) {
+  if(wmc_manager->wmc_valid && !wmc_manager->derivatives_valid) update_derivatives(wmc_manager);
+  return LIT_DRV(literal,wmc_manager);
 }
 
 //returns the marginal wmc of a literal
 //literal is an integer <> 0
-SddWmc wmc_literal_pr(const SddLiteral literal, const WmcManager* wmc_manager) {
-  log_mode = wmc_manager->log_mode;
-  return DIV(MULT(wmc_manager->literal_derivatives[literal],
-                  wmc_manager->literal_weights[literal]),
+SddWmc wmc_literal_pr(const SddLiteral literal, WmcManager* wmc_manager) {
+  int log_mode = wmc_manager->log_mode;
+  if(wmc_manager->wmc_valid && !wmc_manager->derivatives_valid) update_derivatives(wmc_manager);
+  return DIV(MULT(LIT_DRV(literal,wmc_manager),
+                  LIT_WEIGHT(literal,wmc_manager)),
              wmc_manager->wmc);
 }
 
+//returns the derivatives of all literals, in the order -n,...,-1,1,...,n (n is the number of variables)
+//the array belongs to the wmc manager and is overwritten when the derivatives are recomputed
+SddWmc* wmc_literal_derivatives(WmcManager* wmc_manager) {
+  if(wmc_manager->wmc_valid && !wmc_manager->derivatives_valid) update_derivatives(wmc_manager);
+  return wmc_manager->literal_derivatives;
+}
+
+//stores the marginal wmcs of all literals in prs, in the order -n,...,-1,1,...,n
+void wmc_literal_prs(SddWmc* prs, WmcManager* wmc_manager) {
+  int log_mode = wmc_manager->log_mode;
+  if(wmc_manager->wmc_valid && !wmc_manager->derivatives_valid) update_derivatives(wmc_manager);
+  SddLiteral var_count = VAR_COUNT(wmc_manager);
+  SddWmc wmc = wmc_manager->wmc;
+  for(SddLiteral i=0; i<var_count; i++) {
+    SddLiteral literal = i-var_count; //negative literals
+    prs[i] = DIV(MULT(LIT_DRV(literal,wmc_manager),LIT_WEIGHT(literal,wmc_manager)),wmc);
+    prs[var_count+i] = DIV(MULT(LIT_DRV(i+1,wmc_manager),LIT_WEIGHT(i+1,wmc_manager)),wmc);
+  }
+}
+
 /****************************************************************************************
- * computing weighted model count and sets derivatives of literals as a side effect
+ * computing weighted model count and derivatives of literals
  *
  * literal weights can be set using wmc_set_literal_weight()
  * literal derivaties can be recovered using wmc_literal_derivative()
  *
+ * derivatives are computed lazily: a propagation only computes the node wmcs and the
+ * derivatives are computed (in a second pass) when they are first requested
+ *
+ * a propagation is incremental when only a few variables have changed weights since the
+ * previous propagation: only the nodes that depend on these weights are recomputed, in
+ * topological order, and the ancestors of a node are only visited if its wmc changed.
+ * the nodes that depend on a variable are its literal nodes and, if the sum of the weights
+ * of its literals changed, the decomposition nodes that have the variable in a gap (the
+ * latter are found by visiting the nodes normalized for the vtree ancestors of the variable)
  ****************************************************************************************/
 
 static inline
-void initialize_wmc(WmcManager* wmc_manager) {
+void initialize_derivatives(WmcManager* wmc_manager) {
+  int log_mode = wmc_manager->log_mode;
 
-  //recover node indices in case they were changed by other operations
-  for(SddSize i=0; i<wmc_manager->node_count; i++) {
-    wmc_manager->nodes[i]->index = wmc_manager->node_indices[i];
-  }
-  
-  //initialize derivatives
   for(SddSize i=0; i<wmc_manager->node_count; i++) wmc_manager->node_derivatives[i] = ZEROW;
-  for(SddLiteral i=1; i<=VAR_COUNT(wmc_manager); i++) {
-    wmc_manager->literal_derivatives[i]  = ZEROW;
-    wmc_manager->literal_derivatives[-i] = ZEROW;
-  }
-  
-  //declare used/unused variables
-  set_sdd_variables(wmc_manager->node,wmc_manager->sdd_manager);
+  for(SddLiteral i=0; i<2*VAR_COUNT(wmc_manager); i++) wmc_manager->literal_derivatives[i] = ZEROW;
+}
+
+static inline
+void clear_dirty_vars(WmcManager* wmc_manager) {
+  for(SddLiteral k=0; k<wmc_manager->dirty_count; k++) wmc_manager->dirty_vars[wmc_manager->dirty_list[k]] = 0;
+  wmc_manager->dirty_count = 0;
+}
+
+//computes the wmc of the node at location i from the wmcs of its children
+static inline
+SddWmc node_wmc_of_children(SddSize i, WmcManager* wmc_manager) {
+  int log_mode = wmc_manager->log_mode;
+  SddNode* n   = wmc_manager->nodes[i];
   
-  //compute true constants for used/unsused
-  cache_true_wmcs(ROOT(wmc_manager),wmc_manager);
+  if(n->type==FALSE)   return ZEROW;
+  if(n->type==TRUE)    return ONEW; //trick!
+  if(n->type==LITERAL) return wmc_literal_weight(LITERAL_OF(n),wmc_manager);
+  //decomposition
+  Vtree* left  = n->vtree->left;
+  Vtree* right = n->vtree->right;
+  SddWmc wmc = ZEROW;
+  FOR_each_prime_sub_location(prime,sub,p,s,i,wmc_manager,{
+    SddWmc prime_wmc = WMC(p,wmc_manager);
+    SddWmc sub_wmc   = WMC(s,wmc_manager);
+    if(!IS_ZEROW(prime_wmc) && !IS_ZEROW(sub_wmc)) {
+      //assuming gaps cannot be ZEROW
+      prime_wmc = wmc_of_missing(prime_wmc,left,prime->vtree,wmc_manager);
+      sub_wmc   = wmc_of_missing(sub_wmc,right,sub->vtree,wmc_manager);
+      assert(!IS_ZEROW(prime_wmc) && !IS_ZEROW(sub_wmc));
+      INC(wmc,MULT(prime_wmc,sub_wmc));
+    }
+  });
+  return wmc;
 }
 
+//wmc of the sdd over all variables, given the node wmcs
+static inline
+SddWmc root_wmc(WmcManager* wmc_manager) {
+  int log_mode  = wmc_manager->log_mode;
+  SddNode* node = wmc_manager->node;
+  Vtree* root   = ROOT(wmc_manager);
+  
+  //the following assumes that a trivial node is normalized for the vtree root
+  if(node->type==FALSE) return ZEROW;
+  if(node->type==TRUE) return UNUSED_TRUE_WMC(root,wmc_manager); //all variables are unused
+  //wmc of node over used variables (the root is the last sorted node) times wmc of true over unused variables
+  return MULT(WMC(wmc_manager->node_count-1,wmc_manager),UNUSED_TRUE_WMC(root,wmc_manager));
+}
 
 //NOTE: when node is trivial, we don't know the vtree for which the node is normalized
 //we assume that it is normalized for the vtree root (manager->vtree)
 SddWmc wmc_propagate(WmcManager* wmc_manager) {
   
+  //weights in a user buffer may have changed
+  sync_literal_weights(wmc_manager);
+  
+  if(wmc_manager->wmc_valid &&
+     wmc_manager->dirty_count*WMC_INCREMENTAL_RATIO<=VAR_COUNT(wmc_manager)) {
+    return wmc_propagate_incremental(wmc_manager);
+  }
+  
+  //compute true constants for used/unsused
+  cache_true_wmcs(ROOT(wmc_manager),wmc_manager);
+  clear_dirty_vars(wmc_manager);
+  
+  //compute weighted model counts
+  SddSize node_count = wmc_manager->node_count;
+  if(wmc_manager->node->type!=FALSE && wmc_manager->node->type!=TRUE) {
+    for(SddSize i=0; i<node_count; i++) { //visit children before parents
+      WMC(i,wmc_manager) = node_wmc_of_children(i,wmc_manager);
+    }
+  }
+  
+  wmc_manager->wmc_valid         = 1;
+  wmc_manager->derivatives_valid = 0;
+  return wmc_manager->wmc = root_wmc(wmc_manager);
+}
+
+//computes the derivatives of nodes and literals from the node wmcs (second pass)
+static
+void update_derivatives(WmcManager* wmc_manager) {
+  
   //set mode
-  log_mode        = wmc_manager->log_mode;
+  int log_mode    = wmc_manager->log_mode;
   SddNode* node   = wmc_manager->node; //root of sdd
   SddNode** nodes = wmc_manager->nodes; //sorted nodes of sdd
   Vtree* root     = ROOT(wmc_manager); 
   
   //INITIALIZE
-  initialize_wmc(wmc_manager);
+  initialize_derivatives(wmc_manager);
+  wmc_manager->derivatives_valid = 1;
   
   //the following assumes that a trivial node is normalized for the vtree root
-  if(node->type==FALSE) return wmc_manager->wmc = ZEROW; //all derivatives are ZEROW
+  if(node->type==FALSE) return; //all derivatives are ZEROW
   if(node->type==TRUE) { //all variables are unused
-    SddWmc wmc = UNUSED_TRUE_WMC(root,wmc_manager);
     update_derivatives_of_unused(ONEW,root,wmc_manager);
-    return wmc_manager->wmc = wmc;
-  }
-  
-  //FIRST PASS
-  
-  //compute weighted model counts
-  SddWmc wmc = ZEROW; //to avoid compiler warning
-  SddSize i  = wmc_manager->node_count;
-  
-  while(i--) { //visit children before parents
-    SddNode* n = *nodes++;
-    if(n->type==FALSE)        wmc = ZEROW;
-    else if(n->type==TRUE)    wmc = ONEW; //trick!
-    else if(n->type==LITERAL) wmc = wmc_literal_weight(LITERAL_OF(n),wmc_manager);
-    else { //decomposition
-      Vtree* left  = n->vtree->left;
-      Vtree* right = n->vtree->right;
-      wmc = ZEROW;
-	  FOR_each_prime_sub_of_node(prime,sub,n,{
-	    SddWmc prime_wmc = WMC(prime,wmc_manager);
-	    SddWmc sub_wmc   = WMC(sub,wmc_manager);
-	    if(!IS_ZEROW(prime_wmc) && !IS_ZEROW(sub_wmc)) {
-	      //assuming gaps cannot be ZEROW
-	      prime_wmc = wmc_of_missing(prime_wmc,left,prime->vtree,wmc_manager);
-	      sub_wmc   = wmc_of_missing(sub_wmc,right,sub->vtree,wmc_manager);
-	      assert(!IS_ZEROW(prime_wmc) && !IS_ZEROW(sub_wmc));
-	      INC(wmc,MULT(prime_wmc,sub_wmc));
-	    }
-	  });
-    }
-    //save weighted model count
-    WMC(n,wmc_manager) = wmc;
+    return;
   }
   
-  //wmc of node over used variables 
-  SddWmc node_wmc = WMC(node,wmc_manager);
+  SddSize node_count = wmc_manager->node_count;
+  //wmc of node over used variables (the root is the last sorted node)
+  SddWmc node_wmc = WMC(node_count-1,wmc_manager);
   //wmc of true over unused variables
   SddWmc unused_wmc = UNUSED_TRUE_WMC(root,wmc_manager);
-  //wmc of node over all variables
-  wmc = MULT(node_wmc,unused_wmc);
 
-  //SECOND PASS
-  
   //compute derivatives for unused variables (if any)
   update_derivatives_of_unused(node_wmc,root,wmc_manager);
   
   //compute derivatives for variables inside node->vtree
-  i = wmc_manager->node_count;
-  DRV(node,wmc_manager) = unused_wmc; //root of sdd
+  DRV(node_count-1,wmc_manager) = unused_wmc; //root of sdd
   
-  while(i--) { //visit parents before children
-    SddNode* n = *(--nodes);
-    SddWmc drv = DRV(n,wmc_manager);
+  for(SddSize i=node_count; i--; ) { //visit parents before children
+    SddNode* n = nodes[i];
+    SddWmc drv = DRV(i,wmc_manager);
     if(IS_ZEROW(drv)) continue; //no update for derivatives
     //ignoring true and false nodes
     //false nodes do not affect derivatives
@@ -264,17 +451,17 @@ SddWmc wmc_propagate(WmcManager* wmc_manager) {
     else if(n->type==DECOMPOSITION) { //propagate derivative downwards
       Vtree* left  = n->vtree->left;
       Vtree* right = n->vtree->right;
-	  FOR_each_prime_sub_of_node(prime,sub,n,{
-	    SddWmc prime_wmc     = WMC(prime,wmc_manager);
-	    SddWmc sub_wmc       = WMC(sub,wmc_manager);
+	  FOR_each_prime_sub_location(prime,sub,p,s,i,wmc_manager,{
+	    SddWmc prime_wmc     = WMC(p,wmc_manager);
+	    SddWmc sub_wmc       = WMC(s,wmc_manager);
 	    if(!IS_ZEROW(prime_wmc) || !IS_ZEROW(sub_wmc)) { //otherwise, no derivative update
 	      SddWmc prime_wmc_gap = wmc_of_missing(ONEW,left,prime->vtree,wmc_manager);
 	      SddWmc sub_wmc_gap   = wmc_of_missing(ONEW,right,sub->vtree,wmc_manager);
 	      assert(!IS_ZEROW(prime_wmc_gap) && !IS_ZEROW(sub_wmc_gap));
 	      SddWmc product = MULT(drv,MULT(prime_wmc_gap,sub_wmc_gap));
 	      assert(!IS_ZEROW(product));
-	      if(!IS_ZEROW(prime_wmc)) INC_NODE_DRV(sub,MULT(prime_wmc,product),wmc_manager);
-	      if(!IS_ZEROW(sub_wmc))   INC_NODE_DRV(prime,MULT(sub_wmc,product),wmc_manager);
+	      if(!IS_ZEROW(prime_wmc)) INC_NODE_DRV(s,MULT(prime_wmc,product),wmc_manager);
+	      if(!IS_ZEROW(sub_wmc))   INC_NODE_DRV(p,MULT(sub_wmc,product),wmc_manager);
 	      if(!IS_ZEROW(prime_wmc) && !IS_ZEROW(sub_wmc)) {
 	        product = MULT(drv,MULT(prime_wmc,sub_wmc));
 	        assert(!IS_ZEROW(product));
@@ -285,10 +472,476 @@ SddWmc wmc_propagate(WmcManager* wmc_manager) {
 	  });
     }
   }
+}
+
+//creates the parents of nodes, the nodes of vtree nodes and the locations of literal nodes
+static
+void initialize_incremental(WmcManager* wmc_manager) {
+  SddSize node_count    = wmc_manager->node_count;
+  SddNode** nodes       = wmc_manager->nodes;
+  SddSize element_count = wmc_manager->element_offsets[node_count];
+  SddLiteral var_count  = VAR_COUNT(wmc_manager);
+  SddLiteral vtree_count = 2*var_count-1;
+  
+  SddSize* fill;
+  CALLOC(fill,SddSize,node_count,"initialize_incremental");
+  
+  //parents: primes and subs of the elements
+  SddSize* parent_offsets;
+  SddSize* parent_indices;
+  CALLOC(parent_offsets,SddSize,node_count+1,"initialize_incremental");
+  CALLOC(parent_indices,SddSize,2*element_count,"initialize_incremental");
+  for(SddSize e=0; e<element_count; e++) {
+    parent_offsets[wmc_manager->prime_indices[e]+1]++;
+    parent_offsets[wmc_manager->sub_indices[e]+1]++;
+  }
+  for(SddSize i=0; i<node_count; i++) parent_offsets[i+1] += parent_offsets[i];
+  for(SddSize i=0; i<node_count; i++) {
+    for(SddSize e=wmc_manager->element_offsets[i]; e<wmc_manager->element_offsets[i+1]; e++) {
+      SddSize p = wmc_manager->prime_indices[e];
+      SddSize s = wmc_manager->sub_indices[e];
+      parent_indices[parent_offsets[p]+fill[p]++] = i;
+      parent_indices[parent_offsets[s]+fill[s]++] = i;
+    }
+  }
+  free(fill);
+  
+  //decomposition nodes grouped by the position of their vtree
+  SddSize* vtree_offsets;
+  SddSize* vtree_indices;
+  CALLOC(vtree_offsets,SddSize,vtree_count+1,"initialize_incremental");
+  CALLOC(vtree_indices,SddSize,node_count,"initialize_incremental");
+  for(SddSize i=0; i<node_count; i++) {
+    if(IS_DECOMPOSITION(nodes[i])) vtree_offsets[nodes[i]->vtree->position+1]++;
+  }
+  for(SddLiteral v=0; v<vtree_count; v++) vtree_offsets[v+1] += vtree_offsets[v];
+  CALLOC(fill,SddSize,vtree_count+1,"initialize_incremental");
+  for(SddSize i=0; i<node_count; i++) {
+    if(IS_DECOMPOSITION(nodes[i])) {
+      SddLiteral v = nodes[i]->vtree->position;
+      vtree_indices[vtree_offsets[v]+fill[v]++] = i;
+    }
+  }
+  free(fill);
+  
+  //literal nodes
+  SddSize* literal_indices;
+  CALLOC(literal_indices,SddSize,2*var_count+1,"initialize_incremental");
+  literal_indices += var_count;
+  for(SddLiteral i=1; i<=var_count; i++) literal_indices[i] = literal_indices[-i] = node_count;
+  for(SddSize i=0; i<node_count; i++) {
+    if(IS_LITERAL(nodes[i])) literal_indices[LITERAL_OF(nodes[i])] = i;
+  }
+  
+  wmc_manager->parent_offsets  = parent_offsets;
+  wmc_manager->parent_indices  = parent_indices;
+  wmc_manager->vtree_offsets   = vtree_offsets;
+  wmc_manager->vtree_indices   = vtree_indices;
+  wmc_manager->literal_indices = literal_indices;
+  CALLOC(wmc_manager->queue,SddSize,node_count,"initialize_incremental");
+  CALLOC(wmc_manager->queued,char,node_count,"initialize_incremental");
+}
+
+//adds the node at location i to the queue (a min-heap, so children are recomputed before parents)
+static inline
+void queue_push(SddSize i, SddSize* size, WmcManager* wmc_manager) {
+  if(wmc_manager->queued[i]) return;
+  wmc_manager->queued[i] = 1;
+  SddSize* queue = wmc_manager->queue;
+  SddSize k = (*size)++;
+  while(k>0 && queue[(k-1)/2]>i) {
+    queue[k] = queue[(k-1)/2];
+    k = (k-1)/2;
+  }
+  queue[k] = i;
+}
+
+//removes and returns the smallest location in the queue
+static inline
+SddSize queue_pop(SddSize* size, WmcManager* wmc_manager) {
+  SddSize* queue = wmc_manager->queue;
+  SddSize top    = queue[0];
+  SddSize last   = queue[--(*size)];
+  SddSize k      = 0;
+  while(2*k+1<*size) {
+    SddSize c = 2*k+1;
+    if(c+1<*size && queue[c+1]<queue[c]) c++;
+    if(queue[c]>=last) break;
+    queue[k] = queue[c];
+    k = c;
+  }
+  queue[k] = last;
+  wmc_manager->queued[top] = 0;
+  return top;
+}
+
+//returns 1 if the variable of leaf is in the gap of an element of the node at location i:
+//a used variable of vtree->left not in prime->vtree, or of vtree->right not in sub->vtree
+static
+int var_in_gap(Vtree* leaf, SddSize i, WmcManager* wmc_manager) {
+  SddNode* n  = wmc_manager->nodes[i];
+  int in_left = sdd_vtree_is_sub(leaf,n->vtree->left);
+  FOR_each_prime_sub_location(prime,sub,p,s,i,wmc_manager,{
+    if(in_left) {
+      if(!sdd_vtree_is_sub(leaf,prime->vtree)) return 1;
+    }
+    else if(!IS_FALSE(sub) && (IS_TRUE(sub) || !sdd_vtree_is_sub(leaf,sub->vtree))) return 1;
+  });
+  return 0;
+}
+
+//propagation that only recomputes the nodes affected by the dirty variables
+static
+SddWmc wmc_propagate_incremental(WmcManager* wmc_manager) {
+  int log_mode = wmc_manager->log_mode;
+  if(wmc_manager->dirty_count==0) return wmc_manager->wmc;
+  if(wmc_manager->parent_offsets==NULL) initialize_incremental(wmc_manager);
+  
+  SddSize node_count = wmc_manager->node_count;
+  SddSize queue_size = 0;
+  
+  for(SddLiteral k=0; k<wmc_manager->dirty_count; k++) {
+    SddLiteral var = wmc_manager->dirty_list[k];
+    Vtree* leaf    = sdd_manager_vtree_of_var(var,wmc_manager->sdd_manager);
+    
+    //update the true constants on the path to the vtree root
+    SddWmc old_wmc = USED_TRUE_WMC(leaf,wmc_manager);
+    cache_true_wmcs_of_leaf(leaf,wmc_manager);
+    for(Vtree* v=leaf->parent; v!=NULL; v=v->parent) {
+      USED_TRUE_WMC(v,wmc_manager)   = MULT(USED_TRUE_WMC(v->left,wmc_manager),USED_TRUE_WMC(v->right,wmc_manager));
+      UNUSED_TRUE_WMC(v,wmc_manager) = MULT(UNUSED_TRUE_WMC(v->left,wmc_manager),UNUSED_TRUE_WMC(v->right,wmc_manager));
+    }
+    if(!ALL_VARS_IN_SDD(leaf,wmc_manager)) continue; //unused variable: only affects the root
+    
+    SddSize i = wmc_manager->literal_indices[var];
+    if(i<node_count) queue_push(i,&queue_size,wmc_manager);
+    i = wmc_manager->literal_indices[-var];
+    if(i<node_count) queue_push(i,&queue_size,wmc_manager);
+    
+    if(USED_TRUE_WMC(leaf,wmc_manager)!=old_wmc) {
+      //nodes with the variable in a gap are normalized for vtree ancestors of the variable
+      for(Vtree* v=leaf->parent; v!=NULL; v=v->parent) {
+        for(SddSize j=wmc_manager->vtree_offsets[v->position]; j<wmc_manager->vtree_offsets[v->position+1]; j++) {
+          i = wmc_manager->vtree_indices[j];
+          if(!wmc_manager->queued[i] && var_in_gap(leaf,i,wmc_manager)) queue_push(i,&queue_size,wmc_manager);
+        }
+      }
+    }
+  }
+  clear_dirty_vars(wmc_manager);
+  
+  while(queue_size>0) { //visit children before parents
+    SddSize i  = queue_pop(&queue_size,wmc_manager);
+    SddWmc wmc = node_wmc_of_children(i,wmc_manager);
+    if(wmc==WMC(i,wmc_manager)) continue; //parents are not affected
+    WMC(i,wmc_manager) = wmc;
+    for(SddSize j=wmc_manager->parent_offsets[i]; j<wmc_manager->parent_offsets[i+1]; j++) {
+      queue_push(wmc_manager->parent_indices[j],&queue_size,wmc_manager);
+    }
+  }
   
-  return wmc_manager->wmc = wmc;
+  wmc_manager->derivatives_valid = 0;
+  return wmc_manager->wmc = root_wmc(wmc_manager);
+}
+
+
+/****************************************************************************************
+ * computing weighted model counts for a batch of literal weights
+ *
+ * weights is a row-major matrix with query_count rows, each row holding the weights of
+ * the literals -k,...,-1,1,...,k where k is weights_var_count (k <= var count); literals
+ * of variables larger than k keep the weights that are set in the wmc manager
+ *
+ * queries are propagated in blocks of block_size: for each block, node wmcs are stored
+ * node-major (all queries of a node are contiguous) so the sdd is visited only once per
+ * block; when block_size is 0, it is chosen based on WMC_BATCH_BUFFER_SIZE
+ *
+ * the wmc of query i is stored in wmcs[i]; node wmcs, derivatives and the wmc of the
+ * manager are not changed
+ ****************************************************************************************/
+
+//weight of a literal for a query (row of the weights matrix)
+#define BATCH_LITERAL_WEIGHT(l,r,k,m) (labs(l)>(k)? LIT_WEIGHT(l,m): ((l)<0? (r)[(k)+(l)]: (r)[(k)+(l)-1]))
+
+void wmc_propagate_batch(const SddWmc* weights, SddLiteral weights_var_count, SddSize query_count,
+                         SddSize block_size, SddWmc* wmcs, WmcManager* wmc_manager) {
+
+  //set mode
+  int log_mode        = wmc_manager->log_mode;
+  SddNode* node       = wmc_manager->node; //root of sdd
+  SddNode** nodes     = wmc_manager->nodes; //sorted nodes of sdd
+  SddSize node_count  = wmc_manager->node_count;
+  Vtree* root         = ROOT(wmc_manager);
+  SddLiteral k        = weights_var_count;
+  SddSize row_size    = 2*k;
+
+  if(query_count==0) return;
+  if(block_size==0) {
+    block_size = WMC_BATCH_BUFFER_SIZE/(node_count==0? 1: node_count);
+    if(block_size>WMC_BATCH_MAX_BLOCK_SIZE) block_size = WMC_BATCH_MAX_BLOCK_SIZE;
+  }
+  if(block_size<1) block_size = 1;
+  if(block_size>query_count) block_size = query_count;
+
+  SddLiteral vtree_count = 2*VAR_COUNT(wmc_manager) -1;
+  SddWmc* used_wmcs;
+  SddWmc* unused_wmcs;
+  SddWmc* node_wmcs;
+  CALLOC(used_wmcs,SddWmc,vtree_count*block_size,"wmc_propagate_batch");
+  CALLOC(unused_wmcs,SddWmc,vtree_count*block_size,"wmc_propagate_batch");
+  CALLOC(node_wmcs,SddWmc,node_count*block_size,"wmc_propagate_batch");
+
+  for(SddSize start=0; start<query_count; start += block_size) {
+    SddSize b = query_count-start < block_size? query_count-start: block_size;
+    const SddWmc* block_weights = weights+start*row_size;
+    SddWmc* block_wmcs = wmcs+start;
+
+    //compute true constants for used/unsused
+    cache_true_wmcs_batch(root,block_weights,k,b,used_wmcs,unused_wmcs,wmc_manager);
+
+    //the following assumes that a trivial node is normalized for the vtree root
+    if(node->type==FALSE) {
+      for(SddSize j=0; j<b; j++) block_wmcs[j] = ZEROW;
+      continue;
+    }
+    if(node->type==TRUE) { //all variables are unused
+      for(SddSize j=0; j<b; j++) block_wmcs[j] = unused_wmcs[root->position*b+j];
+      continue;
+    }
+
+    for(SddSize i=0; i<node_count; i++) { //visit children before parents
+      SddNode* n = nodes[i];
+      SddWmc* wmc = node_wmcs+i*b;
+      if(n->type==FALSE)        for(SddSize j=0; j<b; j++) wmc[j] = ZEROW;
+      else if(n->type==TRUE)    for(SddSize j=0; j<b; j++) wmc[j] = ONEW; //trick!
+      else if(n->type==LITERAL) {
+        SddLiteral lit = LITERAL_OF(n);
+        for(SddSize j=0; j<b; j++) wmc[j] = BATCH_LITERAL_WEIGHT(lit,block_weights+j*row_size,k,wmc_manager);
+      }
+      else { //decomposition
+        Vtree* left  = n->vtree->left;
+        Vtree* right = n->vtree->right;
+        for(SddSize j=0; j<b; j++) wmc[j] = ZEROW;
+        FOR_each_prime_sub_location(prime,sub,p,s,i,wmc_manager,{
+          SddWmc* prime_wmcs       = node_wmcs+p*b;
+          SddWmc* sub_wmcs         = node_wmcs+s*b;
+          SddWmc* left_used        = used_wmcs+left->position*b;
+          SddWmc* right_used       = used_wmcs+right->position*b;
+          SddWmc* prime_vtree_used = prime->vtree==NULL? NULL: used_wmcs+prime->vtree->position*b;
+          SddWmc* sub_vtree_used   = sub->vtree==NULL? NULL: used_wmcs+sub->vtree->position*b;
+          for(SddSize j=0; j<b; j++) {
+            SddWmc prime_wmc = prime_wmcs[j];
+            SddWmc sub_wmc   = sub_wmcs[j];
+            if(!IS_ZEROW(prime_wmc) && !IS_ZEROW(sub_wmc)) {
+              //same as wmc_of_missing
+              prime_wmc = MULT(prime_wmc,left_used[j]);
+              if(prime_vtree_used!=NULL) prime_wmc = DIV(prime_wmc,prime_vtree_used[j]);
+              sub_wmc = MULT(sub_wmc,right_used[j]);
+              if(sub_vtree_used!=NULL) sub_wmc = DIV(sub_wmc,sub_vtree_used[j]);
+              INC(wmc[j],MULT(prime_wmc,sub_wmc));
+            }
+          }
+        });
+      }
+    }
+
+    //wmc of node over all variables
+    SddWmc* node_wmc   = node_wmcs+(node_count-1)*b;
+    SddWmc* unused_wmc = unused_wmcs+root->position*b;
+    for(SddSize j=0; j<b; j++) block_wmcs[j] = MULT(node_wmc[j],unused_wmc[j]);
+  }
+
+  free(used_wmcs);
+  free(unused_wmcs);
+  free(node_wmcs);
+}
+
+/****************************************************************************************
+ * most probable explanation (mpe) for a batch of literal weights
+ *
+ * the mpe is the model with the largest weight, it is computed by a max-product pass
+ * (visiting children before parents) followed by a backtracking pass from the root that
+ * selects the best element of every decision node on the way
+ *
+ * weights and blocks are as for wmc_propagate_batch; when weights is NULL, there is one
+ * query which uses the literal weights set in the wmc manager
+ *
+ * the mpe is over all variables of the manager: a missing variable takes the literal with
+ * the largest weight (ties go to the positive literal); gaps are computed without division,
+ * so literal weights can be zero
+ *
+ * the weight of the mpe of query i is stored in mpes[i], and assignments[i*var_count+v-1]
+ * is 1 if variable v is true in the mpe and 0 otherwise (or -1 if there is no model)
+ ****************************************************************************************/
+
+//max-product of true over the variables in vtree, but not in sub-vtree (could be NULL)
+//(true_mpes points to the value of the query for vtree position 0, with a stride of block_size)
+static inline
+SddWmc mpe_of_missing(SddWmc mpe, Vtree* vtree, Vtree* sub_vtree, const SddWmc* true_mpes, SddSize block_size,
+                      int log_mode) {
+  if(sub_vtree==NULL) return MULT(mpe,true_mpes[vtree->position*block_size]);
+  while(sub_vtree!=vtree) {
+    Vtree* parent  = sub_vtree->parent;
+    Vtree* sibling = parent->left==sub_vtree? parent->right: parent->left;
+    mpe = MULT(mpe,true_mpes[sibling->position*block_size]);
+    sub_vtree = parent;
+  }
+  return mpe;
+}
+
+//sets the variables in vtree to the literal with the largest weight
+static
+void mpe_assign_vtree(Vtree* vtree, const SddWmc* row, SddLiteral k, signed char* assignment, WmcManager* wmc_manager) {
+  FOR_each_leaf_vtree_node(v,vtree,{
+    SddLiteral var = v->var;
+    SddWmc pw = BATCH_LITERAL_WEIGHT(var,row,k,wmc_manager);
+    SddWmc nw = BATCH_LITERAL_WEIGHT(-var,row,k,wmc_manager);
+    assignment[var-1] = pw<nw? 0: 1;
+  });
 }
 
+//sets the variables in vtree, but not in sub-vtree (could be NULL), to the literal with the largest weight
+static
+void mpe_assign_missing(Vtree* vtree, Vtree* sub_vtree, const SddWmc* row, SddLiteral k, signed char* assignment,
+                        WmcManager* wmc_manager) {
+  if(sub_vtree==NULL) {
+    mpe_assign_vtree(vtree,row,k,assignment,wmc_manager);
+    return;
+  }
+  while(sub_vtree!=vtree) {
+    Vtree* parent  = sub_vtree->parent;
+    Vtree* sibling = parent->left==sub_vtree? parent->right: parent->left;
+    mpe_assign_vtree(sibling,row,k,assignment,wmc_manager);
+    sub_vtree = parent;
+  }
+}
+
+void wmc_mpe_batch(const SddWmc* weights, SddLiteral weights_var_count, SddSize query_count,
+                   SddWmc* mpes, signed char* assignments, WmcManager* wmc_manager) {
+
+  //set mode
+  int log_mode         = wmc_manager->log_mode;
+  SddNode* node        = wmc_manager->node; //root of sdd
+  SddNode** nodes      = wmc_manager->nodes; //sorted nodes of sdd
+  SddSize node_count   = wmc_manager->node_count;
+  Vtree* root          = ROOT(wmc_manager);
+  SddLiteral var_count = VAR_COUNT(wmc_manager);
+  SddLiteral k         = weights==NULL? 0: weights_var_count;
+  SddSize row_size     = 2*k;
+
+  if(query_count==0) return;
+  SddSize block_size = WMC_BATCH_BUFFER_SIZE/(node_count==0? 1: node_count);
+  if(block_size>WMC_BATCH_MAX_BLOCK_SIZE) block_size = WMC_BATCH_MAX_BLOCK_SIZE;
+  if(block_size<1) block_size = 1;
+  if(block_size>query_count) block_size = query_count;
+
+  SddLiteral vtree_count = 2*var_count -1;
+  SddWmc* true_mpes;
+  SddWmc* node_mpes;
+  SddSize* stack; //nodes to visit while backtracking (the selected nodes have disjoint vtrees)
+  CALLOC(true_mpes,SddWmc,vtree_count*block_size,"wmc_mpe_batch");
+  CALLOC(node_mpes,SddWmc,node_count*block_size,"wmc_mpe_batch");
+  CALLOC(stack,SddSize,node_count,"wmc_mpe_batch");
+
+  for(SddSize start=0; start<query_count; start += block_size) {
+    SddSize b = query_count-start < block_size? query_count-start: block_size;
+    const SddWmc* block_weights = weights==NULL? NULL: weights+start*row_size;
+
+    //max-product of true for every vtree node
+    cache_true_mpes_batch(root,block_weights,k,b,true_mpes,wmc_manager);
+
+    //FIRST PASS (also for trivial nodes, which are normalized for the vtree root)
+    for(SddSize i=0; i<node_count; i++) { //visit children before parents
+      SddNode* n = nodes[i];
+      SddWmc* mpe = node_mpes+i*b;
+      if(n->type==FALSE)        for(SddSize j=0; j<b; j++) mpe[j] = ZEROW;
+      else if(n->type==TRUE)    for(SddSize j=0; j<b; j++) mpe[j] = ONEW; //gaps are added by the parent
+      else if(n->type==LITERAL) {
+        SddLiteral lit = LITERAL_OF(n);
+        for(SddSize j=0; j<b; j++) {
+          const SddWmc* row = block_weights==NULL? NULL: block_weights+j*row_size;
+          mpe[j] = BATCH_LITERAL_WEIGHT(lit,row,k,wmc_manager);
+        }
+      }
+      else { //decomposition
+        Vtree* left  = n->vtree->left;
+        Vtree* right = n->vtree->right;
+        for(SddSize j=0; j<b; j++) mpe[j] = ZEROW;
+        FOR_each_prime_sub_location(prime,sub,p,s,i,wmc_manager,{
+          for(SddSize j=0; j<b; j++) {
+            SddWmc prime_mpe = node_mpes[p*b+j];
+            SddWmc sub_mpe   = node_mpes[s*b+j];
+            if(!IS_ZEROW(prime_mpe) && !IS_ZEROW(sub_mpe)) {
+              prime_mpe = mpe_of_missing(prime_mpe,left,prime->vtree,true_mpes+j,b,log_mode);
+              sub_mpe   = mpe_of_missing(sub_mpe,right,sub->vtree,true_mpes+j,b,log_mode);
+              mpe[j]    = MAXW(mpe[j],MULT(prime_mpe,sub_mpe));
+            }
+          }
+        });
+      }
+    }
+
+    //SECOND PASS
+    for(SddSize j=0; j<b; j++) {
+      const SddWmc* row = block_weights==NULL? NULL: block_weights+j*row_size;
+      signed char* assignment = assignments+(start+j)*var_count;
+      SddWmc mpe = node_mpes[(node_count-1)*b+j];
+      if(!IS_ZEROW(mpe)) mpe = mpe_of_missing(mpe,root,node->vtree,true_mpes+j,b,log_mode);
+      mpes[start+j] = mpe;
+      if(IS_ZEROW(mpe)) { //no model
+        for(SddLiteral v=0; v<var_count; v++) assignment[v] = -1;
+        continue;
+      }
+      mpe_assign_missing(root,node->vtree,row,k,assignment,wmc_manager);
+      SddSize top = 0;
+      stack[top++] = node_count-1;
+      while(top>0) { //visit parents before children
+        SddSize i  = stack[--top];
+        SddNode* n = nodes[i];
+        if(n->type==LITERAL) {
+          SddLiteral lit = LITERAL_OF(n);
+          assignment[labs(lit)-1] = lit>0? 1: 0;
+        }
+        else if(n->type==DECOMPOSITION) { //select the best element
+          Vtree* left  = n->vtree->left;
+          Vtree* right = n->vtree->right;
+          SddWmc best  = ZEROW;
+          SddSize best_p = 0, best_s = 0;
+          FOR_each_prime_sub_location(prime,sub,p,s,i,wmc_manager,{
+            SddWmc prime_mpe = node_mpes[p*b+j];
+            SddWmc sub_mpe   = node_mpes[s*b+j];
+            if(!IS_ZEROW(prime_mpe) && !IS_ZEROW(sub_mpe)) {
+              prime_mpe = mpe_of_missing(prime_mpe,left,prime->vtree,true_mpes+j,b,log_mode);
+              sub_mpe   = mpe_of_missing(sub_mpe,right,sub->vtree,true_mpes+j,b,log_mode);
+              SddWmc value = MULT(prime_mpe,sub_mpe);
+              if(IS_ZEROW(best) || best<value) {
+                best   = value;
+                best_p = p;
+                best_s = s;
+              }
+            }
+          });
+          mpe_assign_missing(left,nodes[best_p]->vtree,row,k,assignment,wmc_manager);
+          mpe_assign_missing(right,nodes[best_s]->vtree,row,k,assignment,wmc_manager);
+          stack[top++] = best_s;
+          stack[top++] = best_p;
+        }
+        //true nodes have no variables (gaps are assigned by the parent)
+      }
+    }
+  }
+
+  free(true_mpes);
+  free(node_mpes);
+  free(stack);
+}
+
+//mpe for the literal weights set in the wmc manager, assignment has one entry per variable
+SddWmc wmc_mpe(signed char* assignment, WmcManager* wmc_manager) {
+  SddWmc mpe;
+  wmc_mpe_batch(NULL,0,1,&mpe,assignment,wmc_manager);
+  return mpe;
+}
 
 /****************************************************************************************
  * computing (and caching) wmc of true over used and unused variables
@@ -299,22 +952,27 @@ SddWmc wmc_propagate(WmcManager* wmc_manager) {
  ****************************************************************************************/
 
 static
-void cache_true_wmcs(Vtree* vtree, WmcManager* wmc_manager) {
-  if(LEAF(vtree)) {
-    SddLiteral var = vtree->var;
-    SddWmc pw = wmc_literal_weight(var,wmc_manager);
-    SddWmc nw = wmc_literal_weight(-var,wmc_manager);
-    SddWmc sum = ADD(pw,nw);
-    assert(!IS_ZEROW(sum)); 
-    if(vtree->all_vars_in_sdd) { //used var
-      USED_TRUE_WMC(vtree,wmc_manager)   = sum; 
-      UNUSED_TRUE_WMC(vtree,wmc_manager) = ONEW;
-    }
-    else { //unused var
-      USED_TRUE_WMC(vtree,wmc_manager)   = ONEW;
-      UNUSED_TRUE_WMC(vtree,wmc_manager) = sum; 
-    }
+void cache_true_wmcs_of_leaf(Vtree* leaf, WmcManager* wmc_manager) {
+  int log_mode = wmc_manager->log_mode;
+  SddLiteral var = leaf->var;
+  SddWmc pw = wmc_literal_weight(var,wmc_manager);
+  SddWmc nw = wmc_literal_weight(-var,wmc_manager);
+  SddWmc sum = ADD(pw,nw);
+  assert(!IS_ZEROW(sum)); 
+  if(ALL_VARS_IN_SDD(leaf,wmc_manager)) { //used var
+    USED_TRUE_WMC(leaf,wmc_manager)   = sum; 
+    UNUSED_TRUE_WMC(leaf,wmc_manager) = ONEW;
+  }
+  else { //unused var
+    USED_TRUE_WMC(leaf,wmc_manager)   = ONEW;
+    UNUSED_TRUE_WMC(leaf,wmc_manager) = sum; 
   }
+}
+
+static
+void cache_true_wmcs(Vtree* vtree, WmcManager* wmc_manager) {
+  int log_mode = wmc_manager->log_mode;
+  if(LEAF(vtree)) cache_true_wmcs_of_leaf(vtree,wmc_manager);
   else {
     cache_true_wmcs(vtree->left,wmc_manager);
     cache_true_wmcs(vtree->right,wmc_manager);
@@ -329,6 +987,71 @@ void cache_true_wmcs(Vtree* vtree, WmcManager* wmc_manager) {
   }
 }
 
+//same as cache_true_wmcs, for a block of queries (wmcs of vtree v are at v->position*block_size)
+static
+void cache_true_wmcs_batch(Vtree* vtree, const SddWmc* weights, SddLiteral weights_var_count,
+                           SddSize block_size, SddWmc* used_wmcs, SddWmc* unused_wmcs,
+                           WmcManager* wmc_manager) {
+  int log_mode   = wmc_manager->log_mode;
+  SddWmc* used   = used_wmcs+vtree->position*block_size;
+  SddWmc* unused = unused_wmcs+vtree->position*block_size;
+  if(LEAF(vtree)) {
+    SddLiteral var = vtree->var;
+    for(SddSize j=0; j<block_size; j++) {
+      const SddWmc* row = weights+j*2*weights_var_count;
+      SddWmc pw = BATCH_LITERAL_WEIGHT(var,row,weights_var_count,wmc_manager);
+      SddWmc nw = BATCH_LITERAL_WEIGHT(-var,row,weights_var_count,wmc_manager);
+      SddWmc sum = ADD(pw,nw);
+      if(ALL_VARS_IN_SDD(vtree,wmc_manager)) { //used var
+        used[j]   = sum;
+        unused[j] = ONEW;
+      }
+      else { //unused var
+        used[j]   = ONEW;
+        unused[j] = sum;
+      }
+    }
+  }
+  else {
+    cache_true_wmcs_batch(vtree->left,weights,weights_var_count,block_size,used_wmcs,unused_wmcs,wmc_manager);
+    cache_true_wmcs_batch(vtree->right,weights,weights_var_count,block_size,used_wmcs,unused_wmcs,wmc_manager);
+
+    SddWmc* l_used   = used_wmcs+vtree->left->position*block_size;
+    SddWmc* r_used   = used_wmcs+vtree->right->position*block_size;
+    SddWmc* l_unused = unused_wmcs+vtree->left->position*block_size;
+    SddWmc* r_unused = unused_wmcs+vtree->right->position*block_size;
+    for(SddSize j=0; j<block_size; j++) {
+      used[j]   = MULT(l_used[j],r_used[j]);
+      unused[j] = MULT(l_unused[j],r_unused[j]);
+    }
+  }
+}
+
+//max-product of true over all variables of vtree, for a block of queries (see cache_true_wmcs_batch)
+static
+void cache_true_mpes_batch(Vtree* vtree, const SddWmc* weights, SddLiteral weights_var_count,
+                           SddSize block_size, SddWmc* true_mpes, WmcManager* wmc_manager) {
+  int log_mode = wmc_manager->log_mode;
+  SddWmc* mpe  = true_mpes+vtree->position*block_size;
+  if(LEAF(vtree)) {
+    SddLiteral var = vtree->var;
+    for(SddSize j=0; j<block_size; j++) {
+      const SddWmc* row = weights==NULL? NULL: weights+j*2*weights_var_count;
+      SddWmc pw = BATCH_LITERAL_WEIGHT(var,row,weights_var_count,wmc_manager);
+      SddWmc nw = BATCH_LITERAL_WEIGHT(-var,row,weights_var_count,wmc_manager);
+      mpe[j] = MAXW(pw,nw);
+    }
+  }
+  else {
+    cache_true_mpes_batch(vtree->left,weights,weights_var_count,block_size,true_mpes,wmc_manager);
+    cache_true_mpes_batch(vtree->right,weights,weights_var_count,block_size,true_mpes,wmc_manager);
+
+    SddWmc* l = true_mpes+vtree->left->position*block_size;
+    SddWmc* r = true_mpes+vtree->right->position*block_size;
+    for(SddSize j=0; j<block_size; j++) mpe[j] = MULT(l[j],r[j]);
+  }
+}
+
 /****************************************************************************************
  * computing wmc of true over used variables in vtree, but not in sub-vtree (could be NULL)
  *
@@ -341,6 +1064,7 @@ void cache_true_wmcs(Vtree* vtree, WmcManager* wmc_manager) {
  
 static
 SddWmc wmc_of_missing(SddWmc wmc, Vtree* vtree, Vtree* sub_vtree, WmcManager* wmc_manager) {
+  int log_mode = wmc_manager->log_mode;
   assert(!IS_ZEROW(wmc));
   
   wmc = MULT(wmc,USED_TRUE_WMC(vtree,wmc_manager));
@@ -364,9 +1088,10 @@ SddWmc wmc_of_missing(SddWmc wmc, Vtree* vtree, Vtree* sub_vtree, WmcManager* wm
 //update the derivates of all USED variables in vtree, but not in sub_vtree (could be NULL)
 static
 void update_derivatives_of_missing(SddWmc drv_wmc, Vtree* vtree, Vtree* sub_vtree, WmcManager* wmc_manager) {
+  int log_mode = wmc_manager->log_mode;
   assert(!IS_ZEROW(drv_wmc));
   
-  if(vtree==sub_vtree || vtree->no_var_in_sdd) return;
+  if(vtree==sub_vtree || NO_VAR_IN_SDD(vtree,wmc_manager)) return;
   else if(LEAF(vtree)) {
     SddLiteral var = vtree->var; //must be used
     INC_LIT_DRV(var,drv_wmc,wmc_manager);
@@ -390,9 +1115,10 @@ void update_derivatives_of_missing(SddWmc drv_wmc, Vtree* vtree, Vtree* sub_vtre
 //update the derivates of all UNUSED variables in vtree
 static
 void update_derivatives_of_unused(SddWmc drv_wmc, Vtree* vtree, WmcManager* wmc_manager) {
+  int log_mode = wmc_manager->log_mode;
   assert(!IS_ZEROW(drv_wmc));
   
-  if(vtree->all_vars_in_sdd==0) {
+  if(ALL_VARS_IN_SDD(vtree,wmc_manager)==0) {
     if(LEAF(vtree)) {
       SddLiteral var = vtree->var; //must be unused
       INC_LIT_DRV(var,drv_wmc,wmc_manager);
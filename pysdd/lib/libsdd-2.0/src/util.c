@@ -6,6 +6,7 @@
  ****************************************************************************************/
 
 #include <signal.h>
+#include <stdarg.h>
 #include "sdd.h"
 
 
@@ -253,3 +254,69 @@ char* filter_comments(const char* buffer) {
 /****************************************************************************************
  * end
  ****************************************************************************************/
+
+/****************************************************************************************
+ * writers: output to a file or to a callback
+ ****************************************************************************************/
+
+#define WRITER_BUFFER_SIZE 65536
+
+void init_file_writer(FILE* file, SddWriter* writer) {
+  writer->file     = file;
+  writer->write    = NULL;
+  writer->context  = NULL;
+  writer->buffer   = NULL;
+  writer->length   = 0;
+  writer->capacity = 0;
+}
+
+void init_callback_writer(SddWriteFunc* write, void* context, SddWriter* writer) {
+  writer->file     = NULL;
+  writer->write    = write;
+  writer->context  = context;
+  writer->length   = 0;
+  writer->capacity = WRITER_BUFFER_SIZE;
+  CALLOC(writer->buffer,char,writer->capacity,"init_callback_writer");
+}
+
+//passes the buffered output to the callback
+void writer_flush(SddWriter* writer) {
+  if(writer->file!=NULL) fflush(writer->file);
+  else if(writer->length>0) {
+    writer->write(writer->context,writer->buffer,writer->length);
+    writer->length = 0;
+  }
+}
+
+//flushes the writer and frees its buffer (a file is not closed)
+void free_writer(SddWriter* writer) {
+  writer_flush(writer);
+  free(writer->buffer);
+  writer->buffer   = NULL;
+  writer->capacity = 0;
+}
+
+void writer_printf(SddWriter* writer, const char* format, ...) {
+  va_list args;
+  va_start(args,format);
+  if(writer->file!=NULL) {
+    vfprintf(writer->file,format,args);
+    va_end(args);
+    return;
+  }
+  int count = vsnprintf(writer->buffer+writer->length,writer->capacity-writer->length,format,args);
+  va_end(args);
+  if(count<0) return;
+  if((size_t)count>=writer->capacity-writer->length) {
+    //output did not fit: flush the buffer (and grow it if needed) and print again
+    writer_flush(writer);
+    if((size_t)count>=writer->capacity) {
+      writer->capacity = count+1;
+      REALLOC(writer->buffer,char,writer->capacity,"writer_printf");
+    }
+    va_start(args,format);
+    vsnprintf(writer->buffer,writer->capacity,format,args);
+    va_end(args);
+  }
+  writer->length += count;
+}
@@ -24,6 +24,10 @@
  *   limits the growth of memory used by the manager's sdd (memory of nodes and elements)
  *   applicable to vtree operations
  *
+ * --stop function:
+ *   a condition of the caller (e.g. a timeout or cancellation), checked with the time limits
+ *   aborts vtree search
+ *
  * vtree search calls fragment search, which calls vtree operations, which call apply;
  * any of these four stages can be subjected to limits
  *
@@ -156,6 +160,12 @@ int exceeded_limits(SddManager* manager) {
     ++manager->auto_search_invocation_count_aborted_search;
     manager->vtree_ops.search_aborted = 1;
   }
+  else if(manager->vtree_ops.search_stop_function && manager->vtree_ops.search_time_stamp &&
+          (*manager->vtree_ops.search_stop_function)(manager,manager->vtree_ops.search_stop_data)) {
+    //stop condition of the caller: abort the whole search (not counted as a time out)
+    ++manager->auto_search_invocation_count_aborted_search;
+    return manager->vtree_ops.search_aborted = 1;
+  }
   else if(manager->vtree_ops.fragment_time_limit && manager->vtree_ops.fragment_time_stamp &&
           cur_time > manager->vtree_ops.fragment_time_limit+manager->vtree_ops.fragment_time_stamp) {
     ++manager->auto_search_invocation_count_aborted_fragment;
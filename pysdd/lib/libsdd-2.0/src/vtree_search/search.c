@@ -48,9 +48,13 @@ Vtree* update_vtree_change_p(Vtree* vtree, SddManager* manager);
  * quality measures
  ****************************************************************************************/
 
-SddSize best_size;
-SddSize best_count;
-SddSize best_balance;
+//quality of the best state found so far (kept by the caller so that searches in
+//different managers do not share state)
+typedef struct {
+  SddSize size;
+  SddSize count;
+  SddSize balance;
+} SearchQuality;
   
 static inline
 SddSize balance(Vtree* vtree, SddManager* manager) {
@@ -67,7 +71,7 @@ SddSize balance(Vtree* vtree, SddManager* manager) {
 
 //updates index (0...11) and direction ('f' 'b') of best fragment state that beats current best
 static
-void best_fragment_state(int* best_state, char* best_direction, VtreeFragment* fragment, int limited) {
+void best_fragment_state(int* best_state, char* best_direction, SearchQuality* best, VtreeFragment* fragment, int limited) {
   
   SddManager* manager = fragment->manager;
   
@@ -104,14 +108,14 @@ void best_fragment_state(int* best_state, char* best_direction, VtreeFragment* f
       SddSize cur_count   = sdd_manager_live_count(manager);
       SddSize cur_balance = balance(cur_root,manager);
   
-      int better = (cur_size<best_size) || 
-                   (cur_size==best_size && (cur_count<best_count || cur_balance<best_balance));
+      int better = (cur_size<best->size) || 
+                   (cur_size==best->size && (cur_count<best->count || cur_balance<best->balance));
                    
       if(better) {
         //save found state and its details
-        best_size       = cur_size;
-        best_count      = cur_count;
-        best_balance    = cur_balance;
+        best->size      = cur_size;
+        best->count     = cur_count;
+        best->balance   = cur_balance;
         *best_state     = vtree_fragment_state(fragment);
         *best_direction = cur_direction;
         if(limited) sdd_manager_update_vtree_size_limit(manager); //new baseline for size limits
@@ -178,10 +182,11 @@ Vtree* best_local_state(Vtree* root, SddManager* manager, int limited) {
 
   if(limited && search_aborted(manager)) return root; //search aborted
    
-  //initialize quality measures (global variables)
-  best_size    = sdd_manager_live_size(manager);
-  best_count   = sdd_manager_live_count(manager);
-  best_balance = balance(root,manager);
+  //initialize quality measures
+  SearchQuality best;
+  best.size    = sdd_manager_live_size(manager);
+  best.count   = sdd_manager_live_count(manager);
+  best.balance = balance(root,manager);
   
   //find best state of rl fragment (if any)
   VtreeFragment* fragment_rl = NULL;
@@ -195,7 +200,7 @@ Vtree* best_local_state(Vtree* root, SddManager* manager, int limited) {
      
   if(is_rl_fragment(root)) {
     fragment_rl = vtree_fragment_new(root,root->right,manager);
-    best_fragment_state(&best_state_rl,&best_direction_rl,fragment_rl,limited);  
+    best_fragment_state(&best_state_rl,&best_direction_rl,&best,fragment_rl,limited);  
     if(limited && search_aborted(manager)) {
       vtree_fragment_free(fragment_rl);
       return root; //search aborted
@@ -204,7 +209,7 @@ Vtree* best_local_state(Vtree* root, SddManager* manager, int limited) {
    
   if(is_ll_fragment(root)) {
     fragment_ll = vtree_fragment_new(root,root->left,manager);
-    best_fragment_state(&best_state_ll,&best_direction_ll,fragment_ll,limited);
+    best_fragment_state(&best_state_ll,&best_direction_ll,&best,fragment_ll,limited);
     if(limited && search_aborted(manager)) {
       vtree_fragment_free(fragment_ll);
       if(fragment_rl) vtree_fragment_free(fragment_rl);
@@ -223,9 +228,9 @@ Vtree* best_local_state(Vtree* root, SddManager* manager, int limited) {
   if(fragment_ll) vtree_fragment_free(fragment_ll);
   if(fragment_rl) vtree_fragment_free(fragment_rl);
   
-  assert(best_size==sdd_manager_live_size(manager));
-  assert(best_count==sdd_manager_live_count(manager));
-  assert(best_balance==balance(root,manager));
+  assert(best.size==sdd_manager_live_size(manager));
+  assert(best.count==sdd_manager_live_count(manager));
+  assert(best.balance==balance(root,manager));
   
   return root;
 }
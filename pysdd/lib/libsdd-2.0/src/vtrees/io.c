@@ -36,19 +36,19 @@ Vtree* sdd_vtree_read(const char* filename) {
  ****************************************************************************************/
 
 //prints a vtree node
-void print_vtree_node(FILE* file, const Vtree* vnode) {
+void print_vtree_node(SddWriter* writer, const Vtree* vnode) {
   if(LEAF(vnode)) {
-    fprintf(file,"L %"PRIsS" %"PRIlitS"",vnode->position,vnode->var);
+    writer_printf(writer,"L %"PRIsS" %"PRIlitS"",vnode->position,vnode->var);
   } 
   else { // internal node
-    print_vtree_node(file,vnode->left);
-    print_vtree_node(file,vnode->right);
-    fprintf(file,"I %"PRIsS" %"PRIsS" %"PRIsS"",vnode->position,vnode->left->position,vnode->right->position);
+    print_vtree_node(writer,vnode->left);
+    print_vtree_node(writer,vnode->right);
+    writer_printf(writer,"I %"PRIsS" %"PRIsS" %"PRIsS"",vnode->position,vnode->left->position,vnode->right->position);
   }
-  fprintf(file,"\n");
+  writer_printf(writer,"\n");
 }
 
-void print_vtree_header(FILE* file) {
+void print_vtree_header(SddWriter* writer) {
   static const char* header = 
     "c ids of vtree nodes start at 0\n"
     "c ids of variables start at 1\n"
@@ -59,91 +59,110 @@ void print_vtree_header(FILE* file) {
     "c L id-of-leaf-vtree-node id-of-variable\n"
     "c I id-of-internal-vtree-node id-of-left-child id-of-right-child\n"
     "c\n";
-  fprintf(file,"%s",header);
+  writer_printf(writer,"%s",header);
 }
 
 //prints a vtree in .vtree file format
-void print_vtree(FILE* file, const Vtree* vtree) {
+void print_vtree(SddWriter* writer, const Vtree* vtree) {
   SddLiteral count = 2*(vtree->var_count) -1;
-  print_vtree_header(file);
-  fprintf(file,"vtree %"PRIsS"\n",count);
-  print_vtree_node(file,vtree);
+  print_vtree_header(writer);
+  writer_printf(writer,"vtree %"PRIsS"\n",count);
+  print_vtree_node(writer,vtree);
 }
 
 //saves vtree to file
 void sdd_vtree_save(const char* fname, Vtree* vtree) { 
   FILE *file = fopen(fname,"w");
-  print_vtree(file,vtree);
+  SddWriter writer;
+  init_file_writer(file,&writer);
+  print_vtree(&writer,vtree);
   fclose(file); 
 }
 
+//writes vtree in .vtree file format to a callback
+void sdd_vtree_write(Vtree* vtree, SddWriteFunc* write, void* context) {
+  SddWriter writer;
+  init_callback_writer(write,context,&writer);
+  print_vtree(&writer,vtree);
+  free_writer(&writer);
+}
+
 /****************************************************************************************
  * printing vtrees to .dot file
  *
  * the ->position of a vnode is used as its id to ensure an inorder labeling
  ****************************************************************************************/
-extern SddManager* man;
 
-void print_vtree_nodes_as_dot(FILE* file, const Vtree* vtree) {
+void print_vtree_nodes_as_dot(SddWriter* writer, const Vtree* vtree) {
   SddLiteral position = vtree->position;
   char* shape = "plaintext";
   
   if(LEAF(vtree)) {
     SddLiteral var = vtree->var;
     char* var_string = literal_to_label(var);
-    fprintf(file,"\nn%"PRIsS" [label=\"%s\",fontname=\"Times-Italic\","
+    writer_printf(writer,"\nn%"PRIsS" [label=\"%s\",fontname=\"Times-Italic\","
             "fontsize=14,shape=\"%s\",fixedsize=true,width=.25,height=.25"
             "]; ",position,var_string,shape);
     free(var_string);
   } 
   else {
-    fprintf(file,"\nn%"PRIsS" [label=\"%"PRIsS"\",fontname=\"Times\","
+    writer_printf(writer,"\nn%"PRIsS" [label=\"%"PRIsS"\",fontname=\"Times\","
            "shape=\"%s\",fontsize=12,fixedsize=true,width=.2,height=.18]; ",
            position,position,shape);
-    print_vtree_nodes_as_dot(file,vtree->left);
-    print_vtree_nodes_as_dot(file,vtree->right);
+    print_vtree_nodes_as_dot(writer,vtree->left);
+    print_vtree_nodes_as_dot(writer,vtree->right);
   }
 }
 
-void print_vtree_edges_as_dot(FILE* file, const Vtree* vtree, const Vtree* parent) {
+void print_vtree_edges_as_dot(SddWriter* writer, const Vtree* vtree, const Vtree* parent) {
   SddLiteral position = vtree->position;
   if(LEAF(vtree)) {
     if(parent != NULL) {
       SddLiteral parent_position = vtree->parent->position;
-      fprintf(file,"\nn%"PRIsS"->n%"PRIsS" [headclip=true,arrowhead=none,headlabel=\"%"PRIsS"\","
+      writer_printf(writer,"\nn%"PRIsS"->n%"PRIsS" [headclip=true,arrowhead=none,headlabel=\"%"PRIsS"\","
               "labelfontname=\"Times\",labelfontsize=10];",parent_position,position,position);
     }
   } 
   else { //internal node
     if(parent != NULL) {
       SddLiteral parent_position = vtree->parent->position;
-      fprintf(file,"\nn%"PRIsS"->n%"PRIsS" [arrowhead=none];",parent_position,position);
+      writer_printf(writer,"\nn%"PRIsS"->n%"PRIsS" [arrowhead=none];",parent_position,position);
     }
-    print_vtree_edges_as_dot(file,vtree->left,vtree);
-    print_vtree_edges_as_dot(file,vtree->right,vtree); // right first?
+    print_vtree_edges_as_dot(writer,vtree->left,vtree);
+    print_vtree_edges_as_dot(writer,vtree->right,vtree); // right first?
   }
 }
 
 //prints a vtree in .dot file format
-void print_vtree_as_dot(FILE* file, const Vtree* vtree) {
-  fprintf(file,"\ndigraph vtree {");
-  fprintf(file,"\n\noverlap=false");
-  fprintf(file,"\n");
+void print_vtree_as_dot(SddWriter* writer, const Vtree* vtree) {
+  writer_printf(writer,"\ndigraph vtree {");
+  writer_printf(writer,"\n\noverlap=false");
+  writer_printf(writer,"\n");
 
-  print_vtree_nodes_as_dot(file,vtree);
+  print_vtree_nodes_as_dot(writer,vtree);
   //allows printing vtrees of internal nodes (i.e., subtrees -- hence, the NULL below)
-  print_vtree_edges_as_dot(file,vtree,NULL);
+  print_vtree_edges_as_dot(writer,vtree,NULL);
 
-  fprintf(file,"\n\n");
-  fprintf(file,"\n}");
+  writer_printf(writer,"\n\n");
+  writer_printf(writer,"\n}");
 }
 
 void sdd_vtree_save_as_dot(const char* fname, Vtree* vtree) { 
   FILE *file = fopen(fname,"w");
-  print_vtree_as_dot(file,vtree);
+  SddWriter writer;
+  init_file_writer(file,&writer);
+  print_vtree_as_dot(&writer,vtree);
   fclose(file); 
 }
 
+//writes vtree in .dot file format to a callback
+void sdd_vtree_write_as_dot(Vtree* vtree, SddWriteFunc* write, void* context) {
+  SddWriter writer;
+  init_callback_writer(write,context,&writer);
+  print_vtree_as_dot(&writer,vtree);
+  free_writer(&writer);
+}
+
 
 /****************************************************************************************
  * Parses a vtree from a .vtree cstring, where comments have been filtered out
@@ -202,6 +221,51 @@ Vtree* parse_vtree_file(char* buffer) {
   return vnode;
 }
 
+/****************************************************************************************
+ * constructing a vtree from arrays that are indexed by vtree position
+ *
+ * left[p] and right[p] are the positions of the children of vtree node p (-1 for a leaf)
+ * var[p] is the variable of vtree node p (if it is a leaf)
+ *
+ * returns the vtree rooted at position root (nodes are constructed children first,
+ * without recursion, since the vtree can be deep)
+ * the arrays are not checked, see validate_vtree_arrays in pysdd
+ ***************************************************************************************/
+
+Vtree* sdd_vtree_from_arrays(SddLiteral node_count, SddLiteral root, const SddLiteral* left, const SddLiteral* right, const SddLiteral* var) {
+  //create a map from positions to vtree nodes
+  Vtree** vtree_node_list;
+  CALLOC(vtree_node_list,Vtree*,node_count,"sdd_vtree_from_arrays");
+  SddLiteral* stack;
+  CALLOC(stack,SddLiteral,node_count,"sdd_vtree_from_arrays");
+  
+  SddLiteral top = 0;
+  stack[top++] = root;
+  while(top) {
+    SddLiteral position = stack[top-1];
+    Vtree* vnode;
+    if(left[position]<0) vnode = new_leaf_vtree(var[position]);
+    else {
+      Vtree* l = vtree_node_list[left[position]];
+      Vtree* r = vtree_node_list[right[position]];
+      if(l==NULL || r==NULL) { //construct children first
+        if(r==NULL) stack[top++] = right[position];
+        if(l==NULL) stack[top++] = left[position];
+        continue;
+      }
+      vnode = new_internal_vtree(l,r);
+    }
+    vnode->position = position;
+    vtree_node_list[position] = vnode;
+    --top;
+  }
+  
+  Vtree* vtree = vtree_node_list[root];
+  free(vtree_node_list);
+  free(stack);
+  return vtree;
+}
+
 /****************************************************************************************
  * end
  ****************************************************************************************/
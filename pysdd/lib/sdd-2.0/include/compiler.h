@@ -80,6 +80,23 @@ typedef struct {
 typedef Fnf Cnf;
 typedef Fnf Dnf;
 
+//limits of fnf_to_sdd_limited, checked after compiling each literal set (0 or NULL for no limit)
+typedef struct {
+  SddSize max_node_count; //nodes in the manager (after garbage collection)
+  SddSize max_memory; //bytes of nodes and elements in the manager (after garbage collection)
+  volatile int* cancelled; //non-zero when cancelled by another thread
+  volatile int* timed_out; //non-zero when the deadline has passed (set by another thread)
+  //result
+  int status; //FNF_COMPLETED or the reason to stop
+  SddSize litset_done_count; //literal sets compiled before stopping
+} FnfLimits;
+
+#define FNF_COMPLETED 0
+#define FNF_CANCELLED 1
+#define FNF_TIMED_OUT 2
+#define FNF_NODE_COUNT_EXCEEDED 3
+#define FNF_MEMORY_EXCEEDED 4
+
 /****************************************************************************************
  * function declaration
  ****************************************************************************************/
@@ -89,6 +106,7 @@ typedef Fnf Dnf;
 /* void free_fnf(Fnf* fnf); */
 
 SddNode* fnf_to_sdd(Fnf* fnf, SddManager* manager);
+SddNode* fnf_to_sdd_limited(Fnf* fnf, SddManager* manager, FnfLimits* limits);
 
 /****************************************************************************************
  * forward references 
@@ -145,6 +145,7 @@ typedef struct sdd_manager_t SddManager;
 typedef struct wmc_manager_t WmcManager;
 
 typedef struct vtree_t* SddVtreeSearchFunc(struct vtree_t*, struct sdd_manager_t*);
+typedef int SddVtreeSearchStopFunc(struct sdd_manager_t*, void*);
 
 /****************************************************************************************
  * function prototypes
@@ -231,6 +232,7 @@ SddSize sdd_manager_dead_size(const SddManager* manager);
 SddSize sdd_manager_count(const SddManager* manager);
 SddSize sdd_manager_live_count(const SddManager* manager);
 SddSize sdd_manager_dead_count(const SddManager* manager);
+SddSize sdd_manager_memory(const SddManager* manager);
 //SDD OF VTREE
 SddSize sdd_vtree_size(const Vtree* vtree);
 SddSize sdd_vtree_live_size(const Vtree* vtree);
@@ -321,6 +323,7 @@ void sdd_manager_set_vtree_apply_time_limit(float time_limit, SddManager* manage
 void sdd_manager_set_vtree_operation_memory_limit(float memory_limit, SddManager* manager);
 void sdd_manager_set_vtree_operation_size_limit(float size_limit, SddManager* manager);
 void sdd_manager_set_vtree_cartesian_product_limit(SddSize size_limit, SddManager* manager);
+void sdd_manager_set_vtree_search_stop_function(SddVtreeSearchStopFunc func, void* data, SddManager* manager);
 
 // WMC
 WmcManager* wmc_manager_new(SddNode* node, int log_mode, SddManager* manager);
@@ -330,8 +333,8 @@ SddWmc wmc_propagate(WmcManager* wmc_manager);
 SddWmc wmc_zero_weight(WmcManager* wmc_manager);
 SddWmc wmc_one_weight(WmcManager* wmc_manager);
 SddWmc wmc_literal_weight(const SddLiteral literal, const WmcManager* wmc_manager);
-SddWmc wmc_literal_derivative(const SddLiteral literal, const WmcManager* wmc_manager);
-SddWmc wmc_literal_pr(const SddLiteral literal, const WmcManager* wmc_manager);
+SddWmc wmc_literal_derivative(const SddLiteral literal, WmcManager* wmc_manager);
+SddWmc wmc_literal_pr(const SddLiteral literal, WmcManager* wmc_manager);
 
 #endif // SDDAPI_H_
 
@@ -34,7 +34,35 @@ SddNode* degenerate_fnf_test(Fnf* fnf, SddManager* manager) {
   return NULL;
 }
 
-SddNode* fnf_to_sdd_auto(Fnf* fnf, SddManager* manager) {
+//checks the limits after done literal sets have been compiled into node
+//returns 1 and sets the status of limits if compilation should stop
+static
+int exceeded_fnf_limits(SddNode* node, SddSize done, FnfLimits* limits, SddManager* manager) {
+  if(limits==NULL) return 0;
+  limits->litset_done_count = done;
+  if(limits->cancelled!=NULL && *limits->cancelled) limits->status = FNF_CANCELLED;
+  else if(limits->timed_out!=NULL && *limits->timed_out) limits->status = FNF_TIMED_OUT;
+  else if((limits->max_node_count>0 && sdd_manager_count(manager)>limits->max_node_count) ||
+          (limits->max_memory>0 && sdd_manager_memory(manager)>limits->max_memory)) {
+    //dead nodes do not count
+    sdd_ref(node,manager);
+    sdd_manager_garbage_collect(manager);
+    sdd_deref(node,manager);
+    if(limits->max_node_count>0 && sdd_manager_count(manager)>limits->max_node_count) limits->status = FNF_NODE_COUNT_EXCEEDED;
+    else if(limits->max_memory>0 && sdd_manager_memory(manager)>limits->max_memory) limits->status = FNF_MEMORY_EXCEEDED;
+  }
+  return limits->status!=FNF_COMPLETED;
+}
+
+//stop condition for vtree search: aborts a (long) vtree search when the compilation is
+//cancelled or timed out, the search then leaves the manager in a valid state
+static
+int stop_fnf_vtree_search(SddManager* manager, void* data) {
+  FnfLimits* limits = (FnfLimits*)data;
+  return (limits->cancelled!=NULL && *limits->cancelled) || (limits->timed_out!=NULL && *limits->timed_out);
+}
+
+SddNode* fnf_to_sdd_auto(Fnf* fnf, SddManager* manager, FnfLimits* limits) {
   SddCompilerOptions* options = sdd_manager_options(manager);
   int verbose      = options->verbose;
   BoolOp op        = fnf->op;
@@ -45,6 +73,7 @@ SddNode* fnf_to_sdd_auto(Fnf* fnf, SddManager* manager) {
   if(verbose) { printf("\nclauses: %ld ",count); fflush(stdout); }
   SddNode* node = ONE(manager,op);
   for(SddSize i=0; i<count; i++) {
+    if(exceeded_fnf_limits(node,i,limits,manager)) { node = NULL; break; }
     sort_litsets_by_lca(litsets+i,count-i,manager);
     sdd_ref(node,manager);
     SddNode* l = apply_litset(litsets[i],manager);
@@ -53,10 +82,11 @@ SddNode* fnf_to_sdd_auto(Fnf* fnf, SddManager* manager) {
     if(verbose) { printf("%ld ",count-i-1); fflush(stdout); }
   }
   free(litsets);
+  if(node!=NULL && limits!=NULL) limits->litset_done_count = count;
   return node;
 }
 
-SddNode* fnf_to_sdd_manual(Fnf* fnf, SddManager* manager) {
+SddNode* fnf_to_sdd_manual(Fnf* fnf, SddManager* manager, FnfLimits* limits) {
   SddCompilerOptions* options = sdd_manager_options(manager);
   int verbose      = options->verbose;
   int period       = options->vtree_search_mode;
@@ -69,6 +99,7 @@ SddNode* fnf_to_sdd_manual(Fnf* fnf, SddManager* manager) {
   if(verbose) { printf("\nclauses: %ld ",count); fflush(stdout); }
   SddNode* node = ONE(manager,op);
   for(SddSize i=0; i<count; i++) {
+    if(exceeded_fnf_limits(node,i,limits,manager)) { node = NULL; break; }
     if(period > 0 && i > 0 && i%period==0) {
       // after every period clauses
       sdd_ref(node,manager);
@@ -83,21 +114,44 @@ SddNode* fnf_to_sdd_manual(Fnf* fnf, SddManager* manager) {
     if(verbose) { printf("%ld ",count-i-1); fflush(stdout); }
   }
   free(litsets);
+  if(node!=NULL && limits!=NULL) limits->litset_done_count = count;
   return node;
 }
 
 SddNode* fnf_to_sdd(Fnf* fnf, SddManager* manager) {
+  return fnf_to_sdd_limited(fnf,manager,NULL);
+}
+
+//compiles an fnf, stops and returns NULL when one of the limits is exceeded
+//
+//the limits are checked in between literal sets, the manager remains usable when stopped
+//(the partially compiled sdd is dead and is claimed by the next garbage collection)
+//
+//cancellation and time outs also abort vtree search (automatic or every period literal
+//sets), but a single apply is not interrupted
+SddNode* fnf_to_sdd_limited(Fnf* fnf, SddManager* manager, FnfLimits* limits) {
+  if(limits!=NULL) {
+    limits->status = FNF_COMPLETED;
+    limits->litset_done_count = 0;
+  }
   SddNode* test = degenerate_fnf_test(fnf,manager);
-  if (test != NULL) return test;
+  if (test != NULL) {
+    if(limits!=NULL) limits->litset_done_count = fnf->litset_count;
+    return test;
+  }
   SddCompilerOptions* options = sdd_manager_options(manager);
 
+  if(limits!=NULL) sdd_manager_set_vtree_search_stop_function(stop_fnf_vtree_search,limits,manager);
+  SddNode* node;
   if(options->vtree_search_mode < 0) {
     sdd_manager_auto_gc_and_minimize_on(manager);
-    return fnf_to_sdd_auto(fnf,manager);
+    node = fnf_to_sdd_auto(fnf,manager,limits);
   } else {
     sdd_manager_auto_gc_and_minimize_off(manager);
-    return fnf_to_sdd_manual(fnf,manager);
+    node = fnf_to_sdd_manual(fnf,manager,limits);
   }
+  if(limits!=NULL) sdd_manager_set_vtree_search_stop_function(NULL,NULL,manager);
+  return node;
 }
 
 //converts a clause/term into an equivalent sdd
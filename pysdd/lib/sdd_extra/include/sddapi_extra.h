@@ -1,3 +1,4 @@
+#include <stdint.h>
 #include <sddapi.h>
 
 /****************************************************************************************
@@ -7,6 +8,69 @@
 #ifndef SDDAPI_EXTRA_H_
 #define SDDAPI_EXTRA_H_
 
+typedef void SddWriteFunc(void* context, const char* data, size_t length);
+
+typedef struct sdd_manager_counters_t {
+  //apply and computed cache
+  SddSize apply_count; //recursed applies
+  SddSize apply_count_top; //top-level recursed applies
+  SddSize computed_count; //entries in the computed cache
+  SddSize computed_cache_size;
+  SddSize computed_cache_lookup_count;
+  SddSize computed_cache_hit_count;
+  //unique table
+  SddSize unique_table_size; //number of collision lists
+  SddSize unique_table_count; //number of entries
+  SddSize unique_table_lookup_count;
+  SddSize unique_table_hit_count;
+  SddSize unique_table_lookup_cost;
+  SddSize unique_table_increase_size_count;
+  SddSize unique_table_decrease_size_count;
+  //nodes and elements
+  SddSize node_count; //dead + live
+  SddSize dead_node_count;
+  SddSize sdd_size; //dead + live
+  SddSize dead_sdd_size;
+  SddSize memory; //bytes of all nodes and elements, live or dead
+  SddSize gc_node_count; //free nodes
+  SddSize gc_element_count; //free elements
+  SddSize max_element_count;
+  SddSize max_decomposition_size;
+  SddSize max_uncompressed_decomposition_size;
+  //garbage collection and vtree search
+  SddSize gc_count; //global and local garbage collections
+  SddSize auto_gc_count;
+  SddSize auto_search_count;
+  SddSize auto_search_count_global;
+  SddSize auto_search_count_local;
+  SddSize auto_search_count_recursive;
+  SddSize auto_search_count_aborted_apply;
+  SddSize auto_search_count_aborted_operation;
+  SddSize auto_search_count_aborted_fragment;
+  SddSize auto_search_count_aborted_search;
+  SddSize auto_search_iteration_count;
+  double auto_search_reduction_sum; //sum of percentage size reduction over all searches
+  double auto_search_time; //seconds (cpu time)
+  double auto_max_search_time; //seconds (cpu time)
+  //vtree operations
+  SddSize lr_count;
+  SddSize rr_count;
+  SddSize sw_count;
+  SddSize failed_lr_count_time;
+  SddSize failed_rr_count_time;
+  SddSize failed_sw_count_time;
+  SddSize failed_lr_count_size;
+  SddSize failed_rr_count_size;
+  SddSize failed_sw_count_size;
+  SddSize failed_lr_count_memory;
+  SddSize failed_rr_count_memory;
+  SddSize failed_sw_count_memory;
+  SddSize failed_count_cp;
+  SddSize fragment_count;
+  SddSize completed_fragment_count;
+  SddSize successful_fragment_count;
+} SddManagerCounters;
+
 void add_var_before_lca(int count, SddLiteral* literals, SddManager* manager);
 void add_var_after_lca(int count, SddLiteral* literals, SddManager* manager);
 void move_var_before_first(SddLiteral var, SddManager* manager);
@@ -15,6 +79,29 @@ void move_var_before(SddLiteral var, SddLiteral target_var, SddManager* manager)
 void move_var_after(SddLiteral var, SddLiteral target_var, SddManager* manager);
 void remove_var_added_last(SddManager*manager);
 
+void wmc_propagate_batch(const SddWmc* weights, SddLiteral weights_var_count, SddSize query_count, SddSize block_size, SddWmc* wmcs, WmcManager* wmc_manager);
+void wmc_mpe_batch(const SddWmc* weights, SddLiteral weights_var_count, SddSize query_count, SddWmc* mpes, signed char* assignments, WmcManager* wmc_manager);
+SddWmc wmc_mpe(signed char* assignment, WmcManager* wmc_manager);
+SddWmc* wmc_literal_derivatives(WmcManager* wmc_manager);
+void wmc_literal_prs(SddWmc* prs, WmcManager* wmc_manager);
+void wmc_set_literal_weights_buffer(SddWmc* weights, WmcManager* wmc_manager);
+
+SddNode** sdd_topological_sort(SddNode* node, SddSize* size);
+SddSize sdd_exact_model_count(SddNode* node, int global, uint32_t** limbs, SddManager* manager);
+double sdd_log2_model_count(SddNode* node, int global, SddManager* manager);
+SddNode* sdd_condition_multiple(SddSize literal_count, const SddLiteral* literals, SddNode* node, SddManager* manager);
+SddNode* sdd_apply_multiple(SddSize count, SddNode** nodes, BoolOp op, SddManager* manager);
+void sdd_manager_counters(SddManagerCounters* counters, const SddManager* manager);
+
+SddNode* sdd_from_arrays(SddSize node_count, const char* types, const SddLiteral* literals, const SddLiteral* vtrees, const SddLiteral* offsets, const SddLiteral* primes, const SddLiteral* subs, SddManager* manager);
+Vtree* sdd_vtree_from_arrays(SddLiteral node_count, SddLiteral root, const SddLiteral* left, const SddLiteral* right, const SddLiteral* var);
+
+void sdd_write(SddNode* node, SddWriteFunc* write, void* context);
+void sdd_write_as_dot(SddNode* node, SddWriteFunc* write, void* context);
+void sdd_shared_write_as_dot(SddManager* manager, SddWriteFunc* write, void* context);
+void sdd_vtree_write(Vtree* vtree, SddWriteFunc* write, void* context);
+void sdd_vtree_write_as_dot(Vtree* vtree, SddWriteFunc* write, void* context);
+
 #endif // SDDAPI_EXTRA_H_
 
 /****************************************************************************************
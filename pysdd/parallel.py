@@ -0,0 +1,240 @@
+# -*- coding: UTF-8 -*-
+"""
+pysdd.parallel
+~~~~~~~~~~~~~~
+
+Parallel compilation of a CNF by splitting it into components that do not share variables.
+
+Each component is compiled in its own worker process with its own SddManager. Because the
+components are variable-disjoint, the model count (and weighted model count) of the CNF is the
+product of the counts of the components.
+
+:author: Wannes Meert, Arthur Choi
+:copyright: Copyright 2017-2019 KU Leuven and Regents of the University of California.
+:license: Apache License, Version 2.0, see LICENSE for details.
+"""
+import io
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .sdd import SddManager, Fnf, WmcManager
+
+
+MYPY = False
+if MYPY:
+    from typing import List, Optional, Tuple, Union
+    Clauses = List[List[int]]
+
+
+def components(clauses, var_count):
+    # type: (Clauses, int) -> Tuple[List[Tuple[List[int], Clauses]], List[int]]
+    """Split a set of clauses into components that do not share variables.
+
+    :param clauses: List of clauses, every clause is a list of literals
+    :param var_count: Number of variables (variables are 1, ..., var_count)
+    :return: Tuple (components, free_variables). A component is a tuple (variables, clauses) with the
+        sorted variables and the clauses of the component. Free variables do not appear in any clause.
+    """
+    parent = list(range(var_count + 1))
+
+    def find(var):
+        while parent[var] != var:
+            parent[var] = parent[parent[var]]
+            var = parent[var]
+        return var
+
+    for clause in clauses:
+        if len(clause) == 0:
+            continue
+        root = find(abs(clause[0]))
+        for lit in clause[1:]:
+            other = find(abs(lit))
+            if other != root:
+                parent[other] = root
+
+    used = [False] * (var_count + 1)
+    for clause in clauses:
+        for lit in clause:
+            used[abs(lit)] = True
+    comp_idx = {}
+    comps = []
+    for var in range(1, var_count + 1):
+        if used[var]:
+            root = find(var)
+            if root not in comp_idx:
+                comp_idx[root] = len(comps)
+                comps.append(([], []))
+            comps[comp_idx[root]][0].append(var)
+    empty_clauses = []
+    for clause in clauses:
+        if len(clause) == 0:
+            empty_clauses.append(clause)
+        else:
+            comps[comp_idx[find(abs(clause[0]))]][1].append(clause)
+    if len(empty_clauses) > 0:
+        # An empty clause is false, it is kept as a separate component without variables
+        comps.append(([], empty_clauses))
+    free_variables = [var for var in range(1, var_count + 1) if not used[var]]
+    return comps, free_variables
+
+
+def _compile_component(args):
+    """Compile one component, used by the worker processes.
+
+    The variables of the component are renamed to 1, ..., n (in the order of ``variables``).
+    Since SDD nodes cannot be transferred between processes, the SDD is returned as a
+    CompiledCircuit (which includes the vtree).
+    """
+    variables, clauses, vtree_type, minimize = args
+    if len(variables) == 0:
+        # Only empty clauses
+        mgr = SddManager(var_count=1)
+        node = mgr.false()
+    else:
+        var_map = {var: idx + 1 for idx, var in enumerate(variables)}
+        clauses = [[var_map[lit] if lit > 0 else -var_map[-lit] for lit in clause] for clause in clauses]
+        mgr, node = SddManager.from_clauses(clauses, len(variables), vtree_type.encode())
+        if minimize:
+            node.ref()
+            mgr.minimize()
+            node.deref()
+    model_count = node.global_model_count_exact() if len(variables) > 0 else 0
+    return node.to_arrays(), model_count
+
+
+class Component:
+    """A compiled component of a CNF.
+
+    Variable i of the component manager corresponds to variable ``variables[i-1]`` of the CNF.
+
+    :param variables: Variables of the CNF in this component
+    :param clause_count: Number of clauses in this component
+    :param model_count: Number of models of the component over its variables
+    :param manager: SddManager of the component (None if the SDDs are not loaded)
+    :param root: Root SddNode of the component (None if the SDDs are not loaded)
+    """
+    def __init__(self, variables, clause_count, model_count, manager=None, root=None):
+        self.variables = variables
+        self.clause_count = clause_count
+        self.model_count = model_count
+        self.manager = manager
+        self.root = root
+
+    @staticmethod
+    def load(variables, clause_count, circuit, model_count):
+        """Create a component from the CompiledCircuit of its SDD."""
+        manager, root = SddManager.from_circuit(circuit)
+        root.ref()
+        return Component(variables, clause_count, model_count, manager, root)
+
+    def __repr__(self):
+        return "Component(vars={}, clauses={}, model_count={})".format(
+            len(self.variables), self.clause_count, self.model_count)
+
+
+class CompiledComponents:
+    """The result of compiling a CNF per component.
+
+    :param var_count: Number of variables in the CNF
+    :param components: List of Component objects
+    :param free_variables: Variables that do not appear in the CNF
+    """
+    def __init__(self, var_count, components, free_variables):
+        self.var_count = var_count
+        self.components = components
+        self.free_variables = free_variables
+
+    def __len__(self):
+        return len(self.components)
+
+    def __iter__(self):
+        return iter(self.components)
+
+    def __getitem__(self, idx):
+        return self.components[idx]
+
+    def model_count(self):
+        """Number of models of the CNF over all its variables (an arbitrary precision integer)."""
+        count = 2 ** len(self.free_variables)
+        for component in self.components:
+            count *= component.model_count
+        return count
+
+    def wmc(self, weights, log_mode=True):
+        """Weighted model count of the CNF.
+
+        :param weights: Array with the weights of the literals, the same format as used by
+            WmcManager.set_literal_weights_from_array (literals [-3, -2, -1, 1, 2, 3])
+        :param log_mode: The weights and result are in log-space
+        :return: Product (sum in log-space) of the weighted model counts of the components
+        """
+        if len(weights) != 2 * self.var_count:
+            raise ValueError("Expected {} weights, got {}".format(2 * self.var_count, len(weights)))
+
+        def weight(lit):
+            return weights[self.var_count + lit - 1] if lit > 0 else weights[self.var_count + lit]
+
+        result = 0.0 if log_mode else 1.0
+        for component in self.components:
+            if component.root is None:
+                raise ValueError("SDDs of the components are not loaded")
+            wmc = WmcManager(component.root, log_mode=log_mode)
+            for idx, var in enumerate(component.variables):
+                wmc.set_literal_weight(idx + 1, weight(var))
+                wmc.set_literal_weight(-(idx + 1), weight(-var))
+            component_wmc = wmc.propagate()
+            result = result + component_wmc if log_mode else result * component_wmc
+        for var in self.free_variables:
+            if log_mode:
+                result += np.logaddexp(weight(var), weight(-var))
+            else:
+                result *= weight(var) + weight(-var)
+        return result
+
+
+def compile_cnf(cnf, vtree_type="balanced", minimize=False, max_workers=None, load_sdds=True, var_count=None):
+    # type: (Union[Fnf, str, Clauses], str, bool, Optional[int], bool, Optional[int]) -> CompiledComponents
+    """Compile a CNF by compiling its variable-disjoint components in parallel worker processes.
+
+    :param cnf: An Fnf object (CNF), a filename of a CNF in DIMACS format or a list of clauses
+    :param vtree_type: Type of the initial vtree of each component manager
+    :param minimize: Minimize each component SDD after compilation
+    :param max_workers: Maximal number of worker processes (default is the number of processors).
+        If 1 or if there is only one component, the compilation is done in the current process.
+    :param load_sdds: Load the component SDDs in this process. If False, only the model counts are returned.
+    :param var_count: Number of variables if cnf is a list of clauses (default is the largest variable)
+    :return: CompiledComponents object
+    """
+    if isinstance(cnf, (str, bytes)):
+        if isinstance(cnf, str):
+            cnf = cnf.encode()
+        with redirect_stdout(io.StringIO()):
+            cnf = Fnf.from_cnf_file(cnf)
+    if isinstance(cnf, Fnf):
+        if cnf._type_dnf:
+            raise ValueError("Only a CNF can be split into components")
+        var_count, clauses = cnf.var_count, cnf.litsets()
+    else:
+        clauses = [list(clause) for clause in cnf]
+        if var_count is None:
+            var_count = max((abs(lit) for clause in clauses for lit in clause), default=0)
+    comps, free_variables = components(clauses, var_count)
+
+    if isinstance(vtree_type, bytes):
+        vtree_type = vtree_type.decode()
+    tasks = [(variables, comp_clauses, vtree_type, minimize) for variables, comp_clauses in comps]
+    if max_workers == 1 or len(tasks) <= 1:
+        results = [_compile_component(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_compile_component, tasks))
+
+    compiled = []
+    for (variables, comp_clauses), (circuit, model_count) in zip(comps, results):
+        if load_sdds:
+            compiled.append(Component.load(variables, len(comp_clauses), circuit, model_count))
+        else:
+            compiled.append(Component(variables, len(comp_clauses), model_count))
+    return CompiledComponents(var_count, compiled, free_variables)
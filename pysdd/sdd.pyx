@@ -17,13 +17,21 @@ from . cimport io_c
 from . cimport fnf_c
 from cpython cimport array
 from cpython.mem cimport PyMem_Malloc, PyMem_Free
+from cpython.buffer cimport PyBUF_WRITABLE
+from libc.stdlib cimport malloc, calloc, free
+from libc.stdint cimport uint32_t
+from libc.math cimport exp, log1p, fabs, INFINITY
 
 import os
-import tempfile
+import threading
+import time
 from contextlib import redirect_stdout, redirect_stderr
 import io
 import cython
 import collections
+import numbers
+import numpy as np
+from .circuit import CompiledCircuit, validate_vtree_arrays
 
 
 # IF HAVE_CYSIGNALS:  # IF is deprecated in cython, drop cysignals support for now
@@ -35,6 +43,86 @@ sig_on = noop
 sig_off = noop
 
 
+class _Writer:
+    """Receives the output of the libsdd printing functions (see _write_callback).
+
+    The output is collected in memory, or passed on to a file object (in text or binary mode).
+    An exception raised by the file object is kept and raised by check().
+    """
+    def __init__(self, fileobj=None):
+        self.fileobj = fileobj
+        self.binary = isinstance(fileobj, (io.RawIOBase, io.BufferedIOBase))
+        self.chunks = []
+        self.error = None
+
+    def write(self, data):
+        if self.fileobj is None:
+            self.chunks.append(data)
+        elif self.binary:
+            self.fileobj.write(data)
+        else:
+            self.fileobj.write(data.decode())
+
+    def check(self):
+        if self.error is not None:
+            raise self.error
+
+    def getvalue(self):
+        self.check()
+        return b"".join(self.chunks).decode()
+
+
+cdef void _write_callback(void* context, const char* data, size_t length) noexcept with gil:
+    writer = <object>context
+    if writer.error is not None:
+        return
+    try:
+        writer.write(data[:length])
+    except BaseException as exc:
+        writer.error = exc
+
+
+class CompilationAborted(Exception):
+    """Raised when the compilation of a CNF or DNF is stopped before it is finished.
+
+    :param reason: "cancelled", "timeout", "node_budget" or "memory_budget"
+    :param stats: Dictionary with the progress at the moment the compilation was stopped
+        (litsets_done, litset_count, elapsed, node_count, live_count, memory_mb)
+    :param manager: The SddManager used for the compilation (it remains usable)
+    """
+    def __init__(self, reason, stats, manager=None):
+        super().__init__("Compilation {} after {}/{} literal sets ({:.2f}s)".format(
+            "cancelled" if reason == "cancelled" else "stopped ({})".format(reason),
+            stats["litsets_done"], stats["litset_count"], stats["elapsed"]))
+        self.reason = reason
+        self.stats = stats
+        self.manager = manager
+
+
+cdef class CancellationToken:
+    """Token to cancel a running compilation (see SddManager.fnf_to_sdd) from another thread."""
+    cdef int _cancelled
+
+    def __init__(self):
+        self._cancelled = 0
+
+    def cancel(self):
+        """Request the compilation to stop, it stops after the current literal set."""
+        self._cancelled = 1
+
+    @property
+    def cancelled(self):
+        return self._cancelled != 0
+
+
+_fnf_abort_reasons = {
+    compiler_c.FNF_CANCELLED: "cancelled",
+    compiler_c.FNF_TIMED_OUT: "timeout",
+    compiler_c.FNF_NODE_COUNT_EXCEEDED: "node_budget",
+    compiler_c.FNF_MEMORY_EXCEEDED: "memory_budget",
+}
+
+
 cdef class SddNode:
     cdef sddapi_c.SddNode* _sddnode
     cdef SddManager _manager
@@ -159,12 +247,24 @@ cdef class SddNode:
     def condition(SddNode node, lit):
         return node._manager.condition(lit, node)
 
+    def condition_multiple(SddNode node, literals):
+        return node._manager.condition_multiple(literals, node)
+
     def model_count(self):
         return self._manager.model_count(self)
 
     def global_model_count(self):
         return self._manager.global_model_count(self)
 
+    def model_count_exact(self):
+        return self._manager.model_count_exact(self)
+
+    def global_model_count_exact(self):
+        return self._manager.global_model_count_exact(self)
+
+    def log2_model_count(self, global_count=False):
+        return self._manager.log2_model_count(self, global_count)
+
     def node_size(self):
         """Returns the size of an SDD node (the number of its elements).
 
@@ -185,6 +285,9 @@ cdef class SddNode:
 
         :returns: A list of pairs [(prime, sub)]
 
+        Every call creates new SddNode objects, use element_ids (or to_arrays for a whole SDD) to
+        traverse an SDD without creating them.
+
         Internal working:
         If the node has m elements, the array will be of size 2m, with primes appearing at locations
         0, 2, . . . , 2m − 2 and their corresponding subs appearing at locations 1, 3, . . . , 2m − 1.
@@ -192,15 +295,92 @@ cdef class SddNode:
         freed.
         """
         cdef sddapi_c.SddNode** nodes;
+        cdef sddapi_c.SddNodeSize i
+        cdef sddapi_c.SddNodeSize m = sddapi_c.sdd_node_size(self._sddnode)
         nodes = sddapi_c.sdd_node_elements(self._sddnode)
         # do not free memory of nodes
-        m = self.node_size()
         primesubs = []
         for i in range(0, 2 * m, 2):
             primesubs.append((SddNode.wrap(nodes[i], self._manager),
                               SddNode.wrap(nodes[i + 1], self._manager)))
         return primesubs
 
+    def element_ids(self):
+        """Returns the ids of the elements of an SDD node without creating SddNode objects.
+
+        :returns: NumPy array of shape (node_size, 2) with rows (prime id, sub id)
+        """
+        cdef sddapi_c.SddNode** nodes
+        cdef sddapi_c.SddNodeSize i
+        cdef sddapi_c.SddNodeSize m = sddapi_c.sdd_node_size(self._sddnode)
+        cdef long long[:, ::1] ids_v
+        ids = np.empty((m, 2), dtype=np.int64)
+        if m == 0:
+            return ids
+        ids_v = ids
+        nodes = sddapi_c.sdd_node_elements(self._sddnode)
+        for i in range(m):
+            ids_v[i, 0] = sddapi_c.sdd_id(nodes[2 * i])
+            ids_v[i, 1] = sddapi_c.sdd_id(nodes[2 * i + 1])
+        return ids
+
+    def to_arrays(self):
+        """Returns the SDD rooted at this node as a CompiledCircuit, a set of contiguous NumPy arrays.
+
+        The nodes are sorted topologically (children before parents) and the vtree of the manager is
+        included to smooth the circuit during evaluation. The result does not depend on the manager.
+        """
+        cdef sddapi_c.SddSize node_count
+        cdef sddapi_c.SddSize element_count = 0
+        cdef sddapi_c.SddSize i, j, e = 0
+        cdef sddapi_c.SddNode** nodes
+        cdef sddapi_c.SddNode** elements
+        cdef sddapi_c.SddNode* node
+        cdef sddapi_c.SddNodeSize size
+        cdef signed char[::1] types_v
+        cdef long long[::1] literals_v, ids_v, positions_v, offsets_v, primes_v, subs_v
+        nodes = sddapi_c.sdd_topological_sort(self._sddnode, &node_count)  # sets node->index to location
+        try:
+            for i in range(node_count):
+                if sddapi_c.sdd_node_is_decision(nodes[i]):
+                    element_count += sddapi_c.sdd_node_size(nodes[i])
+            types = np.zeros(node_count, dtype=np.int8)
+            literals = np.zeros(node_count, dtype=np.int64)
+            ids = np.empty(node_count, dtype=np.int64)
+            vtree_positions = np.full(node_count, -1, dtype=np.int64)
+            element_offsets = np.empty(node_count + 1, dtype=np.int64)
+            primes = np.empty(element_count, dtype=np.int64)
+            subs = np.empty(element_count, dtype=np.int64)
+            types_v, literals_v, ids_v, positions_v = types, literals, ids, vtree_positions
+            offsets_v, primes_v, subs_v = element_offsets, primes, subs
+            for i in range(node_count):
+                node = nodes[i]
+                offsets_v[i] = e
+                ids_v[i] = sddapi_c.sdd_id(node)
+                if sddapi_c.sdd_node_is_true(node):
+                    types_v[i] = CompiledCircuit.TRUE
+                elif sddapi_c.sdd_node_is_false(node):
+                    types_v[i] = CompiledCircuit.FALSE
+                elif sddapi_c.sdd_node_is_literal(node):
+                    types_v[i] = CompiledCircuit.LITERAL
+                    literals_v[i] = sddapi_c.sdd_node_literal(node)
+                    positions_v[i] = sddapi_c.sdd_vtree_position(sddapi_c.sdd_vtree_of(node))
+                else:
+                    types_v[i] = CompiledCircuit.DECISION
+                    positions_v[i] = sddapi_c.sdd_vtree_position(sddapi_c.sdd_vtree_of(node))
+                    size = sddapi_c.sdd_node_size(node)
+                    elements = sddapi_c.sdd_node_elements(node)
+                    for j in range(size):
+                        primes_v[e] = elements[2 * j].index
+                        subs_v[e] = elements[2 * j + 1].index
+                        e += 1
+            offsets_v[node_count] = e
+        finally:
+            free(nodes)
+        vtree_left, vtree_right, vtree_vars = self._manager.vtree().to_arrays()
+        return CompiledCircuit(self._manager.var_count(), types, literals, element_offsets, primes, subs,
+                               vtree_positions, vtree_left, vtree_right, vtree_vars, ids)
+
     def bit(self):
         return sddapi_c.sdd_node_bit(self._sddnode)
 
@@ -211,6 +391,16 @@ cdef class SddNode:
         """Returns the vtree of an SDD node."""
         return Vtree.wrap(sddapi_c.sdd_vtree_of(self._sddnode), is_ref=True)
 
+    def vtree_position(self):
+        """Returns the position of the vtree of an SDD node without creating a Vtree object.
+
+        :return: Position in the vtree inorder, or -1 for the true and false node
+        """
+        cdef sddapi_c.Vtree* vtree = sddapi_c.sdd_vtree_of(self._sddnode)
+        if vtree is NULL:
+            return -1
+        return sddapi_c.sdd_vtree_position(vtree)
+
     def vtree2(self):
         """Returns the vtree of an SDD node."""
         return Vtree.wrap(self._sddnode.vtree, is_ref=True)
@@ -245,7 +435,12 @@ cdef class SddNode:
         return model
 
     def models(self, Vtree vtree=None):
-        """A generator for the models of an SDD."""
+        """A generator for the models of an SDD.
+
+        :param vtree: Vtree for which the models are generated (default is the vtree of the node,
+            or the vtree of the manager for true)
+        :return: Generator of dictionaries {variable: value}
+        """
         if self.is_false():
             raise ValueError("False has no models")
         if vtree is None:
@@ -253,35 +448,66 @@ cdef class SddNode:
                 vtree = self.manager.vtree()
             else:
                 vtree = self.vtree()
-        if vtree.is_leaf():
-            var = vtree.var()
-            if self.is_true():
-                yield {var:0}
-                yield {var:1}
-            elif self.is_literal():
-                sign = 0 if self.literal < 0 else 1
-                yield {var:sign}
-        else:
-            if self.is_true():  # sdd is true
-                for left in self.models(vtree.left()):
-                    for right in self.models(vtree.right()):
-                        yield SddNode._join_models(left,right)
-            elif self.vtree() == vtree:
-                for prime,sub in self.elements():
-                    if sub.is_false(): continue
-                    for left in prime.models(vtree.left()):
-                        for right in sub.models(vtree.right()):
-                            yield SddNode._join_models(left,right)
-            else:  # fill in gap in vtree
-                true_sdd = self.manager.true()
-                if Vtree.is_sub(self.vtree(),vtree.left()):
-                    for left in self.models(vtree.left()):
-                        for right in true_sdd.models(vtree.right()):
-                            yield SddNode._join_models(left,right)
-                else:
-                   for left in true_sdd.models(vtree.left()):
-                        for right in self.models(vtree.right()):
-                            yield SddNode._join_models(left,right)
+        variables = vtree.to_arrays()[2]
+        variables = variables[variables > 0].tolist()
+        for block in self.model_blocks(variables, vtree=vtree):
+            for row in block.tolist():
+                yield dict(zip(variables, row))
+
+    def model_blocks(self, variables=None, Py_ssize_t block_size=65536, limit=None, Py_ssize_t offset=0,
+                     packed=False, Vtree vtree=None):
+        """A generator for the models of an SDD, in blocks of rows of a NumPy array.
+
+        The models are enumerated iteratively (in C), in the same order as models().
+        If variables does not contain all variables of the vtree, the models are projected on
+        the given variables (the other variables are existentially quantified out first), every
+        projected model is generated once.
+
+        The SDD manager should not be minimized while the generator is used.
+
+        :param variables: Variables in the columns of the arrays (default is all variables of the manager)
+        :param block_size: Maximal number of models per block
+        :param limit: Maximal number of models to generate
+        :param offset: Number of models to skip
+        :param packed: Pack the values of every model in bits (see numpy.packbits)
+        :param vtree: Vtree for which the models are generated (default is the vtree of the manager)
+        :return: Generator of arrays of shape (<nb_models>, <nb_variables>) with values 0 and 1 (uint8),
+            or (<nb_models>, ceil(<nb_variables>/8)) if packed
+        """
+        var_count = self._manager.var_count()
+        if variables is None:
+            variables = range(1, var_count + 1)
+        variables = np.asarray(variables, dtype=np.int64).reshape(-1)
+        if len(variables) > 0 and (variables.min() < 1 or variables.max() > var_count):
+            raise ValueError("Variables should be between 1 and {}".format(var_count))
+        if block_size < 1:
+            raise ValueError("The block size should be positive")
+        if vtree is None:
+            vtree = self._manager.vtree()
+        node = self
+        vtree_vars = vtree.to_arrays()[2]
+        exists_map = np.zeros(var_count + 1, dtype=np.intc)
+        exists_map[vtree_vars[vtree_vars > 0]] = 1
+        exists_map[variables] = 0
+        if exists_map.any():
+            node = self._manager.exists_multiple(exists_map, self)
+        cdef _ModelEnumerator enumerator = _ModelEnumerator(node, vtree, variables)
+        for _ in range(offset):
+            if not enumerator.next_model():
+                return
+        cdef Py_ssize_t count
+        while limit is None or limit > 0:
+            size = block_size if limit is None else min(block_size, limit)
+            block = np.empty((size, len(variables)), dtype=np.uint8)
+            count = enumerator.fill(block)
+            if count == 0:
+                return
+            if limit is not None:
+                limit -= count
+            block = block[:count]
+            yield np.packbits(block, axis=1) if packed else block
+            if count < size:
+                return
 
     def wmc(self, log_mode=True):
         """Create a WmcManager to perform Weighted Model Counting with this node as root.
@@ -325,10 +551,12 @@ cdef class SddNode:
         #print(t)
         print("{0:x}".format(<size_t>&self._sddnode))
 
-    def save(self, char* filename):
+    def save(self, filename):
+        """Saves the SDD to a file or file object, see SddManager.save."""
         return self._manager.save(filename, self)
 
-    def save_as_dot(self, char* filename):
+    def save_as_dot(self, filename):
+        """Saves the SDD to a file or file object, see SddManager.save_as_dot."""
         return self._manager.save_as_dot(filename, self)
 
     def dot(self):
@@ -353,6 +581,164 @@ cdef class SddNode:
 
 
 @cython.embedsignature(True)
+cdef class _ModelEnumerator:
+    """Iterative enumeration of the models of an SDD (see SddNode.model_blocks).
+
+    A model is determined by the choices made while expanding the SDD top-down: an element of
+    every decision node and a value for every free (projected) variable. The expansion is stored
+    as a list of frames in preorder. The next model is found as with an odometer: the last frame
+    with an untried choice is advanced, and all frames after it are expanded again.
+    """
+    cdef SddNode node
+    cdef sddapi_c.SddNode* true_node
+    cdef sddapi_c.Vtree* root
+    cdef Py_ssize_t capacity
+    cdef Py_ssize_t frame_count
+    cdef Py_ssize_t* choices
+    cdef Py_ssize_t* options
+    cdef sddapi_c.SddNode** stack_nodes
+    cdef sddapi_c.Vtree** stack_vtrees
+    cdef Py_ssize_t* columns
+    cdef unsigned char* values
+    cdef Py_ssize_t value_count
+    cdef int started
+    cdef int finished
+
+    def __cinit__(self, SddNode node, Vtree vtree, variables):
+        cdef Py_ssize_t i
+        cdef sddapi_c.SddLiteral var_count = node._manager.var_count()
+        self.node = node
+        self.true_node = sddapi_c.sdd_manager_true(node._manager._sddmanager)
+        self.root = vtree._vtree
+        # Every frame and every task on the stack is a different vtree node
+        self.capacity = 2 * var_count
+        self.choices = <Py_ssize_t*> PyMem_Malloc(self.capacity * sizeof(Py_ssize_t))
+        self.options = <Py_ssize_t*> PyMem_Malloc(self.capacity * sizeof(Py_ssize_t))
+        self.stack_nodes = <sddapi_c.SddNode**> PyMem_Malloc(self.capacity * sizeof(sddapi_c.SddNode*))
+        self.stack_vtrees = <sddapi_c.Vtree**> PyMem_Malloc(self.capacity * sizeof(sddapi_c.Vtree*))
+        self.columns = <Py_ssize_t*> PyMem_Malloc((var_count + 1) * sizeof(Py_ssize_t))
+        self.value_count = len(variables)
+        self.values = <unsigned char*> PyMem_Malloc((self.value_count + 1) * sizeof(unsigned char))
+        if self.choices == NULL or self.options == NULL or self.stack_nodes == NULL or \
+                self.stack_vtrees == NULL or self.columns == NULL or self.values == NULL:
+            raise MemoryError()
+        for i in range(var_count + 1):
+            self.columns[i] = -1
+        for i, var in enumerate(variables):
+            self.columns[var] = i
+        for i in range(self.value_count):
+            self.values[i] = 0
+        self.frame_count = 0
+        self.started = 0
+        self.finished = sddapi_c.sdd_node_is_false(node._sddnode)
+        sddapi_c.sdd_ref(node._sddnode, node._manager._sddmanager)
+
+    def __dealloc__(self):
+        if self.node is not None:
+            sddapi_c.sdd_deref(self.node._sddnode, self.node._manager._sddmanager)
+        PyMem_Free(self.choices)
+        PyMem_Free(self.options)
+        PyMem_Free(self.stack_nodes)
+        PyMem_Free(self.stack_vtrees)
+        PyMem_Free(self.columns)
+        PyMem_Free(self.values)
+
+    cdef void expand(self, Py_ssize_t fixed) noexcept nogil:
+        """Expand the SDD from the root, keeping the choices of the frames up to fixed."""
+        cdef Py_ssize_t top = 0, t = 0, choice, count, i, m
+        cdef sddapi_c.SddNode* node
+        cdef sddapi_c.SddNode** elements
+        cdef sddapi_c.Vtree* vtree
+        cdef sddapi_c.Vtree* node_vtree
+        cdef sddapi_c.SddLiteral lit
+        cdef Py_ssize_t column
+        self.stack_nodes[0] = self.node._sddnode
+        self.stack_vtrees[0] = self.root
+        top = 1
+        while top > 0:
+            top -= 1
+            node = self.stack_nodes[top]
+            vtree = self.stack_vtrees[top]
+            choice = self.choices[t] if t <= fixed else 0
+            count = 1
+            if sddapi_c.sdd_vtree_is_leaf(vtree):
+                column = self.columns[sddapi_c.sdd_vtree_var(vtree)]
+                if sddapi_c.sdd_node_is_literal(node):
+                    lit = sddapi_c.sdd_node_literal(node)
+                    if column >= 0:
+                        self.values[column] = 1 if lit > 0 else 0
+                elif column >= 0:  # true, both values
+                    count = 2
+                    self.values[column] = choice
+            elif sddapi_c.sdd_node_is_true(node):
+                self.stack_nodes[top] = node
+                self.stack_vtrees[top] = sddapi_c.sdd_vtree_right(vtree)
+                self.stack_nodes[top + 1] = node
+                self.stack_vtrees[top + 1] = sddapi_c.sdd_vtree_left(vtree)
+                top += 2
+            else:
+                node_vtree = sddapi_c.sdd_vtree_of(node)
+                if node_vtree == vtree:
+                    # Elements with a false sub have no models
+                    m = sddapi_c.sdd_node_size(node)
+                    elements = sddapi_c.sdd_node_elements(node)
+                    count = 0
+                    for i in range(m):
+                        if not sddapi_c.sdd_node_is_false(elements[2 * i + 1]):
+                            if count == choice:
+                                self.stack_nodes[top] = elements[2 * i + 1]
+                                self.stack_vtrees[top] = sddapi_c.sdd_vtree_right(vtree)
+                                self.stack_nodes[top + 1] = elements[2 * i]
+                                self.stack_vtrees[top + 1] = sddapi_c.sdd_vtree_left(vtree)
+                            count += 1
+                    top += 2
+                elif sddapi_c.sdd_vtree_is_sub(node_vtree, sddapi_c.sdd_vtree_left(vtree)):
+                    self.stack_nodes[top] = self.true_node
+                    self.stack_vtrees[top] = sddapi_c.sdd_vtree_right(vtree)
+                    self.stack_nodes[top + 1] = node
+                    self.stack_vtrees[top + 1] = sddapi_c.sdd_vtree_left(vtree)
+                    top += 2
+                else:
+                    self.stack_nodes[top] = node
+                    self.stack_vtrees[top] = sddapi_c.sdd_vtree_right(vtree)
+                    self.stack_nodes[top + 1] = self.true_node
+                    self.stack_vtrees[top + 1] = sddapi_c.sdd_vtree_left(vtree)
+                    top += 2
+            self.choices[t] = choice
+            self.options[t] = count
+            t += 1
+        self.frame_count = t
+
+    cdef int next_model(self) noexcept nogil:
+        """Move to the next model, returns 0 if there are no more models."""
+        cdef Py_ssize_t t
+        if self.finished:
+            return 0
+        if not self.started:
+            self.started = 1
+            self.expand(-1)
+            return 1
+        t = self.frame_count - 1
+        while t >= 0 and self.choices[t] + 1 >= self.options[t]:
+            t -= 1
+        if t < 0:
+            self.finished = 1
+            return 0
+        self.choices[t] += 1
+        self.expand(t)
+        return 1
+
+    cdef Py_ssize_t fill(self, unsigned char[:, ::1] block):
+        """Write the next models in the rows of block, returns the number of models."""
+        cdef Py_ssize_t r = 0, c
+        with nogil:
+            while r < block.shape[0] and self.next_model():
+                for c in range(self.value_count):
+                    block[r, c] = self.values[c]
+                r += 1
+        return r
+
+
 cdef class SddManager:
     """Creates a new SDD manager, either given a vtree or using a balanced vtree over the given number of variables.
 
@@ -376,11 +762,17 @@ cdef class SddManager:
     in an SDD manager, then the variables are referred to as 1, . . . , n. Literals
     are referred to by signed indices. For example, given the i-th variable, we
     refer to its positive literal by i and its negative literal by −i.
+
+    Long running operations (compilation, apply, minimization) release the GIL. Different
+    managers can thus be used in parallel from multiple threads, but a single manager should
+    only be used by one thread at a time. Different WmcManagers can propagate concurrently, also
+    when they belong to the same manager (as long as that manager is not used at the same time).
     """
     cdef sddapi_c.SddManager* _sddmanager
     cdef bint _prevent_transformation # Sect 5.2: Transformations with auto_gc_and_minimize can invalidate WMCManager
     cdef CompilerOptions options
     cdef public object root
+    cdef dict _timings  # Number of calls and total wall-clock time of long running operations, by name
 
     ## Creating managers (Sec 5.1.1)
 
@@ -390,6 +782,7 @@ cdef class SddManager:
     def __cinit__(self, long long var_count=1, bint auto_gc_and_minimize=False, Vtree vtree=None):
         self.options = CompilerOptions()
         self.root = None
+        self._timings = {}
         if vtree is not None:
             self._sddmanager = sddapi_c.sdd_manager_new(vtree._vtree)
             if self._sddmanager is NULL:
@@ -713,21 +1106,83 @@ cdef class SddManager:
         if self.is_prevent_transformation_on() and self.is_auto_gc_and_minimize_on():
             raise EnvironmentError("Transformation is not allowed when prevent_transformation and auto garbage "
                                    "collection and SDD minimization is active")
-        return SddNode.wrap(sddapi_c.sdd_apply(node1._sddnode, node2._sddnode, op, self._sddmanager), self)
+        cdef sddapi_c.SddNode* node1_c = node1._sddnode
+        cdef sddapi_c.SddNode* node2_c = node2._sddnode
+        cdef sddapi_c.SddNode* result_c
+        with nogil:
+            result_c = sddapi_c.sdd_apply(node1_c, node2_c, op, self._sddmanager)
+        return SddNode.wrap(result_c, self)
 
     def conjoin(self, SddNode node1, SddNode node2):
         """Returns the result of applying the corresponding Boolean operation on the given SDDs."""
         if self.is_prevent_transformation_on() and self.is_auto_gc_and_minimize_on():
             raise EnvironmentError("Transformation is not allowed when prevent_transformation and auto garbage "
                                    "collection and SDD minimization is active")
-        return SddNode.wrap(sddapi_c.sdd_conjoin(node1._sddnode, node2._sddnode, self._sddmanager), self)
+        cdef sddapi_c.SddNode* node1_c = node1._sddnode
+        cdef sddapi_c.SddNode* node2_c = node2._sddnode
+        cdef sddapi_c.SddNode* result_c
+        with nogil:
+            result_c = sddapi_c.sdd_conjoin(node1_c, node2_c, self._sddmanager)
+        return SddNode.wrap(result_c, self)
 
     def disjoin(self, SddNode node1, SddNode node2):
         """Returns the result of applying the corresponding Boolean operation on the given SDDs."""
         if self.is_prevent_transformation_on() and self.is_auto_gc_and_minimize_on():
             raise EnvironmentError("Transformation is not allowed when prevent_transformation and auto garbage "
                                    "collection and SDD minimization is active")
-        return SddNode.wrap(sddapi_c.sdd_disjoin(node1._sddnode, node2._sddnode, self._sddmanager), self)
+        cdef sddapi_c.SddNode* node1_c = node1._sddnode
+        cdef sddapi_c.SddNode* node2_c = node2._sddnode
+        cdef sddapi_c.SddNode* result_c
+        with nogil:
+            result_c = sddapi_c.sdd_disjoin(node1_c, node2_c, self._sddmanager)
+        return SddNode.wrap(result_c, self)
+
+    def conjoin_all(self, nodes):
+        """Returns the conjunction of a sequence of SDDs.
+
+        The conjunctions are performed in C, ordered by the vtree nodes that the SDDs are normalized for
+        (similar to the order of the clauses in the CNF compiler). The nodes do not need to be referenced,
+        this is done internally while the result is computed.
+
+        :param nodes: Sequence of SddNodes
+        :return: SddNode
+        """
+        return self._apply_all(nodes, 0)
+
+    def disjoin_all(self, nodes):
+        """Returns the disjunction of a sequence of SDDs.
+
+        See conjoin_all.
+
+        :param nodes: Sequence of SddNodes
+        :return: SddNode
+        """
+        return self._apply_all(nodes, 1)
+
+    def _apply_all(self, nodes, sddapi_c.BoolOp op):
+        if self.is_prevent_transformation_on() and self.is_auto_gc_and_minimize_on():
+            raise EnvironmentError("Transformation is not allowed when prevent_transformation and auto garbage "
+                                   "collection and SDD minimization is active")
+        nodes = list(nodes)
+        cdef sddapi_c.SddSize size_c = len(nodes)
+        cdef sddapi_c.SddNode** nodes_c = <sddapi_c.SddNode**> PyMem_Malloc((size_c + 1) * sizeof(sddapi_c.SddNode*))
+        if not nodes_c:
+            raise MemoryError("Could not create array of SddNodes")
+        cdef sddapi_c.SddNode* result_c
+        cdef SddNode node
+        try:
+            for i in range(size_c):
+                if not isinstance(nodes[i], SddNode):
+                    raise TypeError(f"Incorrect type ({type(nodes[i])}), expects an SddNode")
+                node = nodes[i]
+                if node._manager._sddmanager != self._sddmanager:
+                    raise ValueError("SddNode belongs to a different manager")
+                nodes_c[i] = node._sddnode
+            with nogil:
+                result_c = sddapi_c.sdd_apply_multiple(size_c, nodes_c, op, self._sddmanager)
+        finally:
+            PyMem_Free(nodes_c)
+        return SddNode.wrap(result_c, self)
 
     def negate(self, SddNode node):
         """Returns the result of applying the corresponding Boolean operation on the given SDDs."""
@@ -738,17 +1193,45 @@ cdef class SddManager:
 
     def condition(self, lit, SddNode node):
         """Returns the result of conditioning an SDD on a literal, where a literal is a positive or negative integer."""
-        cdef sddapi_c.SddLiteral lit_int
-        if type(lit) == int:
-            lit_int = lit
+        cdef sddapi_c.SddLiteral lit_int = self._extract_literal(lit)
+        return SddNode.wrap(sddapi_c.sdd_condition(lit_int, node._sddnode, self._sddmanager), self)
+
+    def _extract_literal(self, lit):
+        if isinstance(lit, numbers.Integral) and not isinstance(lit, bool):
+            return int(lit)
         elif isinstance(lit, SddNode):
             if lit.is_literal():
-                lit_int = lit.literal
+                return lit.literal
             else:
                 raise ValueError(f"SddNode needs to represent a literal")
         else:
             raise TypeError(f"Incorrect literal type ({type(lit)}), expects int or an SddNode")
-        return SddNode.wrap(sddapi_c.sdd_condition(lit_int, node._sddnode, self._sddmanager), self)
+
+    def condition_multiple(self, literals, SddNode node):
+        """Returns the result of conditioning an SDD on a set of literals (a partial assignment).
+
+        This function is expected to be more efficient than conditioning on the literals one at a time,
+        the SDD is conditioned in one bottom-up pass. Conditioning on a literal and its negation
+        returns false.
+
+        :param literals: Array or list of literals (positive or negative integers, or SddNodes that
+            represent literals)
+        :param node: SddNode
+        :return: SddNode
+        """
+        if not isinstance(literals, np.ndarray):
+            literals = [self._extract_literal(literal) for literal in literals]
+        cdef sddapi_c.SddLiteral[::1] literals_c = np.array(literals, dtype=np.int64).reshape(-1)
+        cdef sddapi_c.SddLiteral var_count = self.var_count()
+        cdef sddapi_c.SddLiteral lit
+        for lit in literals_c:
+            if lit == 0 or abs(lit) > var_count:
+                raise ValueError(f"Literal {lit} does not belong to a variable in the manager (1 ... {var_count})")
+        cdef sddapi_c.SddLiteral* literals_ptr = NULL
+        if len(literals_c) > 0:
+            literals_ptr = &literals_c[0]
+        return SddNode.wrap(sddapi_c.sdd_condition_multiple(len(literals_c), literals_ptr, node._sddnode,
+                                                            self._sddmanager), self)
 
     def exists(self, sddapi_c.SddLiteral var, SddNode node):
         """Returns the result of existentially (universally) quantifying out a variable from an SDD."""
@@ -813,13 +1296,61 @@ cdef class SddManager:
         return sddapi_c.sdd_minimum_cardinality(node._sddnode)
 
     def model_count(self, SddNode node):
-        """Returns the model count of an SDD (i.e., with respect to the SDD variables)."""
+        """Returns the model count of an SDD (i.e., with respect to the SDD variables).
+
+        The count is a 64-bit integer and overflows for more than 64 variables, see model_count_exact.
+        """
         return sddapi_c.sdd_model_count(node._sddnode, self._sddmanager)
 
     def global_model_count(self, SddNode node):
-        """Returns the global model count of an SDD (i.e., with respect to the manager variables)."""
+        """Returns the global model count of an SDD (i.e., with respect to the manager variables).
+
+        The count is a 64-bit integer and overflows for more than 64 variables, see global_model_count_exact.
+        """
         return sddapi_c.sdd_global_model_count(node._sddnode, self._sddmanager)
 
+    def _model_count_exact(self, SddNode node, int is_global):
+        cdef uint32_t* limbs = NULL
+        cdef sddapi_c.SddSize length
+        with nogil:
+            length = sddapi_c.sdd_exact_model_count(node._sddnode, is_global, &limbs, self._sddmanager)
+        try:
+            if length == 0:
+                return 0
+            # The limbs are 32-bit little-endian words in native byte order
+            return int.from_bytes(np.asarray(<uint32_t[:length]> limbs).astype("<u4").tobytes(), "little")
+        finally:
+            free(limbs)
+
+    def model_count_exact(self, SddNode node):
+        """Returns the model count of an SDD (i.e., with respect to the SDD variables) as an
+        arbitrary precision integer.
+
+        The same count as model_count, but without overflow.
+        """
+        return self._model_count_exact(node, 0)
+
+    def global_model_count_exact(self, SddNode node):
+        """Returns the global model count of an SDD (i.e., with respect to the manager variables) as an
+        arbitrary precision integer.
+
+        The same count as global_model_count, but without overflow.
+        """
+        return self._model_count_exact(node, 1)
+
+    def log2_model_count(self, SddNode node, global_count=False):
+        """Returns the base-2 logarithm of the model count of an SDD (-inf if the SDD is false).
+
+        :param node: SddNode
+        :param global_count: Count with respect to the manager variables instead of the SDD variables
+        :return: Float
+        """
+        cdef int is_global = 1 if global_count else 0
+        cdef double result
+        with nogil:
+            result = sddapi_c.sdd_log2_model_count(node._sddnode, is_global, self._sddmanager)
+        return result
+
     def rename_variables(self, SddNode node, sddapi_c.SddLiteral[:] variable_map):
         """Returns an SDD which is obtained by renaming variables in the SDD node.  The array variable_map has size n+1, where n is the number of variables in the manager.  A variable i, 1 <= i <= n, that appears in the given SDD is renamed into variable variable_map[i] (variable_map[0] is not used)."""
 
@@ -858,15 +1389,36 @@ cdef class SddManager:
 
     ## File I/O (Sec 5.2.3)
 
-    def save_as_dot(self, char* filename, SddNode node):
-        """Saves an SDD to ﬁle, formatted for use with Graphviz dot."""
-        sddapi_c.sdd_save_as_dot(filename, node._sddnode)
+    def save_as_dot(self, filename, SddNode node):
+        """Saves an SDD to ﬁle, formatted for use with Graphviz dot.
+
+        :param filename: Filename or a file object (opened in text or binary mode), the output is
+            then written to the file object while it is generated without using a temporary file
+        """
+        cdef bytes filename_b
+        if hasattr(filename, "write"):
+            writer = _Writer(filename)
+            sddapi_c.sdd_write_as_dot(node._sddnode, _write_callback, <void*>writer)
+            writer.check()
+        else:
+            filename_b = os.fsencode(filename)
+            sddapi_c.sdd_save_as_dot(filename_b, node._sddnode)
 
-    def shared_save_as_dot(self, char* filename):
-        """Saves the SDD of the manager’s vtree (a shared SDD), formatted for use with Graphviz dot."""
-        sig_on()
-        sddapi_c.sdd_shared_save_as_dot(filename, self._sddmanager)
-        sig_off()
+    def shared_save_as_dot(self, filename):
+        """Saves the SDD of the manager’s vtree (a shared SDD), formatted for use with Graphviz dot.
+
+        :param filename: Filename or a file object (opened in text or binary mode)
+        """
+        cdef bytes filename_b
+        if hasattr(filename, "write"):
+            writer = _Writer(filename)
+            sddapi_c.sdd_shared_write_as_dot(self._sddmanager, _write_callback, <void*>writer)
+            writer.check()
+        else:
+            filename_b = os.fsencode(filename)
+            sig_on()
+            sddapi_c.sdd_shared_save_as_dot(filename_b, self._sddmanager)
+            sig_off()
 
     def read_sdd_file(self, char* filename):
         """Reads an SDD from ﬁle.
@@ -877,53 +1429,109 @@ cdef class SddManager:
         """
         return SddNode.wrap(sddapi_c.sdd_read(filename, self._sddmanager), self)
 
-    def save(self, char* filename, SddNode node):
+    def circuit_to_sdd(self, circuit):
+        """Construct the SDD represented by a CompiledCircuit (see SddNode.to_arrays) in this manager.
+
+        The vtree of the manager must be the same as the vtree of the circuit. The circuit is
+        validated first (see CompiledCircuit.validate), a ValueError is raised if it is not valid.
+        """
+        circuit.validate()
+        cdef const signed char[::1] types_c = np.ascontiguousarray(circuit.types)
+        cdef const long long[::1] literals_c = np.ascontiguousarray(circuit.literals)
+        cdef const long long[::1] positions_c = np.ascontiguousarray(circuit.vtree_positions)
+        cdef const long long[::1] offsets_c = np.ascontiguousarray(circuit.element_offsets)
+        cdef const long long[::1] primes_c = np.ascontiguousarray(circuit.primes)
+        cdef const long long[::1] subs_c = np.ascontiguousarray(circuit.subs)
+        cdef sddapi_c.SddSize node_count = circuit.node_count
+        cdef sddapi_c.SddNode* node
+        left, right, var = self.vtree().to_arrays()
+        if circuit.var_count != self.var_count() or not (np.array_equal(left, circuit.vtree_left) and
+                np.array_equal(right, circuit.vtree_right) and np.array_equal(var, circuit.vtree_vars)):
+            raise ValueError("The vtree of the circuit differs from the vtree of the manager")
+        if circuit.element_count == 0:  # no decision nodes
+            primes_c = subs_c = offsets_c
+        node = sddapi_c.sdd_from_arrays(node_count, <const char*>&types_c[0], &literals_c[0], &positions_c[0],
+                                        &offsets_c[0], &primes_c[0], &subs_c[0], self._sddmanager)
+        return SddNode.wrap(node, self)
+
+    @staticmethod
+    def from_circuit(circuit):
+        """Create a manager with the vtree of the CompiledCircuit and construct its SDD.
+
+        :return: Tuple (manager, node)
+        """
+        vtree = Vtree.from_arrays(circuit.vtree_left, circuit.vtree_right, circuit.vtree_vars)
+        mgr = SddManager.from_vtree(vtree)
+        node = mgr.circuit_to_sdd(circuit)
+        mgr.root = node
+        return mgr, node
+
+    def save_binary(self, filename, SddNode node):
+        """Saves an SDD, together with the vtree of the manager, to a binary file.
+
+        The binary format is faster to read and write than the textual format and can be memory
+        mapped (see CompiledCircuit.load).
+        """
+        node.to_arrays().save(filename)
+
+    def read_binary_file(self, filename):
+        """Reads an SDD from a binary file (see save_binary) in this manager.
+
+        The vtree of the manager must be the same as the vtree stored in the file.
+        """
+        return self.circuit_to_sdd(CompiledCircuit.load(filename, validate=False))
+
+    @staticmethod
+    def from_binary_file(filename):
+        """Create a manager and SDD from a binary file (see save_binary).
+
+        :return: Tuple (manager, node)
+        """
+        return SddManager.from_circuit(CompiledCircuit.load(filename, validate=False))
+
+    def save(self, filename, SddNode node):
         """Saves an SDD to ﬁle.
 
         Typically, one also saves the corresponding vtree to ﬁle. This allows one to read the SDD
         back using the same vtree.
+
+        :param filename: Filename or a file object (opened in text or binary mode), the output is
+            then written to the file object while it is generated without using a temporary file
         """
-        sddapi_c.sdd_save(filename, node._sddnode)
+        cdef bytes filename_b
+        if hasattr(filename, "write"):
+            writer = _Writer(filename)
+            sddapi_c.sdd_write(node._sddnode, _write_callback, <void*>writer)
+            writer.check()
+        else:
+            filename_b = os.fsencode(filename)
+            sddapi_c.sdd_save(filename_b, node._sddnode)
 
     def dot(self, SddNode node=None):
         """SDD for the given node, formatted for use with Graphviz dot."""
         if node is None:
             return self.dot_shared()
-        fname = None
-        cdef bytes fname_b
-        cdef char* fname_c
-        result = None
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            fname = os.path.join(tmpdirname, "sdd.dot")
-            fname_b = fname.encode()
-            fname_c = fname_b
-            self.save_as_dot(fname_c, node)
-            with open(fname, "r") as ifile:
-                result = ifile.read()
-        return result
+        writer = _Writer()
+        sddapi_c.sdd_write_as_dot(node._sddnode, _write_callback, <void*>writer)
+        return writer.getvalue()
 
     def dot_shared(self):
         """Shared SDD, formatted for use with Graphviz dot."""
-        fname = None
-        cdef bytes fname_b
-        cdef char* fname_c
-        result = None
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            fname = os.path.join(tmpdirname, "sdd.dot")
-            fname_b = fname.encode()
-            fname_c = fname_b
-            self.shared_save_as_dot(fname_c)
-            with open(fname, "r") as ifile:
-                result = ifile.read()
-        return result
+        writer = _Writer()
+        sddapi_c.sdd_shared_write_as_dot(self._sddmanager, _write_callback, <void*>writer)
+        return writer.getvalue()
 
     # Read CNF
 
     @staticmethod
-    def from_cnf_file(char* filename, char* vtree_type="balanced"):
-        """Create an SDD from the given CNF file."""
+    def from_cnf_file(char* filename, char* vtree_type="balanced", cache_dir=None, **limits):
+        """Create an SDD from the given CNF file.
+
+        The keyword arguments timeout, max_node_count, max_memory and cancel are passed to fnf_to_sdd.
+        See from_fnf for cache_dir.
+        """
         cdef Fnf cnf = Fnf.from_cnf_file(filename)
-        return SddManager.from_fnf(cnf, vtree_type)
+        return SddManager.from_fnf(cnf, vtree_type, cache_dir=cache_dir, **limits)
 
     def read_cnf_file(self, filename):
         """Replace the SDD by an SDD representing the theory in the given CNF file."""
@@ -931,25 +1539,37 @@ cdef class SddManager:
         return self.fnf_to_sdd(cnf)
 
     @staticmethod
-    def from_cnf_string(cnf, char* vtree_type="balanced"):
-        """Create an SDD from the given CNF string."""
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            fname = os.path.join(tmpdirname, "program.cnf")
-            fname_b = fname.encode()
-            fname_c = fname_b
-            with open(fname, "w") as ofile:
-                ofile.write(cnf)
-            return SddManager.from_cnf_file(fname_c, vtree_type)
-        return None, None
+    def from_cnf_string(cnf, char* vtree_type="balanced", cache_dir=None, **limits):
+        """Create an SDD from the given CNF string.
+
+        The keyword arguments timeout, max_node_count, max_memory and cancel are passed to fnf_to_sdd.
+        See from_fnf for cache_dir.
+        """
+        cdef Fnf fnf = Fnf.from_cnf_string(cnf)
+        return SddManager.from_fnf(fnf, vtree_type, cache_dir=cache_dir, **limits)
+
+    @staticmethod
+    def from_clauses(clauses, var_count=None, char* vtree_type="balanced", cache_dir=None, **limits):
+        """Create an SDD from the given clauses, see Fnf.from_clauses.
+
+        The keyword arguments timeout, max_node_count, max_memory and cancel are passed to fnf_to_sdd.
+        See from_fnf for cache_dir.
+        """
+        cdef Fnf fnf = Fnf.from_clauses(clauses, var_count)
+        return SddManager.from_fnf(fnf, vtree_type, cache_dir=cache_dir, **limits)
 
 
     # Read DNF
 
     @staticmethod
-    def from_dnf_file(char* filename, char* vtree_type="balanced"):
-        """Create an SDD from the given DNF file."""
+    def from_dnf_file(char* filename, char* vtree_type="balanced", cache_dir=None, **limits):
+        """Create an SDD from the given DNF file.
+
+        The keyword arguments timeout, max_node_count, max_memory and cancel are passed to fnf_to_sdd.
+        See from_fnf for cache_dir.
+        """
         cdef Fnf dnf = Fnf.from_dnf_file(filename)
-        return SddManager.from_fnf(dnf, vtree_type)
+        return SddManager.from_fnf(dnf, vtree_type, cache_dir=cache_dir, **limits)
 
     def read_dnf_file(self, filename):
         """Replace the SDD by an SDD representing the theory in the given DNF file."""
@@ -957,37 +1577,119 @@ cdef class SddManager:
         return self.fnf_to_sdd(dnf)
 
     @staticmethod
-    def from_dnf_string(dnf, char* vtree_type="balanced"):
-        """Create an SDD from the given DNF string."""
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            fname = os.path.join(tmpdirname, "program.dnf")
-            fname_b = fname.encode()
-            fname_c = fname_b
-            with open(fname, "w") as ofile:
-                ofile.write(dnf)
-            return SddManager.from_dnf_file(fname_c, vtree_type)
-        return None, None
+    def from_dnf_string(dnf, char* vtree_type="balanced", cache_dir=None, **limits):
+        """Create an SDD from the given DNF string.
+
+        The keyword arguments timeout, max_node_count, max_memory and cancel are passed to fnf_to_sdd.
+        See from_fnf for cache_dir.
+        """
+        cdef Fnf fnf = Fnf.from_dnf_string(dnf)
+        return SddManager.from_fnf(fnf, vtree_type, cache_dir=cache_dir, **limits)
 
 
     # Read FNF
 
     @staticmethod
-    def from_fnf(Fnf fnf, char* vtree_type="balanced"):
-        """Create an SDD from the given DNF file."""
+    def from_fnf(Fnf fnf, char* vtree_type="balanced", timeout=None, max_node_count=None, max_memory=None,
+                 CancellationToken cancel=None, cache_dir=None):
+        """Create an SDD from the given CNF or DNF.
+
+        See fnf_to_sdd for the limits on the compilation. If the compilation is stopped, the
+        CompilationAborted exception has the new manager as attribute manager.
+
+        :param cache_dir: Directory of a persistent compilation cache, or a pysdd.cache.CompilationCache
+            (e.g. to limit its size). The cache is keyed by the normalized literal sets, the initial vtree
+            and the compiler options. On a hit, the SDD and the vtree are loaded instead of compiled,
+            otherwise the result of the compilation is stored in the cache.
+        """
         vtree = Vtree(var_count=fnf.var_count, vtree_type=vtree_type)
-        mgr = SddManager(vtree=vtree)
+        cdef SddManager mgr = SddManager(vtree=vtree)
         mgr.auto_gc_and_minimize_off()  # Having this on while building triggers segfault
+        cache = None
+        if cache_dir is not None:
+            from .cache import get_cache
+            cache = get_cache(cache_dir)
+            key = cache.key(fnf, vtree, (mgr.options.vtree_search_mode, mgr.options.post_search,
+                                         mgr.options.minimize_cardinality))
+            cached = cache.load(key)
+            if cached is not None:
+                # Leave the manager in the same state as the compiler (see fnf_to_sdd_limited)
+                if mgr.options.vtree_search_mode < 0 and not fnf._is_degenerate():
+                    cached[0].auto_gc_and_minimize_on()
+                return cached
         # cli.initialize_manager_search_state(self._sddmanager)  # not required anymore in 2.0?
-        # TODO: Add interruption to compilation (e.g. for timeouts)
-        rnode = SddNode.wrap(compiler_c.fnf_to_sdd(fnf._fnf, mgr._sddmanager), mgr)
+        try:
+            rnode = mgr.fnf_to_sdd(fnf, timeout=timeout, max_node_count=max_node_count,
+                                   max_memory=max_memory, cancel=cancel)
+        except CompilationAborted as exc:
+            exc.manager = mgr
+            raise
         mgr.root = rnode
+        if cache is not None:
+            cache.store(key, rnode)
         # mgr.auto_gc_and_minimize_off()
         return mgr, rnode
 
 
-    def fnf_to_sdd(self, Fnf fnf):
-        rnode = SddNode.wrap(compiler_c.fnf_to_sdd(fnf._fnf, self._sddmanager), self)
-        return rnode
+    def fnf_to_sdd(self, Fnf fnf, timeout=None, max_node_count=None, max_memory=None,
+                   CancellationToken cancel=None):
+        """Compile the given CNF or DNF to an SDD.
+
+        The GIL is released during compilation, other Python threads can thus continue (e.g. to
+        compile with another manager).
+
+        The limits are checked in between literal sets (clauses or terms). A timeout or cancellation
+        also aborts a running vtree search (automatic or periodic), a single apply is not interrupted.
+        When a limit is exceeded, the compilation stops and CompilationAborted is raised. The manager
+        remains usable, the partially compiled SDD is claimed by the next garbage collection.
+
+        :param timeout: Maximal compilation time in seconds
+        :param max_node_count: Maximal number of nodes in the manager (after garbage collection)
+        :param max_memory: Maximal memory in MB used by the nodes in the manager (after garbage collection)
+        :param cancel: CancellationToken to stop the compilation from another thread
+        :return: SddNode
+        """
+        cdef compiler_c.Fnf* fnf_c = fnf._fnf
+        cdef sddapi_c.SddNode* result_c
+        cdef compiler_c.FnfLimits limits
+        cdef CancellationToken timer_token = None
+        start = time.perf_counter()
+        if timeout is None and max_node_count is None and max_memory is None and cancel is None:
+            with nogil:
+                result_c = compiler_c.fnf_to_sdd(fnf_c, self._sddmanager)
+            self._add_timing("fnf_to_sdd", start)
+            return SddNode.wrap(result_c, self)
+
+        limits.max_node_count = 0 if max_node_count is None else max_node_count
+        limits.max_memory = 0 if max_memory is None else int(max_memory * 1024 * 1024)
+        limits.cancelled = NULL if cancel is None else &cancel._cancelled
+        limits.timed_out = NULL
+        timer = None
+        if timeout is not None:
+            timer_token = CancellationToken()
+            limits.timed_out = &timer_token._cancelled
+            timer = threading.Timer(timeout, timer_token.cancel)
+            timer.daemon = True
+        if timer is not None:
+            timer.start()
+        try:
+            with nogil:
+                result_c = compiler_c.fnf_to_sdd_limited(fnf_c, self._sddmanager, &limits)
+        finally:
+            if timer is not None:
+                timer.cancel()
+        self._add_timing("fnf_to_sdd", start)
+        if result_c is NULL:
+            stats = {
+                "litsets_done": limits.litset_done_count,
+                "litset_count": fnf.litset_count,
+                "elapsed": time.perf_counter() - start,
+                "node_count": self.count(),
+                "live_count": self.live_count(),
+                "memory_mb": sddapi_c.sdd_manager_memory(self._sddmanager) / (1024 * 1024)
+            }
+            raise CompilationAborted(_fnf_abort_reasons[limits.status], stats, self)
+        return SddNode.wrap(result_c, self)
 
 
     ## Manual Garbage Collection (Sec 5.4)
@@ -1007,12 +1709,17 @@ cdef class SddManager:
         This function calls sdd vtree search on the manager’s vtree.
 
         To allow for a timeout, this function can be interrupted by the keyboard interrupt (SIGINT).
+
+        The GIL is released during minimization.
         """
         f = io.StringIO()
+        start = time.perf_counter()
         with redirect_stdout(f):
             sig_on()
-            sddapi_c.sdd_manager_minimize(self._sddmanager)
+            with nogil:
+                sddapi_c.sdd_manager_minimize(self._sddmanager)
             sig_off()
+        self._add_timing("minimize", start)
         s = f.getvalue()
         return s
 
@@ -1023,7 +1730,11 @@ cdef class SddManager:
         return Vtree.wrap(sddapi_c.sdd_vtree_minimize(vtree._vtree, self._sddmanager))
 
     def minimize_limited(self):
-        sddapi_c.sdd_manager_minimize_limited(self._sddmanager)
+        """Same as minimize but with time and size limits (the GIL is released during minimization)."""
+        start = time.perf_counter()
+        with nogil:
+            sddapi_c.sdd_manager_minimize_limited(self._sddmanager)
+        self._add_timing("minimize_limited", start)
 
     def init_vtree_size_limit(self, Vtree vtree):
         sddapi_c.sdd_manager_init_vtree_size_limit(vtree._vtree, self._sddmanager)
@@ -1111,6 +1822,38 @@ cdef class SddManager:
             sddapi_c.sdd_manager_print(self._sddmanager)
         return f.getvalue()
 
+    def stats(self):
+        """Statistics of the manager as a dictionary, read directly from the counters of the manager.
+
+        This does not traverse the SDD nodes and is thus cheap enough to be called frequently, e.g.
+        to export the statistics to a monitoring system. The counters are cumulative since the
+        creation of the manager (except the counts and sizes of the nodes and tables):
+
+        - apply_count, apply_count_top: Recursive and top-level recursive applies
+        - computed_*: Size, number of entries, lookups and hits of the computed cache
+        - unique_table_*: Size, number of entries, lookups, hits and lookup cost of the unique node table
+        - node_count, dead_node_count, sdd_size, dead_sdd_size, memory (bytes): Nodes and elements
+        - gc_count, auto_gc_count: Garbage collections (all and automatic ones)
+        - auto_search_*: Automatic vtree searches, with the time in seconds (CPU time)
+        - lr_count, rr_count, sw_count, failed_*: Vtree operations (left/right rotations and swaps)
+        - <operation>_count, <operation>_time: Number of calls and total time in seconds (wall-clock)
+          of fnf_to_sdd, minimize and minimize_limited
+
+        :return: Dictionary from the name of a counter to its value
+        """
+        cdef sddapi_c.SddManagerCounters counters
+        sddapi_c.sdd_manager_counters(&counters, self._sddmanager)
+        cdef dict stats = counters
+        for name in ["fnf_to_sdd", "minimize", "minimize_limited"]:
+            count, elapsed = self._timings.get(name, (0, 0.0))
+            stats[name + "_count"] = count
+            stats[name + "_time"] = elapsed
+        return stats
+
+    def _add_timing(self, name, start):
+        count, elapsed = self._timings.get(name, (0, 0.0))
+        self._timings[name] = (count + 1, elapsed + time.perf_counter() - start)
+
 
 cdef class Fnf:
     cdef compiler_c.Fnf* _fnf
@@ -1129,6 +1872,8 @@ cdef class Fnf:
     cdef wrap(compiler_c.Fnf* fnf, cnf=False, dnf=False):
         rfnf = Fnf()
         rfnf._fnf = fnf
+        rfnf._type_cnf = cnf
+        rfnf._type_dnf = dnf
         return rfnf
 
     @property
@@ -1139,6 +1884,140 @@ cdef class Fnf:
     def litset_count(self):
         return self._fnf.litset_count
 
+    cdef bint _is_degenerate(self):
+        """True if the Fnf is trivially true or false (see degenerate_fnf_test in the compiler)."""
+        cdef sddapi_c.SddSize i
+        if self._fnf.litset_count == 0:
+            return True
+        for i in range(self._fnf.litset_count):
+            if self._fnf.litsets[i].literal_count == 0:
+                return True
+        return False
+
+    @staticmethod
+    def from_clauses(clauses, var_count=None, dnf=False):
+        """Create a CNF (or DNF) directly from clauses (or terms), without writing or parsing a file.
+
+        :param clauses: An iterable of clauses, where every clause is an iterable of literals (non-zero integers).
+            Alternatively, a 2D NumPy array of integers with one clause per row, zeros are ignored such
+            that rows can be padded with zeros.
+        :param var_count: Number of variables (default is the largest variable in the clauses)
+        :param dnf: The literal sets are terms of a DNF instead of clauses of a CNF
+        :return: Fnf
+        """
+        if isinstance(clauses, np.ndarray) and clauses.ndim == 2:
+            clauses = clauses.astype(np.int64, copy=False)
+            is_literal = clauses != 0
+            literals = clauses[is_literal]
+            offsets = np.zeros(len(clauses) + 1, dtype=np.int64)
+            np.cumsum(is_literal.sum(axis=1), out=offsets[1:])
+        else:
+            literals = array.array('q')
+            offsets = array.array('q', [0])
+            for clause in clauses:
+                literals.extend(clause)
+                offsets.append(len(literals))
+        return Fnf._from_arrays(literals, offsets, var_count, dnf)
+
+    @staticmethod
+    def from_buffer(buffer, var_count=None, dnf=False):
+        """Create a CNF (or DNF) from a flat buffer of literals in which every clause is terminated by a 0.
+
+        This is the body of a DIMACS file as integers, e.g. ``[1, -2, 0, 2, 3, 0]`` for (1 ∨ ¬2) ∧ (2 ∨ 3).
+
+        :param buffer: Array of integers (e.g. a NumPy array or array.array)
+        :param var_count: Number of variables (default is the largest variable in the clauses)
+        :param dnf: The literal sets are terms of a DNF instead of clauses of a CNF
+        :return: Fnf
+        """
+        buffer = np.asarray(buffer, dtype=np.int64).ravel()
+        ends = np.flatnonzero(buffer == 0)
+        if len(ends) != 0 and ends[-1] != len(buffer) - 1 or len(ends) == 0 and len(buffer) != 0:
+            raise ValueError("The last clause is not terminated by a 0")
+        offsets = np.zeros(len(ends) + 1, dtype=np.int64)
+        offsets[1:] = ends - np.arange(len(ends))
+        return Fnf._from_arrays(buffer[buffer != 0], offsets, var_count, dnf)
+
+    @staticmethod
+    def from_cnf_string(cnf):
+        """Create a CNF from a string in the DIMACS format (the same format as for from_cnf_file)."""
+        fnf = Fnf._from_dimacs_string(cnf, False)
+        print("Read CNF: vars={} clauses={}".format(fnf.var_count, fnf.litset_count))
+        return fnf
+
+    @staticmethod
+    def from_dnf_string(dnf):
+        """Create a DNF from a string in the DIMACS format (the same format as for from_dnf_file)."""
+        fnf = Fnf._from_dimacs_string(dnf, True)
+        print("Read CNF: vars={} clauses={}".format(fnf.var_count, fnf.litset_count))
+        return fnf
+
+    @staticmethod
+    def _from_dimacs_string(text, dnf):
+        """Parse a DIMACS string, like the C parser only the number of clauses in the header is read."""
+        if isinstance(text, bytes):
+            text = text.decode()
+        lines = [line for line in text.splitlines() if not line.startswith("c")]
+        header = " ".join(lines[:1]).split()
+        if len(header) != 4 or header[0] != "p" or header[1] != "cnf":
+            raise ValueError("Expected header \"p cnf\"")
+        literals = np.array(" ".join(lines[1:]).split(), dtype=np.int64)
+        clause_count = int(header[3])
+        ends = np.flatnonzero(literals == 0)
+        if len(ends) < clause_count:
+            raise ValueError("Expected {} clauses, found {}".format(clause_count, len(ends)))
+        literals = literals[:ends[clause_count - 1] + 1] if clause_count > 0 else literals[:0]
+        return Fnf.from_buffer(literals, int(header[2]), dnf)
+
+    @staticmethod
+    def _from_arrays(const long long[:] literals, const long long[:] offsets, var_count, bint dnf):
+        """Create an Fnf from the literals of all literal sets and the offset of every literal set."""
+        cdef compiler_c.Fnf* fnf_c
+        cdef compiler_c.LitSet* litset
+        cdef sddapi_c.SddSize i
+        cdef sddapi_c.SddLiteral j, lit, max_var = 0
+        for j in range(literals.shape[0]):
+            lit = literals[j] if literals[j] > 0 else -literals[j]
+            if lit == 0:
+                raise ValueError("Literals should be non-zero integers")
+            if lit > max_var:
+                max_var = lit
+        if var_count is None:
+            var_count = max_var
+        elif var_count < max_var:
+            raise ValueError("Variable {} is larger than var_count={}".format(max_var, var_count))
+        fnf_c = <compiler_c.Fnf*>malloc(sizeof(compiler_c.Fnf))
+        if fnf_c is NULL:
+            raise MemoryError("Could not create Fnf")
+        fnf_c.var_count = var_count
+        fnf_c.litset_count = offsets.shape[0] - 1
+        fnf_c.op = sddapi_c.DISJOIN if dnf else sddapi_c.CONJOIN
+        fnf_c.litsets = <compiler_c.LitSet*>calloc(fnf_c.litset_count, sizeof(compiler_c.LitSet))
+        fnf = Fnf.wrap(fnf_c, cnf=not dnf, dnf=dnf)
+        if fnf_c.litsets is NULL and fnf_c.litset_count > 0:
+            fnf_c.litset_count = 0
+            raise MemoryError("Could not create Fnf")
+        for i in range(fnf_c.litset_count):
+            litset = &fnf_c.litsets[i]
+            litset.id = i
+            litset.op = sddapi_c.CONJOIN if dnf else sddapi_c.DISJOIN
+            litset.literal_count = offsets[i + 1] - offsets[i]
+            litset.literals = <sddapi_c.SddLiteral*>malloc(litset.literal_count * sizeof(sddapi_c.SddLiteral))
+            if litset.literals is NULL and litset.literal_count > 0:
+                raise MemoryError("Could not create Fnf")
+            for j in range(litset.literal_count):
+                litset.literals[j] = literals[offsets[i] + j]
+        return fnf
+
+    def litsets(self):
+        """Returns the literal sets (clauses for a CNF, terms for a DNF) as a list of lists of literals."""
+        cdef compiler_c.LitSet* litset
+        result = []
+        for i in range(self._fnf.litset_count):
+            litset = &self._fnf.litsets[i]
+            result.append([litset.literals[j] for j in range(litset.literal_count)])
+        return result
+
 
     ## CNF/DNF to SDD Compiler (Sec 6)
 
@@ -1292,6 +2171,22 @@ cdef class Vtree:
         """Create Vtree from file."""
         return Vtree(filename=filename)
 
+    @staticmethod
+    def from_arrays(left, right, var):
+        """Create Vtree from arrays indexed by vtree position, the inverse of Vtree.to_arrays.
+
+        :param left: Position of the left child of every vtree node, -1 for leaves
+        :param right: Position of the right child of every vtree node, -1 for leaves
+        :param var: Variable of every vtree node (ignored for internal nodes)
+        :return: Vtree, a ValueError is raised if the arrays do not represent a vtree
+        """
+        cdef const long long[::1] left_c = np.ascontiguousarray(left, dtype=np.int64)
+        cdef const long long[::1] right_c = np.ascontiguousarray(right, dtype=np.int64)
+        cdef const long long[::1] var_c = np.ascontiguousarray(var, dtype=np.int64)
+        cdef sddapi_c.SddLiteral node_count = left_c.shape[0]
+        cdef sddapi_c.SddLiteral root = validate_vtree_arrays(left_c, right_c, var_c)
+        return Vtree.wrap(sddapi_c.sdd_vtree_from_arrays(node_count, root, &left_c[0], &right_c[0], &var_c[0]))
+
     @staticmethod
     def new_with_var_order(var_count, var_order, vtree_type):
         """Returns a vtree over a given number of variables (var_count), whose left-to-right variable ordering is
@@ -1418,32 +2313,44 @@ cdef class Vtree:
 
     ## File I/O (Sec 5.3.3)
 
-    def save(self, char* filename):
-        """Saves a vtree to file."""
-        sddapi_c.sdd_vtree_save(filename, self._vtree)
+    def save(self, filename):
+        """Saves a vtree to file.
+
+        :param filename: Filename or a file object (opened in text or binary mode)
+        """
+        cdef bytes filename_b
+        if hasattr(filename, "write"):
+            writer = _Writer(filename)
+            sddapi_c.sdd_vtree_write(self._vtree, _write_callback, <void*>writer)
+            writer.check()
+        else:
+            filename_b = os.fsencode(filename)
+            sddapi_c.sdd_vtree_save(filename_b, self._vtree)
 
     def read(self, char* filename):
         """Reads a vtree from file."""
         cdef sddapi_c.Vtree* vtree_ptr = sddapi_c.sdd_vtree_read(filename)
         self._vtree = vtree_ptr
 
-    def save_as_dot(self, char* filename):
-        sddapi_c.sdd_vtree_save_as_dot(filename, self._vtree)
+    def save_as_dot(self, filename):
+        """Saves a vtree to file, formatted for use with Graphviz dot.
+
+        :param filename: Filename or a file object (opened in text or binary mode)
+        """
+        cdef bytes filename_b
+        if hasattr(filename, "write"):
+            writer = _Writer(filename)
+            sddapi_c.sdd_vtree_write_as_dot(self._vtree, _write_callback, <void*>writer)
+            writer.check()
+        else:
+            filename_b = os.fsencode(filename)
+            sddapi_c.sdd_vtree_save_as_dot(filename_b, self._vtree)
 
     def dot(self):
         """Vtree to Graphiv dot string."""
-        fname = None
-        cdef bytes fname_b
-        cdef char* fname_c
-        result = None
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            fname = os.path.join(tmpdirname, "vtree.dot")
-            fname_b = fname.encode()
-            fname_c = fname_b
-            self.save_as_dot(fname_c)
-            with open(fname, "r") as ifile:
-                result = ifile.read()
-        return result
+        writer = _Writer()
+        sddapi_c.sdd_vtree_write_as_dot(self._vtree, _write_callback, <void*>writer)
+        return writer.getvalue()
 
     ## Navigation (Sec 5.3.4)
 
@@ -1551,6 +2458,48 @@ cdef class Vtree:
         """
         return sddapi_c.sdd_vtree_position(self._vtree)
 
+    def to_arrays(self):
+        """Returns the structure of the vtree as NumPy arrays indexed by vtree position.
+
+        Positions that are not part of this (sub)vtree are marked with -1 as children and 0 as variable.
+
+        :return: Tuple (left, right, var) with the positions of the left and right children
+            (-1 for leaves) and the variable of every vtree node (0 for internal nodes)
+        """
+        cdef sddapi_c.SddLiteral var_count = sddapi_c.sdd_vtree_var_count(self._vtree)
+        cdef sddapi_c.Vtree** stack = <sddapi_c.Vtree**> PyMem_Malloc(2 * var_count * sizeof(sddapi_c.Vtree*))
+        cdef sddapi_c.Vtree* vtree = self._vtree
+        cdef sddapi_c.SddLiteral size, position, top = 0
+        cdef long long[::1] left_v, right_v, var_v
+        if stack == NULL:
+            raise MemoryError()
+        # the last node in the inorder is the rightmost leaf
+        while not sddapi_c.sdd_vtree_is_leaf(vtree):
+            vtree = sddapi_c.sdd_vtree_right(vtree)
+        size = sddapi_c.sdd_vtree_position(vtree) + 1
+        left = np.full(size, -1, dtype=np.int64)
+        right = np.full(size, -1, dtype=np.int64)
+        var = np.zeros(size, dtype=np.int64)
+        left_v, right_v, var_v = left, right, var
+        try:
+            stack[top] = self._vtree
+            top += 1
+            while top > 0:
+                top -= 1
+                vtree = stack[top]
+                position = sddapi_c.sdd_vtree_position(vtree)
+                if sddapi_c.sdd_vtree_is_leaf(vtree):
+                    var_v[position] = sddapi_c.sdd_vtree_var(vtree)
+                else:
+                    left_v[position] = sddapi_c.sdd_vtree_position(sddapi_c.sdd_vtree_left(vtree))
+                    right_v[position] = sddapi_c.sdd_vtree_position(sddapi_c.sdd_vtree_right(vtree))
+                    stack[top] = sddapi_c.sdd_vtree_left(vtree)
+                    stack[top + 1] = sddapi_c.sdd_vtree_right(vtree)
+                    top += 2
+        finally:
+            PyMem_Free(stack)
+        return left, right, var
+
     def location(self, SddManager manager):
         """Returns the location of the pointer to the vtree root.
 
@@ -1578,6 +2527,46 @@ cdef class Vtree:
         sddapi_c.sdd_manager_init_vtree_size_limit(self._vtree, manager._sddmanager)
 
 
+cdef class _WmcArray:
+    """Buffer on an array of doubles that belongs to a WmcManager (used to create NumPy views without copying).
+
+    The buffer keeps a reference to the manager, so the memory stays valid as long as the view exists.
+    """
+    cdef object _owner
+    cdef double* _data
+    cdef Py_ssize_t _shape[1]
+    cdef Py_ssize_t _strides[1]
+    cdef bint _readonly
+
+    @staticmethod
+    cdef _WmcArray wrap(object owner, double* data, Py_ssize_t length, bint readonly):
+        cdef _WmcArray array = _WmcArray.__new__(_WmcArray)
+        array._owner = owner
+        array._data = data
+        array._shape[0] = length
+        array._strides[0] = sizeof(double)
+        array._readonly = readonly
+        return array
+
+    def __getbuffer__(self, Py_buffer* buffer, int flags):
+        if self._readonly and (flags & PyBUF_WRITABLE):
+            raise BufferError("Array is read-only")
+        buffer.buf = self._data
+        buffer.format = "d"
+        buffer.internal = NULL
+        buffer.itemsize = sizeof(double)
+        buffer.len = self._shape[0] * sizeof(double)
+        buffer.ndim = 1
+        buffer.obj = self
+        buffer.readonly = self._readonly
+        buffer.shape = self._shape
+        buffer.strides = self._strides
+        buffer.suboffsets = NULL
+
+    def __releasebuffer__(self, Py_buffer* buffer):
+        pass
+
+
 @cython.embedsignature(True)
 cdef class WmcManager:
     """Creates a WMC manager for the SDD rooted at node and initializes literal weights.
@@ -1612,6 +2601,7 @@ cdef class WmcManager:
     """
     cdef sddapi_c.WmcManager* _wmcmanager
     cdef public SddNode node
+    cdef object _literal_weights_buffer
 
     ## Weighted Model Counting (Sec 5.6)
 
@@ -1643,8 +2633,108 @@ cdef class WmcManager:
         """Returns the weighted model count of the SDD underlying the WMC manager (using the current literal weights).
 
         This function should be called each time the weights of literals are changed.
-        """
-        return sddapi_c.wmc_propagate(self._wmcmanager)
+        The GIL is released during propagation.
+
+        The manager keeps track of the literals whose weight changed since the previous propagation.
+        If only a few weights changed, the propagation is incremental: only the nodes that depend on
+        these weights are recomputed, and their ancestors only if their weighted model count changed.
+        The derivatives (literal_derivative, literal_pr) are computed when they are first requested.
+        """
+        cdef sddapi_c.SddWmc wmc
+        with nogil:
+            wmc = sddapi_c.wmc_propagate(self._wmcmanager)
+        return wmc
+
+    def propagate_batch(self, weights, sddapi_c.SddSize block_size=0):
+        """Returns the weighted model counts for a batch of literal weight vectors.
+
+        All queries are computed together in one pass over the SDD (per block of queries), which
+        is much faster than calling set_literal_weights_from_array and propagate for every query.
+        The literal weights, derivatives and weighted model count stored in the manager are not changed.
+
+        :param weights: Array of shape (<nb_queries>, <nb_literals>*2) where each row has the same layout
+            as the array passed to set_literal_weights_from_array (literals [-3, -2, -1, 1, 2, 3]).
+            Variables that are not included keep the weight that is set in the manager.
+        :param block_size: Number of queries propagated together, if 0 it is derived from the SDD size
+        :return: Array of shape (<nb_queries>,) with the weighted model counts
+        """
+        cdef double[:, ::1] weights_c = np.ascontiguousarray(weights, dtype=np.float64)
+        if weights_c.shape[1] > 2 * self.node._manager.var_count():
+            raise ValueError("Array of weights is longer than the number of variables in the manager.")
+        if weights_c.shape[1] % 2 != 0:
+            raise ValueError("Array of weights should contain a weight for the positive and the negative literal.")
+        cdef sddapi_c.SddSize nb_queries = weights_c.shape[0]
+        cdef sddapi_c.SddLiteral nb_lits = weights_c.shape[1] // 2
+        wmcs = np.empty(nb_queries, dtype=np.float64)
+        if nb_queries == 0:
+            return wmcs
+        cdef double[::1] wmcs_c = wmcs
+        cdef double* weights_ptr = NULL
+        if nb_lits > 0:
+            weights_ptr = &weights_c[0, 0]
+        cdef double* wmcs_ptr = &wmcs_c[0]
+        with nogil:
+            sddapi_c.wmc_propagate_batch(weights_ptr, nb_lits, nb_queries, block_size, wmcs_ptr, self._wmcmanager)
+        return wmcs
+
+    def mpe(self):
+        """Returns the most probable explanation (MPE): the model with the largest weight.
+
+        The MPE is computed for the literal weights set in the manager, by one max-product pass and
+        one backtracking pass over the SDD. All variables of the SDD manager are included, a variable
+        that does not appear in the SDD takes the literal with the largest weight.
+        The GIL is released during the computation.
+
+        :return: Tuple (assignment, weight). The assignment is an array with for every variable 1 ... n
+            the value 1 (true) or 0 (false), or -1 for all variables if the SDD has no model.
+            The weight is in log-space if the manager is in log-mode.
+        """
+        cdef sddapi_c.SddLiteral var_count = self.node._manager.var_count()
+        assignment = np.empty(var_count, dtype=np.int8)
+        cdef signed char[::1] assignment_c = assignment
+        cdef signed char* assignment_ptr = NULL
+        if var_count > 0:
+            assignment_ptr = &assignment_c[0]
+        cdef sddapi_c.SddWmc weight
+        with nogil:
+            weight = sddapi_c.wmc_mpe(assignment_ptr, self._wmcmanager)
+        return assignment, weight
+
+    def mpe_batch(self, weights):
+        """Returns the most probable explanation for a batch of literal weight vectors.
+
+        All queries are computed together in one pass over the SDD (per block of queries), see mpe.
+        The literal weights stored in the manager are not changed.
+
+        :param weights: Array of shape (<nb_queries>, <nb_literals>*2) with the same layout as
+            for propagate_batch. Variables that are not included keep the weight that is set in the manager.
+        :return: Tuple (assignments, weights) with arrays of shape (<nb_queries>, <nb_variables>)
+            and (<nb_queries>,)
+        """
+        cdef double[:, ::1] weights_c = np.ascontiguousarray(weights, dtype=np.float64)
+        cdef sddapi_c.SddLiteral var_count = self.node._manager.var_count()
+        if weights_c.shape[1] > 2 * var_count:
+            raise ValueError("Array of weights is longer than the number of variables in the manager.")
+        if weights_c.shape[1] % 2 != 0:
+            raise ValueError("Array of weights should contain a weight for the positive and the negative literal.")
+        cdef sddapi_c.SddSize nb_queries = weights_c.shape[0]
+        cdef sddapi_c.SddLiteral nb_lits = weights_c.shape[1] // 2
+        assignments = np.empty((nb_queries, var_count), dtype=np.int8)
+        mpes = np.empty(nb_queries, dtype=np.float64)
+        if nb_queries == 0:
+            return assignments, mpes
+        cdef signed char[:, ::1] assignments_c = assignments
+        cdef double[::1] mpes_c = mpes
+        cdef double* weights_ptr = NULL
+        cdef signed char* assignments_ptr = NULL
+        if nb_lits > 0:
+            weights_ptr = &weights_c[0, 0]
+        if var_count > 0:
+            assignments_ptr = &assignments_c[0, 0]
+        cdef double* mpes_ptr = &mpes_c[0]
+        with nogil:
+            sddapi_c.wmc_mpe_batch(weights_ptr, nb_lits, nb_queries, mpes_ptr, assignments_ptr, self._wmcmanager)
+        return assignments, mpes
 
     def set_literal_weight(self, literal, sddapi_c.SddWmc weight):
         """Set weight of literal.
@@ -1672,6 +2762,30 @@ cdef class WmcManager:
         for i in range(nb_lits, 2*nb_lits):
             sddapi_c.wmc_set_literal_weight(i - nb_lits + 1, weights[i], self._wmcmanager)
 
+    def set_literal_weights_buffer(self, double[::1] weights=None):
+        """Use an array as the literal weights of the manager, without copying it.
+
+        The manager reads the weights directly from the array, so the weights can be changed by writing
+        into the array instead of calling set_literal_weight. This can be a NumPy array or any other
+        writable buffer of doubles, e.g. a NumPy array on a multiprocessing.shared_memory block
+        (``np.ndarray((2 * n,), dtype=np.float64, buffer=shm.buf)``). The next call to propagate
+        compares the array with the weights of the previous propagation, so it stays incremental
+        when only a few weights changed. The manager keeps a reference to the array.
+
+        :param weights: Contiguous float64 array of size <nb_variables>*2 with the same layout as for
+            set_literal_weights_from_array (literals [-3, -2, -1, 1, 2, 3]). If None, the manager uses
+            its own array of weights again, which gets the current weights.
+        """
+        cdef double* weights_ptr = NULL
+        if weights is not None:
+            if len(weights) != 2 * self.node._manager.var_count():
+                raise ValueError(f"Array of weights should have length {2 * self.node._manager.var_count()} "
+                                 f"(two literals per variable in the manager), but has length {len(weights)}.")
+            if len(weights) > 0:
+                weights_ptr = &weights[0]
+        sddapi_c.wmc_set_literal_weights_buffer(weights_ptr, self._wmcmanager)
+        self._literal_weights_buffer = weights if weights_ptr != NULL else None
+
     def literal_weight(self, literal):
         """Returns the weight of a literal."""
         cdef sddapi_c.SddLiteral literal_c = self._extract_literal(literal)
@@ -1681,17 +2795,60 @@ cdef class WmcManager:
         """Returns the partial derivative of the weighted model count with respect to the weight of literal.
 
         The result returned by this function is meaningful only after having called wmc propagate.
+        The derivatives are computed on the first request after a propagation (the GIL is released).
         """
         cdef sddapi_c.SddLiteral literal_c = self._extract_literal(literal)
-        return sddapi_c.wmc_literal_derivative(literal_c, self._wmcmanager)
+        cdef sddapi_c.SddWmc derivative
+        with nogil:
+            derivative = sddapi_c.wmc_literal_derivative(literal_c, self._wmcmanager)
+        return derivative
 
     def literal_pr(self, literal):
         """Returns the probability of literal.
 
         The result returned by this function is meaningful only after having called wmc propagate.
+        The derivatives are computed on the first request after a propagation (the GIL is released).
         """
         cdef sddapi_c.SddLiteral literal_c = self._extract_literal(literal)
-        return sddapi_c.wmc_literal_pr(literal_c, self._wmcmanager)
+        cdef sddapi_c.SddWmc pr
+        with nogil:
+            pr = sddapi_c.wmc_literal_pr(literal_c, self._wmcmanager)
+        return pr
+
+    def literal_derivatives(self):
+        """Returns the partial derivatives of the weighted model count with respect to the weights of all literals.
+
+        The array has the same layout as the array passed to set_literal_weights_from_array
+        (literals [-3, -2, -1, 1, 2, 3]). It is a read-only view on the derivatives stored in the
+        manager (no copy is made). The values are overwritten when the derivatives are recomputed,
+        call this method again after propagate to make sure they are up to date.
+
+        The result returned by this function is meaningful only after having called wmc propagate.
+        """
+        cdef Py_ssize_t nb_lits = 2 * self.node._manager.var_count()
+        cdef sddapi_c.SddWmc* derivatives
+        with nogil:
+            derivatives = sddapi_c.wmc_literal_derivatives(self._wmcmanager)
+        if nb_lits == 0:
+            return np.empty(0, dtype=np.float64)
+        return np.asarray(_WmcArray.wrap(self, derivatives, nb_lits, True))
+
+    def literal_prs(self):
+        """Returns the probabilities of all literals.
+
+        The array has the same layout as the array passed to set_literal_weights_from_array
+        (literals [-3, -2, -1, 1, 2, 3]) and is computed in one pass, see literal_pr.
+
+        The result returned by this function is meaningful only after having called wmc propagate.
+        """
+        prs = np.empty(2 * self.node._manager.var_count(), dtype=np.float64)
+        if len(prs) == 0:
+            return prs
+        cdef double[::1] prs_c = prs
+        cdef double* prs_ptr = &prs_c[0]
+        with nogil:
+            sddapi_c.wmc_literal_prs(prs_ptr, self._wmcmanager)
+        return prs
 
 
     ## Auxiliary
@@ -1802,3 +2959,199 @@ cdef class CompilerOptions:
         r += "  post_search: " + str(self.post_search) + "\n"
         r += "  verbose: " + str(self.verbose) + "\n"
         return r
+
+
+## Semiring evaluation of a CompiledCircuit (see pysdd.semiring)
+
+cdef enum:
+    SEMIRING_PROBABILITY = 0
+    SEMIRING_LOG_PROBABILITY = 1
+    SEMIRING_MAX_PRODUCT = 2
+    SEMIRING_MIN_PLUS = 3
+    SEMIRING_BOOLEAN = 4
+
+
+cdef inline double _semiring_zero(int semiring) noexcept nogil:
+    if semiring == SEMIRING_LOG_PROBABILITY:
+        return -INFINITY
+    if semiring == SEMIRING_MIN_PLUS:
+        return INFINITY
+    return 0.0
+
+
+cdef inline double _semiring_one(int semiring) noexcept nogil:
+    if semiring == SEMIRING_LOG_PROBABILITY or semiring == SEMIRING_MIN_PLUS:
+        return 0.0
+    return 1.0
+
+
+cdef inline double _semiring_add(int semiring, double a, double b) noexcept nogil:
+    if semiring == SEMIRING_PROBABILITY:
+        return a + b
+    if semiring == SEMIRING_LOG_PROBABILITY:
+        if a == -INFINITY:
+            return b
+        if b == -INFINITY:
+            return a
+        if a > b:
+            return a + log1p(exp(b - a))
+        return b + log1p(exp(a - b))
+    if semiring == SEMIRING_MIN_PLUS:
+        return a if a < b else b
+    # max-product and boolean (or)
+    return a if a > b else b
+
+
+cdef inline double _semiring_mul(int semiring, double a, double b) noexcept nogil:
+    if semiring == SEMIRING_LOG_PROBABILITY or semiring == SEMIRING_MIN_PLUS:
+        return a + b
+    if semiring == SEMIRING_BOOLEAN:
+        return a if a < b else b
+    # probability and max-product
+    return a * b
+
+
+cdef long long _semiring_gap(long long top, long long bottom, dict gap_index, array.array gap_offsets,
+                             array.array gap_vtrees, const long long[::1] parent,
+                             const long long[::1] vtree_left, const long long[::1] vtree_right) except -1:
+    """Index of the gap between vtree node top and vtree node bottom below it (-1 for a trivial node)."""
+    cdef long long child
+    if top == bottom:
+        return 0
+    key = (top, bottom)
+    index = gap_index.get(key)
+    if index is not None:
+        return index
+    if bottom < 0:
+        gap_vtrees.append(top)
+    else:
+        while bottom != top:
+            child = bottom
+            bottom = parent[child]
+            if bottom < 0:
+                raise ValueError("Node is not normalized for a vtree node below the vtree of its parent")
+            gap_vtrees.append(vtree_right[bottom] if vtree_left[bottom] == child else vtree_left[bottom])
+    index = len(gap_offsets) - 1
+    gap_offsets.append(len(gap_vtrees))
+    gap_index[key] = index
+    return index
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _semiring_gaps(const long long[::1] element_offsets, const long long[::1] primes,
+                   const long long[::1] subs, const long long[::1] vtree_positions,
+                   const long long[::1] vtree_left, const long long[::1] vtree_right, long long vtree_root):
+    """Vtree nodes to smooth with for every prime and sub of a CompiledCircuit.
+
+    A prime (sub) that is normalized for a vtree node below the left (right) child of the vtree of
+    its parent misses the variables of the siblings on the path between both vtree nodes. These
+    sibling lists (gaps) are shared between all elements with the same pair of vtree nodes.
+
+    :return: Tuple (prime gaps, sub gaps, root gap, gap offsets, gap vtree nodes). Gap 0 is empty.
+    """
+    cdef long long vtree_count = vtree_left.shape[0]
+    cdef long long node_count = element_offsets.shape[0] - 1
+    cdef long long i, e, node_pos
+    parent_arr = np.full(vtree_count, -1, dtype=np.int64)
+    cdef long long[::1] parent = parent_arr
+    for i in range(vtree_count):
+        if vtree_left[i] >= 0:
+            parent[vtree_left[i]] = i
+            parent[vtree_right[i]] = i
+    prime_gaps_arr = np.zeros(primes.shape[0], dtype=np.int64)
+    sub_gaps_arr = np.zeros(subs.shape[0], dtype=np.int64)
+    cdef long long[::1] prime_gaps = prime_gaps_arr
+    cdef long long[::1] sub_gaps = sub_gaps_arr
+    cdef dict gap_index = {}
+    cdef array.array gap_offsets = array.array('q', [0, 0])
+    cdef array.array gap_vtrees = array.array('q')
+    for i in range(node_count):
+        node_pos = vtree_positions[i]
+        for e in range(element_offsets[i], element_offsets[i + 1]):
+            prime_gaps[e] = _semiring_gap(vtree_left[node_pos], vtree_positions[primes[e]], gap_index,
+                                          gap_offsets, gap_vtrees, parent, vtree_left, vtree_right)
+            sub_gaps[e] = _semiring_gap(vtree_right[node_pos], vtree_positions[subs[e]], gap_index,
+                                        gap_offsets, gap_vtrees, parent, vtree_left, vtree_right)
+    root_gap = _semiring_gap(vtree_root, vtree_positions[node_count - 1], gap_index,
+                             gap_offsets, gap_vtrees, parent, vtree_left, vtree_right)
+    return (prime_gaps_arr, sub_gaps_arr, root_gap, np.array(gap_offsets, dtype=np.int64),
+            np.array(gap_vtrees, dtype=np.int64))
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _semiring_evaluate(int semiring, long long var_count, const signed char[::1] types,
+                       const long long[::1] literals, const long long[::1] element_offsets,
+                       const long long[::1] primes, const long long[::1] subs,
+                       const long long[::1] vtree_left, const long long[::1] vtree_right,
+                       const long long[::1] vtree_vars, const long long[::1] vtree_order,
+                       const long long[::1] prime_gaps, const long long[::1] sub_gaps, long long root_gap,
+                       const long long[::1] gap_offsets, const long long[::1] gap_vtrees,
+                       const double[:, ::1] weights):
+    """Evaluate a CompiledCircuit in one of the built-in semirings, see pysdd.semiring.evaluate.
+
+    The nodes are visited once in topological order, the queries (rows of weights) are the
+    inner loop. The GIL is released during evaluation.
+
+    :return: Array of shape (<nb_queries>,)
+    """
+    cdef Py_ssize_t nb_queries = weights.shape[0]
+    cdef Py_ssize_t node_count = types.shape[0]
+    cdef Py_ssize_t gap_count = gap_offsets.shape[0] - 1
+    cdef Py_ssize_t i, j, e, g, q, pos, var
+    cdef double zero = _semiring_zero(semiring)
+    cdef double one = _semiring_one(semiring)
+    cdef double acc, prime_value, sub_value
+    true_values_arr = np.empty((vtree_left.shape[0], nb_queries), dtype=np.float64)
+    gap_values_arr = np.empty((gap_count, nb_queries), dtype=np.float64)
+    values_arr = np.empty((node_count, nb_queries), dtype=np.float64)
+    result = np.empty(nb_queries, dtype=np.float64)
+    cdef double[:, ::1] true_values = true_values_arr
+    cdef double[:, ::1] gap_values = gap_values_arr
+    cdef double[:, ::1] values = values_arr
+    cdef double[::1] result_v = result
+    if nb_queries == 0:
+        return result
+    with nogil:
+        # Sum over all instantiations of the variables of every vtree node
+        for i in range(vtree_order.shape[0]):
+            pos = vtree_order[i]
+            if vtree_left[pos] < 0:
+                var = vtree_vars[pos]
+                for q in range(nb_queries):
+                    true_values[pos, q] = _semiring_add(semiring, weights[q, var_count + var - 1],
+                                                        weights[q, var_count - var])
+            else:
+                for q in range(nb_queries):
+                    true_values[pos, q] = _semiring_mul(semiring, true_values[vtree_left[pos], q],
+                                                        true_values[vtree_right[pos], q])
+        for g in range(gap_count):
+            for q in range(nb_queries):
+                gap_values[g, q] = one
+            for j in range(gap_offsets[g], gap_offsets[g + 1]):
+                for q in range(nb_queries):
+                    gap_values[g, q] = _semiring_mul(semiring, gap_values[g, q], true_values[gap_vtrees[j], q])
+        for i in range(node_count):
+            if types[i] == 0:
+                for q in range(nb_queries):
+                    values[i, q] = zero
+            elif types[i] == 1:
+                for q in range(nb_queries):
+                    values[i, q] = one
+            elif types[i] == 2:
+                j = var_count + literals[i] - 1 if literals[i] > 0 else var_count + literals[i]
+                for q in range(nb_queries):
+                    values[i, q] = weights[q, j]
+            else:
+                for q in range(nb_queries):
+                    values[i, q] = zero
+                for e in range(element_offsets[i], element_offsets[i + 1]):
+                    for q in range(nb_queries):
+                        prime_value = _semiring_mul(semiring, values[primes[e], q], gap_values[prime_gaps[e], q])
+                        sub_value = _semiring_mul(semiring, values[subs[e], q], gap_values[sub_gaps[e], q])
+                        values[i, q] = _semiring_add(semiring, values[i, q],
+                                                     _semiring_mul(semiring, prime_value, sub_value))
+        for q in range(nb_queries):
+            result_v[q] = _semiring_mul(semiring, values[node_count - 1, q], gap_values[root_gap, q])
+    return result
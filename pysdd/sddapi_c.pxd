@@ -7,7 +7,10 @@ pysdd.sddapi_c
 :copyright: Copyright 2017-2018 KU Leuven and Regents of the University of California.
 :license: Apache License, Version 2.0, see LICENSE for details.
 """
-cdef extern from "sddapi.h":
+from libc.stdint cimport uint32_t
+
+
+cdef extern from "sddapi.h" nogil:
     ctypedef size_t SddSize;  # TODO: only for 64bit
     ctypedef size_t SddNodeSize
     ctypedef size_t SddRefCount
@@ -18,6 +21,9 @@ cdef extern from "sddapi.h":
     ctypedef SddSize SddID
 
     ctypedef unsigned short BoolOp
+    enum:
+        CONJOIN
+        DISJOIN
 
     cdef struct sdd_node_t
 
@@ -27,6 +33,7 @@ cdef extern from "sddapi.h":
     cdef struct sdd_node_t:
         Vtree * vtree
         sdd_node_t* vtree_next
+        SddSize index
     ctypedef sdd_node_t SddNode
 
     # ctypedef struct SddNode:
@@ -134,6 +141,7 @@ cdef extern from "sddapi.h":
     SddSize sdd_manager_count(const SddManager* manager);
     SddSize sdd_manager_live_count(const SddManager* manager);
     SddSize sdd_manager_dead_count(const SddManager* manager);
+    SddSize sdd_manager_memory(const SddManager* manager);
     #//SDD OF VTREE
     SddSize sdd_vtree_size(const Vtree* vtree);
     SddSize sdd_vtree_live_size(const Vtree* vtree);
@@ -227,10 +235,65 @@ cdef extern from "sddapi.h":
     SddWmc wmc_zero_weight(WmcManager* wmc_manager);
     SddWmc wmc_one_weight(WmcManager* wmc_manager);
     SddWmc wmc_literal_weight(const SddLiteral literal, const WmcManager* wmc_manager);
-    SddWmc wmc_literal_derivative(const SddLiteral literal, const WmcManager* wmc_manager);
-    SddWmc wmc_literal_pr(const SddLiteral literal, const WmcManager* wmc_manager);
+    SddWmc wmc_literal_derivative(const SddLiteral literal, WmcManager* wmc_manager);
+    SddWmc wmc_literal_pr(const SddLiteral literal, WmcManager* wmc_manager);
+
+cdef extern from "sddapi_extra.h" nogil:
+    ctypedef struct SddManagerCounters:
+        SddSize apply_count
+        SddSize apply_count_top
+        SddSize computed_count
+        SddSize computed_cache_size
+        SddSize computed_cache_lookup_count
+        SddSize computed_cache_hit_count
+        SddSize unique_table_size
+        SddSize unique_table_count
+        SddSize unique_table_lookup_count
+        SddSize unique_table_hit_count
+        SddSize unique_table_lookup_cost
+        SddSize unique_table_increase_size_count
+        SddSize unique_table_decrease_size_count
+        SddSize node_count
+        SddSize dead_node_count
+        SddSize sdd_size
+        SddSize dead_sdd_size
+        SddSize memory
+        SddSize gc_node_count
+        SddSize gc_element_count
+        SddSize max_element_count
+        SddSize max_decomposition_size
+        SddSize max_uncompressed_decomposition_size
+        SddSize gc_count
+        SddSize auto_gc_count
+        SddSize auto_search_count
+        SddSize auto_search_count_global
+        SddSize auto_search_count_local
+        SddSize auto_search_count_recursive
+        SddSize auto_search_count_aborted_apply
+        SddSize auto_search_count_aborted_operation
+        SddSize auto_search_count_aborted_fragment
+        SddSize auto_search_count_aborted_search
+        SddSize auto_search_iteration_count
+        double auto_search_reduction_sum
+        double auto_search_time
+        double auto_max_search_time
+        SddSize lr_count
+        SddSize rr_count
+        SddSize sw_count
+        SddSize failed_lr_count_time
+        SddSize failed_rr_count_time
+        SddSize failed_sw_count_time
+        SddSize failed_lr_count_size
+        SddSize failed_rr_count_size
+        SddSize failed_sw_count_size
+        SddSize failed_lr_count_memory
+        SddSize failed_rr_count_memory
+        SddSize failed_sw_count_memory
+        SddSize failed_count_cp
+        SddSize fragment_count
+        SddSize completed_fragment_count
+        SddSize successful_fragment_count
 
-cdef extern from "sddapi_extra.h":
     void add_var_before_lca(int count, SddLiteral* literals, SddManager* manager);
     void add_var_after_lca(int count, SddLiteral* literals, SddManager* manager);
     void move_var_before_first(SddLiteral var, SddManager* manager);
@@ -238,3 +301,27 @@ cdef extern from "sddapi_extra.h":
     void move_var_before(SddLiteral var, SddLiteral target_var, SddManager* manager);
     void move_var_after(SddLiteral var, SddLiteral target_var, SddManager* manager);
     void remove_var_added_last(SddManager*manager);
+
+    void wmc_propagate_batch(const SddWmc* weights, SddLiteral weights_var_count, SddSize query_count, SddSize block_size, SddWmc* wmcs, WmcManager* wmc_manager);
+    void wmc_mpe_batch(const SddWmc* weights, SddLiteral weights_var_count, SddSize query_count, SddWmc* mpes, signed char* assignments, WmcManager* wmc_manager);
+    SddWmc wmc_mpe(signed char* assignment, WmcManager* wmc_manager);
+    SddWmc* wmc_literal_derivatives(WmcManager* wmc_manager);
+    void wmc_literal_prs(SddWmc* prs, WmcManager* wmc_manager);
+    void wmc_set_literal_weights_buffer(SddWmc* weights, WmcManager* wmc_manager);
+
+    SddNode** sdd_topological_sort(SddNode* node, SddSize* size);
+    SddSize sdd_exact_model_count(SddNode* node, int is_global, uint32_t** limbs, SddManager* manager);
+    double sdd_log2_model_count(SddNode* node, int is_global, SddManager* manager);
+    SddNode* sdd_condition_multiple(SddSize literal_count, const SddLiteral* literals, SddNode* node, SddManager* manager);
+    SddNode* sdd_apply_multiple(SddSize count, SddNode** nodes, BoolOp op, SddManager* manager);
+    void sdd_manager_counters(SddManagerCounters* counters, const SddManager* manager);
+
+    SddNode* sdd_from_arrays(SddSize node_count, const char* types, const SddLiteral* literals, const SddLiteral* vtrees, const SddLiteral* offsets, const SddLiteral* primes, const SddLiteral* subs, SddManager* manager);
+    Vtree* sdd_vtree_from_arrays(SddLiteral node_count, SddLiteral root, const SddLiteral* left, const SddLiteral* right, const SddLiteral* var);
+
+    ctypedef void SddWriteFunc(void* context, const char* data, size_t length) noexcept
+    void sdd_write(SddNode* node, SddWriteFunc* write, void* context);
+    void sdd_write_as_dot(SddNode* node, SddWriteFunc* write, void* context);
+    void sdd_shared_write_as_dot(SddManager* manager, SddWriteFunc* write, void* context);
+    void sdd_vtree_write(Vtree* vtree, SddWriteFunc* write, void* context);
+    void sdd_vtree_write_as_dot(Vtree* vtree, SddWriteFunc* write, void* context);
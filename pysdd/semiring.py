@@ -0,0 +1,145 @@
+# -*- coding: UTF-8 -*-
+"""
+pysdd.semiring
+~~~~~~~~~~~~~~
+
+Evaluation of a CompiledCircuit in a commutative semiring.
+
+The circuit is smoothed while it is evaluated: a variable that does not appear below an element
+contributes the sum (semiring addition) of the weights of its two literals. The built-in semirings
+are evaluated natively (in pysdd.sdd), other semirings with vectorized NumPy operations, level by
+level (see CompiledCircuit.levels).
+
+:author: Wannes Meert, Arthur Choi
+:copyright: Copyright 2017-2019 KU Leuven and Regents of the University of California.
+:license: Apache License, Version 2.0, see LICENSE for details.
+"""
+import numpy as np
+
+MYPY = False
+if MYPY:
+    from typing import Callable, Optional
+
+
+class Semiring:
+    def __init__(self, zero, one, add, mul, dtype=np.float64, name=None, native=None):
+        """A commutative semiring.
+
+        The operations are vectorized: they are called with NumPy arrays and should work
+        elementwise (e.g. NumPy ufuncs). If add is a ufunc, add.reduceat is used to sum the
+        elements of the decision nodes.
+
+        :param zero: Neutral element of add
+        :param one: Neutral element of mul
+        :param add: Function add(a, b) on arrays
+        :param mul: Function mul(a, b) on arrays
+        :param dtype: NumPy type of the values (object for Python integers)
+        :param name: Name of the semiring
+        :param native: Code of the native implementation in pysdd.sdd (only for the built-in semirings)
+        """
+        self.zero = zero
+        self.one = one
+        self.add = add
+        self.mul = mul
+        self.dtype = dtype
+        self.name = name
+        self.native = native
+
+    def __repr__(self):
+        return "Semiring({})".format(self.name if self.name is not None else "custom")
+
+
+#: Weighted model counting, the same result as WmcManager and CompiledCircuit.wmc
+PROBABILITY = Semiring(0.0, 1.0, np.add, np.multiply, name="probability", native=0)
+#: Weighted model counting with weights in log-space
+LOG_PROBABILITY = Semiring(-np.inf, 0.0, np.logaddexp, np.add, name="log-probability", native=1)
+#: Weight of the most probable model (MPE)
+MAX_PRODUCT = Semiring(0.0, 1.0, np.maximum, np.multiply, name="max-product", native=2)
+#: Minimal cost of a model, e.g. minimal cardinality with weight 1 for positive literals and 0 for negative ones
+MIN_PLUS = Semiring(np.inf, 0.0, np.minimum, np.add, name="min-plus", native=3)
+#: Exact (weighted) model counting with Python integers
+COUNTING = Semiring(0, 1, np.add, np.multiply, dtype=object, name="counting")
+#: Satisfiability, the weights indicate which literals are allowed
+BOOLEAN = Semiring(False, True, np.logical_or, np.logical_and, dtype=bool, name="boolean", native=4)
+
+
+def evaluate(circuit, semiring, weights=None, native=True):
+    """Evaluate a CompiledCircuit in a semiring.
+
+    :param circuit: CompiledCircuit
+    :param semiring: Semiring, for example PROBABILITY, MAX_PRODUCT or COUNTING
+    :param weights: Array with the literal weights (literals [-3, -2, -1, 1, 2, 3]), the same layout
+        as for WmcManager.set_literal_weights_from_array, or a 2D array with one row per query.
+        If None, all literals have weight one (e.g. model counting).
+    :param native: Use the native implementation for the built-in semirings
+    :return: Value of the circuit, or an array with one value per query
+    """
+    if weights is None:
+        weights = np.full(2 * circuit.var_count, semiring.one, dtype=semiring.dtype)
+    weights = np.asarray(weights, dtype=semiring.dtype)
+    single = weights.ndim == 1
+    weights = np.atleast_2d(weights)
+    if weights.shape[1] != 2 * circuit.var_count:
+        raise ValueError("Expected {} weights per query, got {}".format(2 * circuit.var_count, weights.shape[1]))
+    prime_gaps, sub_gaps, root_gap, gap_offsets, gap_vtrees = circuit.smoothing_gaps()
+    if native and semiring.native is not None:
+        from .sdd import _semiring_evaluate
+        result = _semiring_evaluate(
+            semiring.native, circuit.var_count, np.ascontiguousarray(circuit.types),
+            np.ascontiguousarray(circuit.literals), np.ascontiguousarray(circuit.element_offsets),
+            np.ascontiguousarray(circuit.primes), np.ascontiguousarray(circuit.subs),
+            np.ascontiguousarray(circuit.vtree_left), np.ascontiguousarray(circuit.vtree_right),
+            np.ascontiguousarray(circuit.vtree_vars), np.array(circuit._vtree_bottom_up(), dtype=np.int64),
+            prime_gaps, sub_gaps, root_gap, gap_offsets, gap_vtrees,
+            np.ascontiguousarray(weights, dtype=np.float64))
+        result = result.astype(semiring.dtype)
+    else:
+        result = _evaluate_vectorized(circuit, semiring, weights)
+    return result[0] if single else result
+
+
+def _reduce(add, values, starts, counts):
+    """Sum the consecutive groups of values that begin at starts and have the given lengths."""
+    if isinstance(add, np.ufunc):
+        return add.reduceat(values, starts, axis=0)
+    result = values[starts]
+    for k in range(1, int(counts.max(initial=0))):
+        selected = counts > k
+        result[selected] = add(result[selected], values[starts[selected] + k])
+    return result
+
+
+def _evaluate_vectorized(circuit, semiring, weights):
+    n = circuit.var_count
+    nb_queries = weights.shape[0]
+    add, mul = semiring.add, semiring.mul
+    prime_gaps, sub_gaps, root_gap, gap_offsets, gap_vtrees = circuit.smoothing_gaps()
+
+    true_values = np.empty((len(circuit.vtree_vars), nb_queries), dtype=semiring.dtype)
+    for position in circuit._vtree_bottom_up():
+        left, right = circuit.vtree_left[position], circuit.vtree_right[position]
+        if left < 0:
+            var = circuit.vtree_vars[position]
+            true_values[position] = add(weights[:, n + var - 1], weights[:, n - var])
+        else:
+            true_values[position] = mul(true_values[left], true_values[right])
+
+    gap_lengths = np.diff(gap_offsets)
+    gap_values = np.full((len(gap_lengths), nb_queries), semiring.one, dtype=semiring.dtype)
+    for k in range(int(gap_lengths.max(initial=0))):
+        selected = np.flatnonzero(gap_lengths > k)
+        gap_values[selected] = mul(gap_values[selected], true_values[gap_vtrees[gap_offsets[selected] + k]])
+
+    values = np.empty((circuit.node_count, nb_queries), dtype=semiring.dtype)
+    values[circuit.types == circuit.FALSE] = semiring.zero
+    values[circuit.types == circuit.TRUE] = semiring.one
+    is_literal = circuit.types == circuit.LITERAL
+    lits = circuit.literals[is_literal]
+    values[is_literal] = weights[:, np.where(lits > 0, n + lits - 1, n + lits)].T
+    for nodes, elements, starts in circuit.levels():
+        primes, subs = circuit.primes[elements], circuit.subs[elements]
+        products = mul(mul(values[primes], gap_values[prime_gaps[elements]]),
+                       mul(values[subs], gap_values[sub_gaps[elements]]))
+        counts = np.diff(np.append(starts, len(elements)))
+        values[nodes] = _reduce(add, products, starts, counts)
+    return mul(values[circuit.root], gap_values[root_gap])
@@ -9,9 +9,15 @@ Utility functions on top of the ``sdd`` package.
 :copyright: Copyright 2017-2019 KU Leuven and Regents of the University of California.
 :license: Apache License, Version 2.0, see LICENSE for details.
 """
-import math
 import array
-from .sdd import SddNode, SddManager, Vtree
+
+import numpy as np
+
+try:
+    from .sdd import SddNode, SddManager, Vtree
+except ImportError:
+    # The functions that read NNF, SDD and PSDD files do not need the C SDD library
+    SddNode, SddManager, Vtree = None, None, None
 
 
 MYPY = False
@@ -194,12 +200,230 @@ def _vtree_to_dot_int(vtree, mgr, litnamemap=None, show_id=False):
     return s
 
 
+# Node types used when reading NNF, SDD and PSDD files
+_FALSE, _TRUE, _LITERAL, _AND, _OR, _THETA = range(6)
+
+
+def _literal_weight_matrix(weights, var_count):
+    """Literal weights as an array with one row per query.
+
+    :param weights: None (all weights are 1), a dictionary literal -> weight, a list of such dictionaries
+        or an array with shape (2*n,) or (<nb_queries>, 2*n) with n >= var_count (literals [-n, ..., -1, 1, ..., n])
+    :param var_count: Largest variable in the circuit
+    :return: Tuple (weights, single) with weights an array of shape (<nb_queries>, 2*n) and single True
+        if only one query was given
+    """
+    if weights is None:
+        return np.ones((1, 2 * var_count)), True
+    if isinstance(weights, dict):
+        weights, single = [weights], True
+    elif isinstance(weights, (list, tuple)) and len(weights) > 0 and isinstance(weights[0], dict):
+        single = False
+    else:
+        weights = np.asarray(weights, dtype=np.float64)
+        single = weights.ndim == 1
+        weights = np.atleast_2d(weights)
+        if weights.ndim != 2 or weights.shape[1] % 2 != 0 or weights.shape[1] < 2 * var_count:
+            raise ValueError(f"Expected (at least) {2 * var_count} literal weights per query, "
+                             f"got {weights.shape[-1]}")
+        return weights, single
+    matrix = np.ones((len(weights), 2 * var_count))
+    for row, query in zip(matrix, weights):
+        for lit, weight in query.items():
+            if 0 < abs(lit) <= var_count:
+                row[var_count + lit - 1 if lit > 0 else var_count + lit] = weight
+    return matrix, single
+
+
+def _literal_columns(literals, weights):
+    """Column of every literal in a weight matrix from _literal_weight_matrix."""
+    n = weights.shape[1] // 2
+    return np.where(literals > 0, n + literals - 1, n + literals)
+
+
+def _leaf_values(types, literals, weights):
+    """Array of shape (<nb_nodes>, <nb_queries>) with the weights of the leaves filled in."""
+    values = np.empty((len(types), weights.shape[0]))
+    values[types == _FALSE] = 0.0
+    values[types == _TRUE] = 1.0
+    is_literal = types == _LITERAL
+    values[is_literal] = weights[:, _literal_columns(literals[is_literal], weights)].T
+    return values
+
+
+def _observation_matrix(observations, var_count):
+    """Observations as an array of shape (<nb_queries>, var_count) with values 1, 0 or -1 (not observed).
+
+    :return: Tuple (observations, single) with single True if only one query was given
+    """
+    if observations is None:
+        return np.full((1, var_count), -1, dtype=np.int8), True
+    if isinstance(observations, dict):
+        observations, single = [observations], True
+    elif isinstance(observations, (list, tuple)) and len(observations) > 0 and isinstance(observations[0], dict):
+        single = False
+    else:
+        observations = np.asarray(observations, dtype=np.int8)
+        single = observations.ndim == 1
+        observations = np.atleast_2d(observations)
+        if observations.ndim != 2 or observations.shape[1] < var_count:
+            raise ValueError(f"Expected (at least) {var_count} observations per query, got {observations.shape[-1]}")
+        return observations, single
+    matrix = np.full((len(observations), var_count), -1, dtype=np.int8)
+    for row, query in zip(matrix, observations):
+        for var, value in query.items():
+            if 0 < var <= var_count:
+                row[var - 1] = 1 if value else 0
+    return matrix, single
+
+
+def _node_groups(keys, first, count):
+    """Group the internal nodes of a circuit such that every group can be evaluated at once.
+
+    :param keys: Key of every node, 0 for leaves. The children of a node have a smaller key.
+    :param first: Offset of the first child (or element) of every node
+    :param count: Number of children (or elements) of every node
+    :return: Generator of tuples (key, nodes, edges, starts) with the nodes with the given key,
+        the concatenated indices of their children (or elements) and the offset of the children of
+        each node in the edges array (as expected by ufunc.reduceat)
+    """
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(sorted_keys)) + 1, [len(keys)]))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if lo == hi or sorted_keys[lo] == 0:
+            continue
+        nodes = order[lo:hi]
+        counts = count[nodes]
+        starts = np.zeros(len(nodes), dtype=np.int64)
+        np.cumsum(counts[:-1], out=starts[1:])
+        edges = np.repeat(first[nodes] - starts, counts) + np.arange(starts[-1] + counts[-1])
+        yield int(sorted_keys[lo]), nodes, edges, starts
+
+
+class _CircuitFile:
+    """Flat arrays of a circuit read from an NNF, SDD or PSDD file.
+
+    The arrays are indexed by node id and filled while streaming over the lines of the file. Nodes appear
+    bottom-up in these files, the key of a node (its height, 0 for leaves) is thus known when it is read.
+    The children (or elements) of node i are ``children[first[i]:first[i]+count[i]]``.
+    """
+    def __init__(self, node_count):
+        zeros = bytes(8 * node_count)
+        self.node_count = node_count
+        self.var_count = 0
+        self.root = -1
+        self.types = array.array("b", bytes(node_count))
+        self.literals = array.array("q", zeros)
+        self.thetas = array.array("d", zeros)
+        self.keys = array.array("q", zeros)
+        self.first = array.array("q", zeros)
+        self.count = array.array("q", zeros)
+        self.children = array.array("q")
+        self.element_thetas = array.array("d")
+
+    def add_leaf(self, nodeid, node_type, literal=0, theta=0.0):
+        self.types[nodeid] = node_type
+        self.literals[nodeid] = literal
+        self.thetas[nodeid] = theta
+        self.var_count = max(self.var_count, abs(literal))
+        self.root = nodeid
+
+    def add_node(self, nodeid, node_type, children):
+        self.types[nodeid] = node_type
+        self.first[nodeid] = len(self.children)
+        self.count[nodeid] = len(children)
+        self.children.extend(children)
+        if len(children) == 0:
+            # An empty and-node is true, an empty or-node is false
+            self.types[nodeid] = _TRUE if node_type == _AND else _FALSE
+        else:
+            self.keys[nodeid] = max(map(self.keys.__getitem__, children)) + 1
+        self.root = nodeid
+
+    def arrays(self):
+        """The arrays as NumPy arrays (without copying)."""
+        return (np.frombuffer(self.types, dtype=np.int8), np.frombuffer(self.literals, dtype=np.int64),
+                np.frombuffer(self.keys, dtype=np.int64), np.frombuffer(self.first, dtype=np.int64),
+                np.frombuffer(self.count, dtype=np.int64), np.frombuffer(self.children, dtype=np.int64))
+
+    @staticmethod
+    def lines(filename, name):
+        """Iterate over the split lines of a file, the first line is the header."""
+        with open(filename, 'r') as ifile:
+            detected = False
+            for line in ifile:
+                cols = line.split()
+                if len(cols) == 0 or cols[0] == 'c':
+                    continue
+                if not detected:
+                    if cols[0] != name:
+                        raise Exception(f"An {name.upper()} file should start with '{name}'")
+                    detected = True
+                yield cols
+
+    @staticmethod
+    def read_nnf(nnf_filename):
+        """Read an NNF file, the node ids are the line numbers."""
+        lines = _CircuitFile.lines(nnf_filename, 'nnf')
+        header = next(lines, None)
+        if header is None:
+            raise Exception(f"An NNF file should start with 'nnf'")
+        circuit = _CircuitFile(int(header[1]))
+        for nodeid, cols in enumerate(lines):
+            if cols[0] == 'L':
+                circuit.add_leaf(nodeid, _LITERAL, int(cols[1]))
+            elif cols[0] == 'A':
+                circuit.add_node(nodeid, _AND, [int(col) for col in cols[2:2 + int(cols[1])]])
+            elif cols[0] == 'O':
+                circuit.add_node(nodeid, _OR, [int(col) for col in cols[3:3 + int(cols[2])]])
+            else:
+                raise Exception(f"Unknown node in NNF file: {' '.join(cols)}")
+        circuit.var_count = max(circuit.var_count, int(header[3]))
+        return circuit
+
+    @staticmethod
+    def read_sdd(sdd_filename, psdd=False):
+        """Read an SDD (or PSDD) file, the children of a decision node are its primes and subs interleaved."""
+        name = 'psdd' if psdd else 'sdd'
+        lines = _CircuitFile.lines(sdd_filename, name)
+        header = next(lines, None)
+        if header is None:
+            raise Exception(f"An {name.upper()} file should start with '{name}'")
+        circuit = _CircuitFile(int(header[1]))
+        width = 3 if psdd else 2
+        for cols in lines:
+            nodeid = int(cols[1])
+            if cols[0] == 'L':
+                circuit.add_leaf(nodeid, _LITERAL, int(cols[3]))
+            elif cols[0] == 'T' and psdd:
+                circuit.add_leaf(nodeid, _THETA, int(cols[3]), float(cols[4]))
+            elif cols[0] == 'T':
+                circuit.add_leaf(nodeid, _TRUE)
+            elif cols[0] == 'F' and psdd:
+                raise Exception("There should be no false nodes")
+            elif cols[0] == 'F':
+                circuit.add_leaf(nodeid, _FALSE)
+            elif cols[0] == 'D':
+                elements = cols[4:4 + width * int(cols[3])]
+                children = [int(col) for idx, col in enumerate(elements) if idx % width != 2]
+                if psdd:
+                    circuit.element_thetas.extend(float(col) for col in elements[2::3])
+                circuit.add_node(nodeid, _OR, children)
+            else:
+                raise Exception(f"Unknown node in {name.upper()} file: {' '.join(cols)}")
+        return circuit
+
+
 def nnf_file_wmc(nnf_filename, weights=None):
     """Perform non-smoothed Weighted Model Counting on the given NNF file.
 
     This is an auxiliary function to perform WMC given an NNF file with only
-    Python code. This function will thus also work, even if the C SDD library
-    is not available.
+    Python code (and NumPy). This function will thus also work, even if the C SDD
+    library is not available.
+
+    The file is streamed once into flat arrays, after which the circuit is evaluated
+    for all queries at once, one group of nodes with the same height at a time.
 
     A typical NNF file looks like:
 
@@ -209,47 +433,34 @@ def nnf_file_wmc(nnf_filename, weights=None):
     A 2 3 9
     O 2 2 2 10
 
+    :param nnf_filename: Filename
+    :param weights: Dictionary literal -> weight (missing literals have weight 1), a list of such
+        dictionaries (one per query) or an array of shape (<nb_queries>, 2*var_count) with the literal
+        weights in the order of WmcManager.set_literal_weights_from_array (literals [-3, -2, -1, 1, 2, 3])
+    :return: Weighted model count, or an array with the count of every query if multiple queries are given
     """
-    wmc = []  # type: List[Optional[float]]
-    ln = 0
-    detected_nnf = False
-    true_weight = 1.0
-    false_weight = 0.0
-    with open(nnf_filename, 'r') as nnf_file:
-        for line in nnf_file.readlines():
-            cols = line.strip().split(' ')
-            if cols[0] == 'c':
-                continue
-            if cols[0] == 'nnf':
-                wmc = [None] * int(cols[1])
-                detected_nnf = True
-                continue
-            if not detected_nnf:
-                raise Exception(f"An NNF file should start with 'nnf'")
-            if cols[0] == 'L':
-                lit = int(cols[1])
-                if lit in weights:
-                    wmc[ln] = weights[lit]
-                else:
-                    wmc[ln] = true_weight
-            if cols[0] == 'A':
-                wmc[ln] = 1.0
-                for i in range(int(cols[1])):
-                    wmc[ln] *= wmc[int(cols[2 + i])]
-            if cols[0] == 'O':
-                wmc[ln] = false_weight
-                for i in range(int(cols[2])):
-                    wmc[ln] += wmc[int(cols[3 + i])]
-            ln += 1
-    return wmc[-1]
+    circuit = _CircuitFile.read_nnf(nnf_filename)
+    types, literals, keys, first, count, children = circuit.arrays()
+    weights, single = _literal_weight_matrix(weights, circuit.var_count)
+    values = _leaf_values(types, literals, weights)
+    # And- and or-nodes of the same height are evaluated separately
+    keys = np.where(keys > 0, 2 * keys + (types == _OR), 0)
+    for key, nodes, edges, starts in _node_groups(keys, first, count):
+        ufunc = np.add if key % 2 == 1 else np.multiply
+        values[nodes] = ufunc.reduceat(values[children[edges]], starts, axis=0)
+    result = values[circuit.root]
+    return float(result[0]) if single else result
 
 
 def sdd_file_wmc(sdd_filename, weights=None):
     """Perform non-smoothed Weighted Model Counting on the given SDD file.
 
     This is an auxiliary function to perform WMC given an SDD file with only
-    Python code. This function will thus also work, even if the C SDD library
-    is not available.
+    Python code (and NumPy). This function will thus also work, even if the C SDD
+    library is not available.
+
+    The file is streamed once into flat arrays, after which the circuit is evaluated
+    for all queries at once, one group of nodes with the same height at a time.
 
     A typical SDD file looks like:
 
@@ -257,54 +468,31 @@ def sdd_file_wmc(sdd_filename, weights=None):
     L 1 0 1
     ...
     D 0 1 2 1 2 7 8
+
+    :param sdd_filename: Filename
+    :param weights: Dictionary literal -> weight (missing literals have weight 1), a list of such
+        dictionaries (one per query) or an array of shape (<nb_queries>, 2*var_count) with the literal
+        weights in the order of WmcManager.set_literal_weights_from_array (literals [-3, -2, -1, 1, 2, 3])
+    :return: Weighted model count, or an array with the count of every query if multiple queries are given
     """
-    wmc = []  # type: List[Optional[float]]
-    ln = 0
-    detected_sdd = False
-    true_weight = 1.0
-    false_weight = 0.0
-    with open(sdd_filename, 'r') as sdd_file:
-        for line in sdd_file.readlines():
-            cols = line.strip().split(' ')
-            if cols[0] == 'c':
-                continue
-            if cols[0] == 'sdd':
-                detected_sdd = True
-                wmc = [None] * int(cols[1])
-                continue
-            if not detected_sdd:
-                raise Exception(f"An SDD file should start with 'sdd'")
-            if cols[0] == 'L':
-                nodeid = int(cols[1])
-                lit = int(cols[3])
-                if lit in weights:
-                    wmc[nodeid] = weights[lit]
-                else:
-                    wmc[nodeid] = 1.0
-            if cols[0] == 'F':
-                nodeid = int(cols[1])
-                wmc[nodeid] = false_weight
-            if cols[0] == 'T':
-                nodeid = int(cols[1])
-                wmc[nodeid] = true_weight
-            if cols[0] == 'D':
-                nodeid = int(cols[1])
-                nb_elmts = int(cols[3])
-                elmts = [int(col) for col in cols[4:]]
-                w = 0.0
-                for idx in range(nb_elmts):
-                    w += wmc[elmts[2 * idx]] * wmc[elmts[2 * idx + 1]]
-                wmc[nodeid] = w
-            ln += 1
-    return wmc[0]
+    circuit = _CircuitFile.read_sdd(sdd_filename)
+    types, literals, keys, first, count, children = circuit.arrays()
+    weights, single = _literal_weight_matrix(weights, circuit.var_count)
+    values = _leaf_values(types, literals, weights)
+    for _, nodes, edges, starts in _node_groups(keys, first, count):
+        # The children of a decision node are its primes and subs, interleaved
+        children_values = values[children[edges]]
+        values[nodes] = np.add.reduceat(children_values[0::2] * children_values[1::2], starts // 2, axis=0)
+    result = values[circuit.root]
+    return float(result[0]) if single else result
 
 
 def psdd_file_wmc(psdd_filename, observations=None):
     """Perform Weighted Model Counting on the given PSDD file.
 
     This is an auxiliary function to perform WMC given a PSDD file with only
-    Python code. This function will thus also work, even if the C SDD library
-    is not available.
+    Python code (and NumPy). This function will thus also work, even if the C SDD
+    library is not available.
 
     A typical PSDD file looks like (Yitao's version):
 
@@ -319,69 +507,32 @@ def psdd_file_wmc(psdd_filename, observations=None):
     psdd 49
     T 0 20 11 -0.6931471805599453
 
-    :return: log(WMC)
+    :param psdd_filename: Filename
+    :param observations: Dictionary variable -> value (True or False), a list of such dictionaries
+        (one per query) or an array of shape (<nb_queries>, var_count) with values 1 (true), 0 (false)
+        or -1 (not observed). Variables that are not observed are marginalized out.
+    :return: log(WMC), or an array with log(WMC) of every query if multiple queries are given
     """
-    wmc = []  # type: List[Optional[float]]
-    ln = 0
-    detected_psdd = False
-    with open(psdd_filename, 'r') as sdd_file:
-        for line in sdd_file.readlines():
-            cols = line.strip().split(' ')
-            if cols[0] == 'c':
-                continue
-            if cols[0] == 'psdd':
-                detected_psdd = True
-                wmc = [None] * int(cols[1])
-                continue
-            if not detected_psdd:
-                raise Exception(f"An SDD file should start with 'sdd'")
-            if cols[0] == 'L':
-                nodeid = int(cols[1])
-                lit = int(cols[2])
-                if observations is not None and lit in observations:
-                    if var > 0:
-                        wmc[nodeid] = 0.0 if observations[lit] else -math.inf
-                    else:
-                        wmc[nodeid] = 0.0 if not observations[lit] else -math.inf
-                else:
-                    wmc[nodeid] = 0.0
-            if cols[0] == 'F':
-                raise Exception("There should be no false nodes")
-                # nodeid = int(cols[1])
-                # wmc[nodeid] = -math.inf
-            if cols[0] == 'T':
-                nodeid, vtreeid, lit = [int(val) for val in cols[1:4]]
-                var = abs(lit)
-                theta = float(cols[4])
-                if observations is not None and var in observations:
-                    if lit > 0:
-                        logprob = 0.0 if observations[var] else -math.inf
-                    else:
-                        logprob = 0.0 if not observations[var] else -math.inf
-                else:
-                    logprob = theta
-                wmc[nodeid] = logprob
-            if cols[0] == 'D':
-                nodeid, vtree_id, nb_elmts = [int(val) for val in cols[1:4]]
-                elmts = cols[4:]
-                w = -math.inf
-                for idx in range(nb_elmts):
-                    p, s, t = elmts[3 * idx: 3 * idx + 3]
-                    wmc_p = wmc[int(p)]
-                    wmc_s = wmc[int(s)]
-                    theta = float(s)
-                    add = wmc_p + wmc_s + theta
-                    if math.isinf(w) and w < 0:
-                        w = add
-                    elif math.isinf(add) and add < 0:
-                        pass
-                    elif w < add:
-                        w = add + math.log1p(math.exp(w - add))
-                    else:
-                        w = w + math.log1p(math.exp(add - w))
-                wmc[nodeid] = w
-            ln += 1
-    return wmc[0]
+    circuit = _CircuitFile.read_sdd(psdd_filename, psdd=True)
+    types, literals, keys, first, count, children = circuit.arrays()
+    observations, single = _observation_matrix(observations, circuit.var_count)
+    values = np.zeros((circuit.node_count, observations.shape[0]))
+    is_literal = types == _LITERAL
+    lits = literals[is_literal]
+    observed = observations[:, np.abs(lits) - 1].T
+    values[is_literal] = np.where(observed == (lits < 0)[:, np.newaxis], -np.inf, 0.0)
+    is_theta = types == _THETA
+    thetas = np.frombuffer(circuit.thetas, dtype=np.float64)[is_theta][:, np.newaxis]
+    observed = observations[:, np.abs(literals[is_theta]) - 1].T
+    with np.errstate(divide="ignore"):
+        values[is_theta] = np.where(observed == 1, thetas, np.where(observed == 0, np.log1p(-np.exp(thetas)), 0.0))
+    element_thetas = np.frombuffer(circuit.element_thetas, dtype=np.float64)
+    for _, nodes, edges, starts in _node_groups(keys, first, count):
+        children_values = values[children[edges]]
+        products = children_values[0::2] + children_values[1::2] + element_thetas[edges[0::2] // 2, np.newaxis]
+        values[nodes] = np.logaddexp.reduceat(products, starts // 2, axis=0)
+    result = values[circuit.root]
+    return float(result[0]) if single else result
 
 
 class BitArray:
@@ -0,0 +1,58 @@
+from pysdd.sdd import SddManager, Vtree, Fnf
+from pysdd.cache import CompilationCache
+import numpy as np
+import os
+from pathlib import Path
+
+
+here = Path(__file__).parent
+
+
+def test_cache_hit(tmp_path):
+    cnf_file = bytes(here / "rsrc" / "test.cnf")
+    mgr1, node1 = SddManager.from_cnf_file(cnf_file, cache_dir=tmp_path)
+    cache = CompilationCache(tmp_path)
+    entries = cache.entries()
+    assert len(entries) == 1
+    os.utime(entries[0], (0, 0))
+    mgr2, node2 = SddManager.from_cnf_file(cnf_file, cache_dir=tmp_path)
+    assert len(cache.entries()) == 1
+    assert entries[0].stat().st_mtime > 0  # loaded from the cache
+    assert node2.model_count() == node1.model_count()
+    assert all(np.array_equal(a, b) for a, b in zip(mgr1.vtree().to_arrays(), mgr2.vtree().to_arrays()))
+    assert mgr2.root == node2
+
+
+def test_cache_key():
+    vtree = Vtree(var_count=4, vtree_type="balanced")
+    key = CompilationCache.key(Fnf.from_clauses([[1, -2], [3, 4, 3]]), vtree)
+    assert CompilationCache.key(Fnf.from_clauses([[4, 3], [-2, 1], [1, -2]]), vtree) == key
+    assert CompilationCache.key(Fnf.from_clauses([[1, -2], [3, 4]], dnf=True), vtree) != key
+    assert CompilationCache.key(Fnf.from_clauses([[1, -2], [3, 4]], var_count=5),
+                                Vtree(var_count=5, vtree_type="balanced")) != key
+    assert CompilationCache.key(Fnf.from_clauses([[1, -2], [3, 4]]), Vtree(var_count=4, vtree_type="right")) != key
+    assert CompilationCache.key(Fnf.from_clauses([[1, -2], [3, 4]]), vtree, (1,)) != key
+
+
+def test_cache_eviction(tmp_path):
+    cache = CompilationCache(tmp_path, max_size=0)
+    for var_count in range(3, 6):
+        clauses = [[i, -(i % var_count + 1)] for i in range(1, var_count + 1)]
+        mgr, node = SddManager.from_clauses(clauses, cache_dir=cache)
+        assert node.model_count() == 2
+        assert len(cache.entries()) == 1  # only the last entry is kept
+    cache.max_size = None
+    SddManager.from_clauses([[1, 2]], cache_dir=cache)
+    assert len(cache.entries()) == 2
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_cache_manager_state(tmp_path):
+    for clauses in [[[1, -2], [2, 3], [-1, 3, 4]], [[1, 2], []]]:
+        miss_mgr, miss_node = SddManager.from_clauses(clauses, var_count=4, cache_dir=tmp_path)
+        hit_mgr, hit_node = SddManager.from_clauses(clauses, var_count=4, cache_dir=tmp_path)
+        assert hit_node.model_count() == miss_node.model_count()
+        assert hit_mgr.is_auto_gc_and_minimize_on() == miss_mgr.is_auto_gc_and_minimize_on()
+        assert hit_mgr.is_prevent_transformation_on() == miss_mgr.is_prevent_transformation_on()
+        assert hit_mgr.var_count() == miss_mgr.var_count()
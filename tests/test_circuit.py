@@ -0,0 +1,124 @@
+from pysdd.sdd import SddManager, Vtree
+from pysdd.circuit import CompiledCircuit
+import numpy as np
+import pytest
+import pickle
+
+
+def test_to_arrays():
+    vtree = Vtree(var_count=4, var_order=[2, 1, 4, 3], vtree_type="balanced")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d = sdd.vars
+    formula = (a & b) | (b & c) | (c & d)
+    circuit = formula.to_arrays()
+    assert np.sum(circuit.types == CompiledCircuit.DECISION) == formula.count()
+    assert circuit.types[circuit.root] == CompiledCircuit.DECISION
+    assert circuit.ids[circuit.root] == formula.id
+    assert len(circuit.element_offsets) == circuit.node_count + 1
+    assert circuit.element_offsets[-1] == circuit.element_count == formula.size()
+    # children appear before parents
+    node_of_element = np.repeat(np.arange(circuit.node_count), np.diff(circuit.element_offsets))
+    assert np.all(circuit.primes < node_of_element) and np.all(circuit.subs < node_of_element)
+    left, right, var = vtree.to_arrays()
+    assert np.array_equal(circuit.vtree_vars, var)
+    assert sorted(var[var > 0]) == [1, 2, 3, 4]
+    assert circuit.vtree_root == vtree.position()
+
+
+def test_circuit_wmc():
+    vtree = Vtree(var_count=6, var_order=[2, 1, 4, 3, 6, 5], vtree_type="right")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d, e, f = sdd.vars
+    rng = np.random.default_rng(0)
+    weights = rng.uniform(0.1, 1.0, size=(5, 12))
+    for formula in [(a & b) | (c & ~d), (a | e) & ~c, a, sdd.true(), sdd.false()]:
+        circuit = formula.to_arrays()
+        wmc = formula.wmc(log_mode=False)
+        expected = []
+        for row in weights:
+            wmc.set_literal_weights_from_array(row)
+            expected.append(wmc.propagate())
+        assert circuit.wmc(weights) == pytest.approx(expected)
+        assert np.exp(circuit.wmc(np.log(weights), log_mode=True)) == pytest.approx(expected)
+        assert circuit.wmc(weights[0]) == pytest.approx(expected[0])
+        circuit = pickle.loads(pickle.dumps(circuit))
+        assert circuit.wmc(weights) == pytest.approx(expected)
+    with pytest.raises(ValueError):
+        circuit.wmc(np.ones(4))
+
+
+def test_binary_file(tmp_path):
+    vtree = Vtree(var_count=6, var_order=[2, 1, 4, 3, 6, 5], vtree_type="right")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d, e, f = sdd.vars
+    weights = np.random.default_rng(0).uniform(0.1, 1.0, size=(3, 12))
+    fname = tmp_path / "sdd.bin"
+    for formula in [(a & b) | (c & ~d), (a | e) & ~c, ~a, sdd.true(), sdd.false()]:
+        sdd.save_binary(str(fname), formula)
+        assert sdd.read_binary_file(str(fname)) == formula
+        mgr, node = SddManager.from_binary_file(str(fname))
+        assert node.global_model_count() == formula.global_model_count()
+        assert node.size() == formula.size()
+        for mmap in [True, False]:
+            circuit = CompiledCircuit.load(str(fname), mmap=mmap)
+            assert circuit.wmc(weights) == pytest.approx(formula.to_arrays().wmc(weights))
+
+    other = SddManager.from_vtree(Vtree(var_count=6, vtree_type="balanced"))
+    with pytest.raises(ValueError):
+        other.read_binary_file(str(fname))
+    with open(fname, "wb") as ofile:
+        ofile.write(b"sdd 1\n")
+    with pytest.raises(ValueError):
+        CompiledCircuit.load(str(fname))
+
+
+def test_vtree_arrays():
+    vtree = Vtree(var_count=5, var_order=[3, 1, 5, 2, 4], vtree_type="vertical")
+    left, right, var = vtree.to_arrays()
+    vtree2 = Vtree.from_arrays(left, right, var)
+    assert vtree2.var_count() == 5
+    for arr1, arr2 in zip(vtree2.to_arrays(), (left, right, var)):
+        assert np.array_equal(arr1, arr2)
+    with pytest.raises(ValueError):
+        Vtree.from_arrays(left[:-1], right[:-1], var[:-1])
+
+
+def test_binary_file_corrupt(tmp_path):
+    vtree = Vtree(var_count=6, var_order=[2, 1, 4, 3, 6, 5], vtree_type="right")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d, e, f = sdd.vars
+    fname = tmp_path / "sdd.bin"
+    sdd.save_binary(str(fname), (a & b) | (c & ~d) | (e & f))
+    circuit = CompiledCircuit.load(str(fname), mmap=False)
+    corruptions = [
+        ("primes", 0, 10**6), ("subs", -1, circuit.root), ("primes", 0, -1), ("types", 0, 7),
+        ("literals", int(np.flatnonzero(circuit.literals)[0]), 7), ("element_offsets", circuit.root, 0),
+        ("element_offsets", -1, circuit.element_count + 1), ("vtree_positions", -1, 100),
+        ("vtree_left", circuit.vtree_root, 100), ("vtree_right", circuit.vtree_root, circuit.vtree_root),
+        ("vtree_vars", int(np.flatnonzero(circuit.vtree_vars == 1)[0]), 2),
+    ]
+    for name, index, value in corruptions:
+        corrupt = CompiledCircuit.load(str(fname), mmap=False)
+        getattr(corrupt, name)[index] = value
+        with pytest.raises(ValueError):
+            sdd.circuit_to_sdd(corrupt)
+        corrupt.save(str(tmp_path / "corrupt.bin"))
+        with pytest.raises(ValueError):
+            CompiledCircuit.load(str(tmp_path / "corrupt.bin"))
+        # Without validation the file is loaded, but it is still checked before it is passed to libsdd
+        CompiledCircuit.load(str(tmp_path / "corrupt.bin"), validate=False)
+        with pytest.raises(ValueError):
+            SddManager.from_binary_file(str(tmp_path / "corrupt.bin"))
+
+
+def test_vtree_arrays_invalid():
+    left, right, var = Vtree(var_count=4, vtree_type="balanced").to_arrays()
+    Vtree.from_arrays(left, right, var)
+    for arrays in [
+        (left, right, np.where(var == 4, 3, var)),  # duplicate variable
+        (np.where(left == 0, 10, left), right, var),  # child out of range
+        (np.where(left == 0, 2, left), right, var),  # two parents
+        (left[::-1], right[::-1], var[::-1]),  # positions not in-order
+    ]:
+        with pytest.raises(ValueError):
+            Vtree.from_arrays(*arrays)
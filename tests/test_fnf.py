@@ -0,0 +1,108 @@
+from pysdd.sdd import SddManager, Vtree, Fnf, CompilerOptions, CompilationAborted, CancellationToken
+import numpy as np
+import pytest
+
+
+def test_from_clauses():
+    clauses = [[1, -2], [2, 3, -4], [-1, 4]]
+    cnf = "c comment\np cnf 5 3\n1 -2 0\n2 3 -4 0\n-1 4 0\n"
+    padded = np.array([[1, -2, 0], [2, 3, -4], [-1, 4, 0]], dtype=np.int32)
+    fnfs = [Fnf.from_clauses(clauses, var_count=5),
+            Fnf.from_clauses(padded, var_count=5),
+            Fnf.from_buffer(np.array([1, -2, 0, 2, 3, -4, 0, -1, 4, 0]), var_count=5),
+            Fnf.from_cnf_string(cnf)]
+    for fnf in fnfs:
+        assert fnf.var_count == 5
+        assert fnf.litsets() == clauses
+        mgr, node = SddManager.from_fnf(fnf)
+        assert node.global_model_count() == 2 * 6
+    mgr, node = SddManager.from_cnf_string(cnf)
+    assert node.global_model_count() == 2 * 6
+    assert Fnf.from_clauses(clauses).var_count == 4
+
+
+def test_from_clauses_dnf():
+    terms = [[1, 2], [-1, 3]]
+    fnf = Fnf.from_clauses(terms, dnf=True)
+    mgr, node = SddManager.from_fnf(fnf)
+    assert node.global_model_count() == 4
+    mgr, node = SddManager.from_dnf_string("p cnf 3 2\n1 2 0\n-1 3 0\n")
+    assert node.global_model_count() == 4
+
+
+def test_from_cnf_string_clause_count(tmp_path):
+    # Only the number of clauses in the header is read, as in from_cnf_file
+    cnf = "p cnf 3 1\n1 -2 0\n2 3 0\n"
+    fname = tmp_path / "test.cnf"
+    fname.write_text(cnf)
+    mgr, node = SddManager.from_cnf_file(bytes(fname))
+    mgr_s, node_s = SddManager.from_cnf_string(cnf)
+    assert node.global_model_count() == node_s.global_model_count() == 6
+    assert Fnf.from_cnf_string(cnf).litsets() == [[1, -2]]
+    with pytest.raises(ValueError):
+        Fnf.from_cnf_string("p cnf 3 3\n1 -2 0\n2 3 0\n")
+
+
+def test_from_clauses_errors():
+    with pytest.raises(ValueError):
+        Fnf.from_clauses([[1, 0, 2]])
+    with pytest.raises(ValueError):
+        Fnf.from_clauses([[1, 5]], var_count=3)
+    with pytest.raises(ValueError):
+        Fnf.from_buffer([1, 2, 0, 3])
+
+
+def chain_clauses(var_count):
+    return [[i, -(i % var_count + 1), (3 * i) % var_count + 1] for i in range(1, var_count + 1)]
+
+
+def test_compile_limits_vtree_search():
+    # A single vtree search (period 45 of 48 clauses) takes longer than the timeout
+    rng = np.random.default_rng(30)
+    variables = np.array([rng.choice(30, 3, replace=False) + 1 for _ in range(48)])
+    fnf = Fnf.from_clauses(variables * rng.choice([-1, 1], size=(48, 3)), var_count=30)
+    mgr = SddManager(vtree=Vtree(var_count=30, vtree_type="right"))
+    mgr.set_options(CompilerOptions(vtree_search_mode=45))
+    with pytest.raises(CompilationAborted) as excinfo:
+        mgr.fnf_to_sdd(fnf, timeout=0.5)
+    assert excinfo.value.reason == "timeout"
+    assert excinfo.value.stats["elapsed"] < 1.5
+    assert mgr.stats()["auto_search_count_aborted_search"] == 1
+    mgr.set_options(CompilerOptions(vtree_search_mode=0))
+    node = mgr.fnf_to_sdd(fnf)
+    assert node.global_model_count() == SddManager.from_fnf(fnf)[1].global_model_count()
+
+
+def test_compile_limits():
+    fnf = Fnf.from_clauses(chain_clauses(30))
+    token = CancellationToken()
+    token.cancel()
+    with pytest.raises(CompilationAborted) as excinfo:
+        SddManager.from_fnf(fnf, cancel=token)
+    assert excinfo.value.reason == "cancelled"
+    assert excinfo.value.stats["litsets_done"] == 0
+    mgr = excinfo.value.manager
+    node = mgr.fnf_to_sdd(fnf)
+    expected = node.global_model_count()
+
+    with pytest.raises(CompilationAborted) as excinfo:
+        SddManager.from_fnf(fnf, max_node_count=5)
+    assert excinfo.value.reason == "node_budget"
+    assert 0 < excinfo.value.stats["litsets_done"] < fnf.litset_count
+    mgr = excinfo.value.manager
+    mgr.garbage_collect()
+    assert mgr.live_count() == 0
+    assert mgr.fnf_to_sdd(fnf).global_model_count() == expected
+
+    mgr, node = SddManager.from_fnf(fnf, timeout=60, max_node_count=10**6, max_memory=1024)
+    assert node.global_model_count() == expected
+
+    # The other constructors accept the same limits
+    clauses = chain_clauses(30)
+    cnf = "p cnf 30 30\n" + "".join(" ".join(map(str, clause)) + " 0\n" for clause in clauses)
+    for construct in [lambda **limits: SddManager.from_clauses(clauses, **limits),
+                      lambda **limits: SddManager.from_cnf_string(cnf, **limits),
+                      lambda **limits: SddManager.from_dnf_string(cnf, **limits)]:
+        with pytest.raises(CompilationAborted):
+            construct(cancel=token)
+        mgr, node = construct(timeout=60)
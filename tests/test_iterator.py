@@ -144,6 +144,25 @@ def test_it4():
     assert mc == 12, "MC {} != 3 * 2**2 = 12".format(mc)
 
 
+def test_it_deep():
+    """A chain of decision nodes that is deeper than the recursion limit."""
+    var_count = sys.getrecursionlimit() + 100
+    vtree = Vtree(var_count=var_count, vtree_type="right")
+    sdd = SddManager.from_vtree(vtree)
+    f = sdd.true()
+    for var in range(1, var_count - 2):
+        f = f & (sdd.literal(var) if var % 2 == 0 else ~sdd.literal(var))
+    f = f & (sdd.literal(var_count - 2) | sdd.literal(var_count - 1))
+
+    it = SddIterator(sdd, smooth=True, smooth_to_root=True)
+    mc = it.depth_first(f, SddIterator.func_modelcounting)
+    assert mc == 6, "MC {} != 3 * 2 = 6".format(mc)
+
+    it = SddIterator(sdd, smooth=False)
+    mc = it.depth_first(f, SddIterator.func_modelcounting)
+    assert mc == 2, "MC (non-smooth) {} != 2".format(mc)
+
+
 if __name__ == "__main__":
     logger.setLevel(logging.DEBUG)
     sh = logging.StreamHandler(sys.stdout)
@@ -75,6 +75,24 @@ def test_min2():
         #     print(sdd_to_dot(sdd), file=out)
 
 
+def test_stats():
+    here = Path(__file__).parent
+    sdd, root = SddManager.from_cnf_file(bytes(here / "rsrc" / "test.cnf"))
+    stats = sdd.stats()
+    assert stats["fnf_to_sdd_count"] == 1 and stats["minimize_count"] == 0
+    assert stats["apply_count"] > 0
+    assert stats["computed_cache_hit_count"] <= stats["computed_cache_lookup_count"]
+    assert stats["node_count"] == sdd.count() and stats["dead_node_count"] == sdd.dead_count()
+    assert stats["sdd_size"] == sdd.size() and stats["dead_sdd_size"] == sdd.dead_size()
+    root.ref()
+    sdd.minimize()
+    stats2 = sdd.stats()
+    assert stats2["minimize_count"] == 1 and stats2["minimize_time"] >= 0
+    assert stats2["gc_count"] > stats["gc_count"]
+    assert stats2["dead_node_count"] == 0
+    assert stats2["unique_table_count"] == stats2["node_count"]
+
+
 if __name__ == "__main__":
     logger.setLevel(logging.DEBUG)
     sh = logging.StreamHandler(sys.stdout)
@@ -1,6 +1,8 @@
 from pysdd.util import nnf_file_wmc, sdd_file_wmc, psdd_file_wmc
 from pysdd.sdd import Fnf, Vtree, SddManager
 from pysdd import cli
+import numpy as np
+import pytest
 import sys
 import os
 import math
@@ -67,6 +69,31 @@ def test_psdd1():
     wmc = psdd_file_wmc(here / "rsrc" / "test.psdd", None)
     wmc = math.exp(wmc)
     print("WMC", wmc)
+    assert wmc == pytest.approx(1.0)
+
+
+def test_psdd2():
+    queries = [{1: v1, 8: v8} for v1 in [False, True] for v8 in [False, True]]
+    wmcs = psdd_file_wmc(here / "rsrc" / "test.psdd", queries)
+    assert len(wmcs) == 4
+    assert np.exp(wmcs).sum() == pytest.approx(1.0)
+    assert wmcs[1] == pytest.approx(psdd_file_wmc(here / "rsrc" / "test.psdd", queries[1]))
+
+
+def test_batch1():
+    rng = np.random.default_rng(42)
+    #                 -5 -4 -3 -2 -1  1  2  3  4  5
+    weights = rng.uniform(0.1, 1.0, size=(5, 10))
+    for fn, wmc_file in [(here / "rsrc" / "dimacs1.sdd", sdd_file_wmc),
+                         (here / "rsrc" / "test.sdd", sdd_file_wmc),
+                         (here / "rsrc" / "test.cnf.nnf", nnf_file_wmc)]:
+        results = wmc_file(fn, weights)
+        expected = []
+        for row in weights:
+            query = {lit: row[5 + lit - 1] if lit > 0 else row[5 + lit] for lit in range(-5, 6) if lit != 0}
+            expected.append(wmc_file(fn, query))
+        assert results == pytest.approx(expected)
+        assert wmc_file(fn, weights[0]) == pytest.approx(expected[0])
 
 
 def test_dimacs1():
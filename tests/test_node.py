@@ -0,0 +1,143 @@
+from pysdd.sdd import SddManager, Vtree
+import numpy as np
+import pytest
+import io
+
+
+def test_element_ids():
+    vtree = Vtree(var_count=4, var_order=[2, 1, 4, 3], vtree_type="balanced")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d = sdd.vars
+    formula = (a & b) | (b & c) | (c & d)
+    ids = formula.element_ids()
+    assert ids.shape == (formula.node_size(), 2)
+    assert ids.tolist() == [[prime.id, sub.id] for prime, sub in formula.elements()]
+    assert a.element_ids().shape == (0, 2)
+
+
+def test_save_file_object(tmp_path):
+    vtree = Vtree(var_count=4, var_order=[2, 1, 4, 3], vtree_type="balanced")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d = sdd.vars
+    formula = (a & b) | (b & c) | (c & d)
+    formula.save(str(tmp_path / "formula.sdd"))
+    out = io.StringIO()
+    formula.save(out)
+    assert out.getvalue() == (tmp_path / "formula.sdd").read_text()
+    vtree.save(tmp_path / "formula.vtree")
+    out = io.BytesIO()
+    vtree.save(out)
+    assert out.getvalue() == (tmp_path / "formula.vtree").read_bytes()
+    sdd.save_as_dot(tmp_path / "formula.dot", formula)
+    assert formula.dot() == (tmp_path / "formula.dot").read_text()
+    vtree.save_as_dot(tmp_path / "vtree.dot")
+    assert vtree.dot() == (tmp_path / "vtree.dot").read_text()
+
+
+def test_model_blocks():
+    vtree = Vtree(var_count=6, var_order=[2, 1, 6, 5, 3, 4], vtree_type="balanced")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d, e, f = sdd.vars
+    formula = ((a & b) | (b & c) | (c & d)) & (e | ~f)
+    formula.ref()
+
+    def satisfies(values):
+        a, b, c, d, e, f = values
+        return ((a and b) or (b and c) or (c and d)) and (e or not f)
+
+    models = np.vstack(list(formula.model_blocks(block_size=7)))
+    assert len(models) == formula.global_model_count()
+    assert len({tuple(row) for row in models}) == len(models)
+    assert all(satisfies(row) for row in models)
+    assert [[model[var] for var in range(1, 7)] for model in formula.models()] == models.tolist()
+
+    projected = np.vstack(list(formula.model_blocks([3, 1])))
+    assert sorted(map(tuple, projected)) == [(0, 1), (1, 0), (1, 1)]
+    part = np.vstack(list(formula.model_blocks(limit=5, offset=3, block_size=2)))
+    assert (part == models[3:8]).all()
+    packed = np.vstack(list(formula.model_blocks(packed=True)))
+    assert (np.unpackbits(packed, axis=1)[:, :6] == models).all()
+    assert list((a & ~a).model_blocks()) == []
+    formula.deref()
+
+
+def test_model_count_exact():
+    sdd = SddManager.from_vtree(Vtree(var_count=6, vtree_type="balanced"))
+    a, b, c, d, e, f = sdd.vars
+    for formula in [(a & b) | (c & ~d), ~((a | e) & (b | ~f)), sdd.true()]:
+        assert formula.model_count_exact() == formula.model_count()
+        assert formula.global_model_count_exact() == formula.global_model_count()
+        assert np.isclose(formula.log2_model_count(global_count=True), np.log2(formula.global_model_count()))
+    assert sdd.false().model_count_exact() == 0
+    assert sdd.false().log2_model_count() == -np.inf
+
+    var_count = 200
+    sdd = SddManager.from_vtree(Vtree(var_count=var_count, vtree_type="right"))
+    formula = sdd.literal(1) | sdd.literal(var_count)
+    assert formula.model_count_exact() == 3
+    assert formula.global_model_count_exact() == 3 * 2 ** (var_count - 2)
+    formula = sdd.true()
+    for var in range(1, var_count, 2):
+        formula = formula & (sdd.literal(var) | sdd.literal(var + 1))
+    assert formula.model_count_exact() == 3 ** (var_count // 2)
+    assert np.isclose(formula.log2_model_count(), var_count // 2 * np.log2(3))
+
+
+def test_condition_multiple():
+    for vtree_type in ["balanced", "right", "vertical"]:
+        vtree = Vtree(var_count=8, var_order=[3, 1, 8, 2, 7, 4, 6, 5], vtree_type=vtree_type)
+        sdd = SddManager.from_vtree(vtree)
+        a, b, c, d, e, f, g, h = sdd.vars
+        formula = ((a & ~b) | (c & d & ~e)) & (f | ~g | h) | (b & g)
+        for literals in [[], [1], [-2, 7], [2, -3, 5, -8], [1, 2, 3, 4, 5, 6, 7, 8], [-6, 4, -1]]:
+            expected = formula
+            for lit in literals:
+                expected = expected.condition(lit)
+            assert formula.condition_multiple(literals) == expected
+            assert sdd.condition_multiple(np.array(literals, dtype=np.int64), formula) == expected
+        assert formula.condition_multiple([a, ~g]) == formula.condition(1).condition(-7)
+        assert formula.condition_multiple(list(np.array([1, -7]))) == formula.condition(1).condition(-7)
+        assert formula.condition_multiple([2, -2]) == sdd.false()
+        assert formula.condition_multiple([b, 3, ~b]) == sdd.false()
+        with pytest.raises(ValueError):
+            formula.condition_multiple([9])
+
+
+def test_conjoin_all():
+    for vtree_type in ["balanced", "right", "vertical"]:
+        vtree = Vtree(var_count=8, var_order=[3, 1, 8, 2, 7, 4, 6, 5], vtree_type=vtree_type)
+        sdd = SddManager.from_vtree(vtree)
+        lits = [sdd.literal(i) for i in range(1, 9)]
+        clauses = [lits[i % 8] | ~lits[(3 * i + 1) % 8] | lits[(5 * i + 2) % 8] for i in range(12)]
+        expected_and, expected_or = sdd.true(), sdd.false()
+        for clause in clauses:
+            expected_and = expected_and & clause
+            expected_or = expected_or | ~clause
+        assert sdd.conjoin_all(clauses) == expected_and
+        assert sdd.disjoin_all(~clause for clause in clauses) == expected_or
+        assert sdd.conjoin_all([]) == sdd.true()
+        assert sdd.disjoin_all([]) == sdd.false()
+        assert sdd.conjoin_all([lits[0], sdd.true(), ~lits[1]]) == lits[0] & ~lits[1]
+        assert sdd.conjoin_all([lits[0], lits[1], ~lits[0]]) == sdd.false()
+        assert sdd.disjoin_all([lits[0], sdd.true()]) == sdd.true()
+
+
+def test_conjoin_all_auto_minimize():
+    sdd = SddManager(var_count=20, auto_gc_and_minimize=True)
+    lits = [sdd.literal(i) for i in range(1, 21)]
+    clauses = []
+    for i in range(40):
+        # With automatic garbage collection, the nodes need to be referenced until they are used
+        clause = lits[i % 20] | ~lits[(7 * i + 3) % 20] | lits[(11 * i + 5) % 20]
+        clause.ref()
+        clauses.append(clause)
+    node = sdd.conjoin_all(clauses)
+    node.ref()
+    for clause in clauses:
+        clause.deref()
+    models = [[lit if value else -lit for lit, value in sorted(model.items())] for model in node.models()]
+    assert node.model_count() == len(models)
+    for i in range(40):
+        clause = {i % 20 + 1, -((7 * i + 3) % 20 + 1), (11 * i + 5) % 20 + 1}
+        assert all(any(lit in clause for lit in model) for model in models)
+    node.deref()
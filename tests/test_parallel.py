@@ -0,0 +1,57 @@
+from pysdd.sdd import SddManager
+from pysdd.parallel import compile_cnf, components
+import numpy as np
+import pytest
+import itertools
+from pathlib import Path
+
+
+here = Path(__file__).parent
+
+
+def brute_force_wmc(clauses, var_count, weights):
+    total = 0.0
+    for values in itertools.product([False, True], repeat=var_count):
+        if all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause) for clause in clauses):
+            weight = 1.0
+            for var in range(1, var_count + 1):
+                weight *= weights[var_count + var - 1] if values[var - 1] else weights[var_count - var]
+            total += weight
+    return total
+
+
+def test_components():
+    clauses = [[1, -2], [4, 5], [2, 3], [-5, 6], []]
+    comps, free_variables = components(clauses, 7)
+    assert comps == [([1, 2, 3], [[1, -2], [2, 3]]), ([4, 5, 6], [[4, 5], [-5, 6]]), ([], [[]])]
+    assert free_variables == [7]
+
+
+def test_compile_cnf():
+    clauses = [[1, -2], [2, 3], [4, 5], [-5, 6], [7, -8, 9], [9, 10]]
+    result = compile_cnf(clauses, max_workers=2, var_count=11)
+    assert len(result) == 3
+    assert result.free_variables == [11]
+    assert result.model_count() == 4 * 4 * 11 * 2
+
+    weights = np.random.default_rng(1).uniform(0.1, 1.0, size=22)
+    expected = brute_force_wmc(clauses, 11, weights)
+    assert result.wmc(weights, log_mode=False) == pytest.approx(expected)
+    assert np.exp(result.wmc(np.log(weights), log_mode=True)) == pytest.approx(expected)
+
+    counts = compile_cnf(clauses, max_workers=1, load_sdds=False, var_count=11)
+    assert [c.model_count for c in counts] == [c.model_count for c in result]
+    assert counts[0].root is None
+
+
+def test_compile_cnf_file():
+    fname = here / "rsrc" / "test.cnf"
+    mgr, node = SddManager.from_cnf_file(bytes(fname))
+    result = compile_cnf(str(fname))
+    assert result.model_count() == node.global_model_count()
+
+
+def test_compile_cnf_unsat():
+    result = compile_cnf([[1], [], [2]])
+    assert result.model_count() == 0
+    assert result.wmc(np.ones(4), log_mode=False) == 0
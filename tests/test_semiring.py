@@ -0,0 +1,76 @@
+from pysdd.sdd import SddManager, Vtree
+from pysdd import semiring
+from pysdd.semiring import Semiring
+import itertools
+import numpy as np
+import pytest
+
+
+def models(node, var_count):
+    """All models of node as tuples of literals."""
+    result = []
+    for values in itertools.product([False, True], repeat=var_count):
+        lits = [var if value else -var for var, value in zip(range(1, var_count + 1), values)]
+        cond = node
+        for lit in lits:
+            cond = cond.condition(lit)
+        if cond.is_true():
+            result.append(lits)
+    return result
+
+
+def weight(weights, lit, var_count):
+    return weights[var_count + lit - 1] if lit > 0 else weights[var_count + lit]
+
+
+def formulas():
+    vtree = Vtree(var_count=5, var_order=[2, 1, 5, 3, 4], vtree_type="right")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d, e = sdd.vars
+    return sdd, [(a & b) | (b & c) | (c & d), a | ~e, ~b & d, a | ~a, a & ~a, e]
+
+
+def test_builtin():
+    sdd, fs = formulas()
+    n = sdd.var_count()
+    rng = np.random.default_rng(1)
+    weights = rng.uniform(0.1, 1.0, size=(4, 2 * n))
+    for f in fs:
+        circuit = f.to_arrays()
+        ms = models(f, n)
+        for native in [True, False]:
+            expected = [sum(np.prod([weight(w, lit, n) for lit in m]) for m in ms) for w in weights]
+            assert circuit.evaluate(semiring.PROBABILITY, weights, native=native) == pytest.approx(expected)
+            with np.errstate(divide="ignore"):
+                log_expected = np.log(expected)
+            assert circuit.evaluate(semiring.LOG_PROBABILITY, np.log(weights), native=native) == \
+                pytest.approx(log_expected)
+            expected = [max([np.prod([weight(w, lit, n) for lit in m]) for m in ms], default=0) for w in weights]
+            assert circuit.evaluate(semiring.MAX_PRODUCT, weights, native=native) == pytest.approx(expected)
+            expected = [min([sum(weight(w, lit, n) for lit in m) for m in ms], default=np.inf) for w in weights]
+            assert circuit.evaluate(semiring.MIN_PLUS, weights, native=native) == pytest.approx(expected)
+            allowed = weights > 0.5
+            expected = [any(all(weight(w, lit, n) for lit in m) for m in ms) for w in allowed]
+            assert list(circuit.evaluate(semiring.BOOLEAN, allowed, native=native)) == expected
+            assert circuit.evaluate(semiring.COUNTING, native=native) == len(ms)
+
+
+def test_counting_bigint():
+    var_count = 80
+    sdd = SddManager(var_count=var_count)
+    f = sdd.literal(1) | sdd.literal(2)
+    count = f.to_arrays().evaluate(semiring.COUNTING)
+    assert isinstance(count, int)
+    assert count == 3 * 2**(var_count - 2)
+
+
+def test_custom():
+    """A semiring with operations that are not ufuncs: minimal number of true variables."""
+    sdd, fs = formulas()
+    n = sdd.var_count()
+    tropical = Semiring(np.inf, 0.0, lambda x, y: np.minimum(x, y), lambda x, y: x + y)
+    cardinality = np.array([0.0] * n + [1.0] * n)
+    for f in fs:
+        expected = min([sum(lit > 0 for lit in m) for m in models(f, n)], default=np.inf)
+        assert f.to_arrays().evaluate(tropical, cardinality) == expected
+        assert f.to_arrays().evaluate(semiring.MIN_PLUS, cardinality) == expected
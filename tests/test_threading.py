@@ -0,0 +1,64 @@
+import math
+from pysdd.sdd import SddManager, Vtree
+from concurrent.futures import ThreadPoolExecutor
+
+
+def cnf_string(var_count, clause_count):
+    clauses = [f"{i % var_count + 1} {-((i * 3) % var_count + 1)} {(i * 7) % var_count + 1} 0"
+               for i in range(1, clause_count + 1)]
+    return f"p cnf {var_count} {clause_count}\n" + "\n".join(clauses) + "\n"
+
+
+def compile_and_count(cnf):
+    mgr, node = SddManager.from_cnf_string(cnf)
+    node.ref()
+    mgr.minimize_limited()
+    mc = node.model_count()
+    wmc = node.wmc(log_mode=False).propagate()
+    return mc, wmc
+
+
+def test_threads_compile():
+    cnfs = [cnf_string(20 + i, 50 + 10 * i) for i in range(4)]
+    expected = [compile_and_count(cnf) for cnf in cnfs]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(compile_and_count, cnfs * 2))
+    assert results == expected * 2
+
+
+def test_threads_apply():
+    def build(var_count):
+        vtree = Vtree(var_count=var_count, vtree_type="balanced")
+        mgr = SddManager.from_vtree(vtree)
+        lits = [mgr.literal(i) for i in range(1, var_count + 1)]
+        f = mgr.false()
+        for i in range(var_count - 1):
+            f = f | (lits[i] & ~lits[i + 1])
+        return f.model_count()
+
+    expected = [build(n) for n in range(8, 16)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(build, range(8, 16)))
+    assert results == expected
+
+
+def test_threads_wmc():
+    """WmcManagers in different modes on the same sdd can propagate concurrently."""
+    mgr, node = SddManager.from_cnf_string(cnf_string(30, 80))
+    lits = range(1, mgr.var_count() + 1)
+
+    def marginals(wmc):
+        log_mode = wmc.one_weight == 0
+        for lit in lits:
+            wmc.set_literal_weight(lit, math.log(0.3) if log_mode else 0.3)
+            wmc.set_literal_weight(-lit, math.log(0.7) if log_mode else 0.7)
+        results = []
+        for _ in range(20):
+            results.append((wmc.propagate(), [wmc.literal_pr(lit) for lit in lits]))
+        return results
+
+    expected = [marginals(node.wmc(log_mode=log_mode)) for log_mode in [False, True] * 2]
+    wmcs = [node.wmc(log_mode=log_mode) for log_mode in [False, True] * 2]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(marginals, wmcs))
+    assert results == expected
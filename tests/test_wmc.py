@@ -0,0 +1,180 @@
+import itertools
+from pysdd.sdd import SddManager, Vtree, WmcManager
+import numpy as np
+import pytest
+
+
+def test_propagate_batch1():
+    vtree = Vtree(var_count=4, var_order=[2, 1, 4, 3], vtree_type="balanced")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d = sdd.vars
+    formula = (a & b) | (b & c) | (c & d)
+
+    #                    -d   -c   -b   -a   a    b    c    d
+    weights = np.array([[0.8, 0.7, 0.6, 0.5, 0.5, 0.4, 0.3, 0.2],
+                        [0.1, 0.2, 0.3, 0.4, 0.6, 0.7, 0.8, 0.9],
+                        [1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0]])
+    for log_mode in [False, True]:
+        wmc = WmcManager(formula, log_mode=log_mode)
+        query_weights = np.log(weights) if log_mode else weights
+        results = wmc.propagate_batch(query_weights)
+        expected = []
+        for row in query_weights:
+            wmc.set_literal_weights_from_array(row)
+            expected.append(wmc.propagate())
+        assert results == pytest.approx(expected)
+    assert results[2] == pytest.approx(np.log(8))
+
+
+def test_propagate_batch2():
+    """Trivial and literal roots, blocks and rows shorter than the number of variables."""
+    vtree = Vtree(var_count=4, var_order=[1, 2, 3, 4], vtree_type="right")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d = sdd.vars
+    rng = np.random.default_rng(42)
+    weights = rng.uniform(0.1, 1.0, size=(10, 6))
+    for formula in [a, ~b, a | ~a, a & ~a, (a | d) & ~c]:
+        wmc = WmcManager(formula, log_mode=False)
+        results = wmc.propagate_batch(weights, block_size=3)
+        expected = []
+        for row in weights:
+            wmc.set_literal_weights_from_array(row)
+            expected.append(wmc.propagate())
+        assert results == pytest.approx(expected)
+
+
+def test_propagate_batch_errors():
+    sdd = SddManager(var_count=2)
+    a, b = sdd.vars
+    wmc = (a | b).wmc(log_mode=False)
+    with pytest.raises(ValueError):
+        wmc.propagate_batch(np.ones((2, 6)))
+    with pytest.raises(ValueError):
+        wmc.propagate_batch(np.ones((2, 3)))
+    assert len(wmc.propagate_batch(np.ones((0, 4)))) == 0
+
+
+def test_mpe():
+    vtree = Vtree(var_count=5, var_order=[2, 1, 5, 3, 4], vtree_type="right")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d, e = sdd.vars
+    rng = np.random.default_rng(3)
+    weights = rng.uniform(0.0, 1.0, size=(6, 10))
+    weights[0, 4] = 0.0  # -a is impossible
+    for formula in [(a & b) | (b & c) | (c & d), a | ~e, ~b & d, a | ~a, a & ~a]:
+        for log_mode in [False, True]:
+            wmc = formula.wmc(log_mode=log_mode)
+            with np.errstate(divide="ignore"):
+                query_weights = np.log(weights) if log_mode else weights
+            assignments, mpes = wmc.mpe_batch(query_weights)
+            for row, assignment, mpe in zip(weights, assignments, mpes):
+                best, best_weight = None, 0.0
+                for values in itertools.product([0, 1], repeat=5):
+                    cond = formula
+                    for var, value in enumerate(values, 1):
+                        cond = cond.condition(var if value else -var)
+                    weight = np.prod([row[4 + var] if value else row[5 - var] for var, value in enumerate(values, 1)])
+                    if cond.is_true() and weight > best_weight:
+                        best, best_weight = values, weight
+                if best is None:
+                    assert list(assignment) == [-1] * 5
+                    assert mpe == (-np.inf if log_mode else 0.0)
+                else:
+                    assert tuple(assignment) == best
+                    assert mpe == pytest.approx(np.log(best_weight) if log_mode else best_weight)
+            wmc.set_literal_weights_from_array(query_weights[-1])
+            assignment, mpe = wmc.mpe()
+            assert list(assignment) == list(assignments[-1])
+            assert mpe == pytest.approx(mpes[-1])
+
+
+def test_propagate_incremental():
+    var_count = 40
+    vtree = Vtree(var_count=var_count, vtree_type="balanced")
+    sdd = SddManager.from_vtree(vtree)
+    lits = [None] + [sdd.literal(i) for i in range(1, var_count + 1)]
+    formula = sdd.true()
+    for i in range(1, var_count - 1, 2):
+        formula = formula & (lits[i] | ~lits[i + 1] | lits[i + 2])
+    rng = np.random.default_rng(1)
+    for log_mode in [False, True]:
+        wmc = formula.wmc(log_mode=log_mode)
+        wmc.propagate()
+        for step in range(50):
+            for var in rng.choice(np.arange(1, var_count + 1), size=2, replace=False):
+                pos, neg = (rng.random(), rng.random()) if step % 2 else (0.3, 0.7)
+                wmc.set_literal_weight(var, np.log(pos) if log_mode else pos)
+                wmc.set_literal_weight(-var, np.log(neg) if log_mode else neg)
+            result = wmc.propagate()
+            full = formula.wmc(log_mode=log_mode)
+            weights = [wmc.literal_weight(lit) for lit in range(-var_count, var_count + 1) if lit != 0]
+            full.set_literal_weights_from_array(np.array(weights))
+            assert result == pytest.approx(full.propagate())
+            if step % 10 == 0:
+                for lit in [1, -2, 17, -var_count]:
+                    assert wmc.literal_derivative(lit) == pytest.approx(full.literal_derivative(lit))
+                    assert wmc.literal_pr(lit) == pytest.approx(full.literal_pr(lit))
+
+
+def test_literal_derivatives():
+    vtree = Vtree(var_count=5, vtree_type="balanced")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d, e = sdd.vars
+    formula = (a & b) | (c & ~d)
+    lits = [-5, -4, -3, -2, -1, 1, 2, 3, 4, 5]
+    weights = np.array([0.9, 0.8, 0.7, 0.6, 0.5, 0.1, 0.2, 0.3, 0.4, 0.5])
+    for log_mode in [False, True]:
+        wmc = formula.wmc(log_mode=log_mode)
+        wmc.set_literal_weights_from_array(np.log(weights) if log_mode else weights)
+        wmc.propagate()
+        derivatives = wmc.literal_derivatives()
+        assert derivatives == pytest.approx([wmc.literal_derivative(lit) for lit in lits])
+        assert wmc.literal_prs() == pytest.approx([wmc.literal_pr(lit) for lit in lits])
+        with pytest.raises(ValueError):
+            derivatives[0] = 1.0
+        # The view stays valid after the manager is released
+        del wmc
+        assert len(derivatives) == 10
+
+
+def test_literal_weights_buffer():
+    from multiprocessing import shared_memory
+    vtree = Vtree(var_count=5, vtree_type="balanced")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d, e = sdd.vars
+    formula = (a & b) | (c & ~d)
+    weights = np.array([0.9, 0.8, 0.7, 0.6, 0.5, 0.1, 0.2, 0.3, 0.4, 0.5])
+
+    def expected(weights):
+        wmc = formula.wmc(log_mode=False)
+        wmc.set_literal_weights_from_array(weights)
+        return wmc.propagate()
+
+    wmc = formula.wmc(log_mode=False)
+    buffer = weights.copy()
+    wmc.set_literal_weights_buffer(buffer)
+    assert wmc.propagate() == pytest.approx(expected(weights))
+    assert wmc.literal_weight(-5) == 0.9
+    buffer[[1, 8]] = [0.3, 0.6]
+    assert wmc.propagate() == pytest.approx(expected(buffer))
+    wmc.set_literal_weight(2, 0.25)
+    assert buffer[6] == 0.25
+    wmc.set_literal_weights_buffer(None)
+    buffer[:] = 1.0
+    assert wmc.propagate() == pytest.approx(expected(np.array([0.9, 0.3, 0.7, 0.6, 0.5, 0.1, 0.25, 0.3, 0.6, 0.5])))
+    with pytest.raises(ValueError):
+        wmc.set_literal_weights_buffer(np.ones(4))
+
+    shm = shared_memory.SharedMemory(create=True, size=weights.nbytes)
+    try:
+        shared = np.ndarray(weights.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = weights
+        wmc.set_literal_weights_buffer(shared)
+        assert wmc.propagate() == pytest.approx(expected(weights))
+        shared[0] = 0.2
+        assert wmc.propagate() == pytest.approx(expected(shared))
+        wmc.set_literal_weights_buffer(None)
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
@@ -71,5 +71,36 @@ def test_wmc2(verbose=False):
         plt.savefig("stochastic_wmc.png")
 
 
+def test_wmc_packed():
+    vtree = Vtree(var_count=4, var_order=[2, 1, 4, 3], vtree_type="balanced")
+    sdd = SddManager.from_vtree(vtree)
+    a, b, c, d = [sdd.literal(i) for i in range(1, 5)]
+    formula = (a & b) | (b & c) | (c & d)
+
+    #                     -d   -c   -b   -a   a    b    c    d
+    weights = array('d', [0.8, 0.7, 0.6, 0.5, 0.5, 0.4, 0.3, 0.2])
+    wmcs = WmcStochastic(formula, log_mode=False)
+    wmcs.set_literal_weights_from_array(weights)
+    expected = wmcs.propagate_normal()
+
+    assert wmcs.propagate_packed(bitlength=10**6, rng=42) == pytest.approx(expected, abs=0.01)
+    assert wmcs.propagate_packed(bitlength=1000, rng=1) == wmcs.propagate_packed(bitlength=1000, rng=1)
+    counts = [wmcs.propagate_counts_packed(bitlength=100003, rng=rng) for rng in WmcStochastic.spawn_rngs(7, 4)]
+    assert all(nb_pos + nb_neg == 100003 for nb_pos, nb_neg, _ in counts)
+    nb_pos = sum(count[0] for count in counts)
+    assert nb_pos / (4 * 100003) * counts[0][2] == pytest.approx(expected, abs=0.01)
+
+    # Every node except the root is released once, after its last parent
+    circuit = formula.to_arrays()
+    nodes, offsets = WmcStochastic._releases(circuit)
+    assert sorted(nodes) == list(range(circuit.root))
+    for i in range(circuit.node_count):
+        for j in nodes[offsets[i]:offsets[i + 1]]:
+            parents = [p for p in range(circuit.node_count)
+                       if j in circuit.primes[circuit.element_offsets[p]:circuit.element_offsets[p + 1]]
+                       or j in circuit.subs[circuit.element_offsets[p]:circuit.element_offsets[p + 1]]]
+            assert max(parents) == i
+
+
 if __name__ == "__main__":
     test_wmc2(verbose=True)